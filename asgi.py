@@ -0,0 +1,437 @@
+"""Modo ASGI para tráfico de lectura con mucha concurrencia.
+
+    uvicorn asgi:app --workers 4
+
+Expone las mismas rutas que app.py. Los GET de lectura más pedidos se atienden
+de forma nativa con el engine asyncio de SQLAlchemy (aiosqlite en local,
+asyncmy en producción), así un cliente o una consulta lenta no ocupa un thread:
+
+    GET /api/posts, /api/posts/<id>, /api/posts/<id>/comments,
+    GET /api/categories, /api/categories/<id>, /api/users, /api/users/<id>
+
+Todo lo demás (escrituras, login, búsqueda, export, stats, métricas) pasa a la
+app Flask de siempre montada con a2wsgi. Las rutas nativas también delegan en
+Flask cualquier caso que no sea la respuesta feliz (token ausente, inválido o
+revocado, rol insuficiente, 404, cursor inválido), así los errores son
+exactamente los mismos que en modo WSGI. Comparten con Flask el cache de
+respuestas, los ETag y las métricas.
+
+Configuración: la de create_app(); ASYNC_DATABASE_URL pisa la URI async que se
+deriva de DATABASE_URL. Las réplicas de lectura (replicas.py) aplican sólo a
+las rutas servidas por Flask.
+"""
+import contextlib
+import contextvars
+import hashlib
+import time
+from datetime import timezone
+from urllib.parse import urlencode
+
+from a2wsgi import WSGIMiddleware
+from flask_jwt_extended import decode_token
+from sqlalchemy import event, func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Mount, Route
+from werkzeug.http import http_date, parse_date, parse_etags
+
+from app import create_app
+from cache import response_cache, variant_key
+from compression import compression, etag_variants, ENCODINGS
+from metrics import metrics
+from models import Usuario, Post, Comentario, Categoria, post_categoria
+from revocation import revocations
+from views import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, keyset, split_page, post_sort, parse_ids, en_categorias, _latest,
+    POSTS_VERSION,
+    post_dump, comentario_dump, dump_usuario, dump_categoria,
+)
+
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "mysql": "mysql+asyncmy"}
+
+# [sentencias, segundos] de SQL del request nativo en curso
+_sql = contextvars.ContextVar("asgi_sql", default=None)
+
+
+def async_url(config):
+    """URI del engine async: ASYNC_DATABASE_URL o DATABASE_URL con el driver async."""
+    if config.get("ASYNC_DATABASE_URL"):
+        return config["ASYNC_DATABASE_URL"]
+    url = make_url(config["SQLALCHEMY_DATABASE_URI"])
+    return url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()])
+
+
+class Delegar(Exception):
+    """La ruta nativa no responde este caso: lo atiende Flask."""
+
+
+class ReadServer:
+    def __init__(self, flask_app):
+        self.flask = flask_app
+        self.wsgi = WSGIMiddleware(flask_app)
+        options = dict(flask_app.config["SQLALCHEMY_ENGINE_OPTIONS"])
+        self.engine = create_async_engine(async_url(flask_app.config), **options)
+        self.session = async_sessionmaker(self.engine, expire_on_commit=False)
+        event.listen(self.engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(self.engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+    # --- JWT: mismas validaciones que jwt_required() ---
+    async def claims(self, request):
+        auth = request.headers.get("authorization", "")
+        if not auth.startswith("Bearer "):
+            raise Delegar()
+
+        def verify():
+            with self.flask.app_context():
+                try:
+                    claims = decode_token(auth[len("Bearer "):])
+                except Exception:
+                    return None
+                # la revocación puede refrescar su copia desde la base: va en un thread
+                if claims.get("type") != "access" or revocations.is_revoked({}, claims):
+                    return None
+                return claims
+
+        claims = await run_in_threadpool(verify)
+        if claims is None:
+            raise Delegar()
+        return claims
+
+    async def require_roles(self, request, *roles):
+        claims = await self.claims(request)
+        if claims.get("role") not in roles:
+            raise Delegar()
+        return claims
+
+    # --- respuestas ---
+    def json(self, obj, headers=None):
+        response = self.flask.json.response(obj)
+        return Response(response.get_data(), status_code=200, headers=headers,
+                        media_type=response.mimetype)
+
+
+def cache_key(request):
+    return f"{request.url.path}?{urlencode(sorted(request.query_params.multi_items()))}"
+
+
+def page_limit(request):
+    try:
+        limit = int(request.query_params.get("limit", DEFAULT_PAGE_SIZE))
+    except ValueError:
+        limit = DEFAULT_PAGE_SIZE
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+async def conditional_cached(request, probe, tags, build):
+    """Mismo comportamiento que @conditional(probe) + @cached(*tags) de cache.py:
+    `probe()` sólo corre si el cliente mandó validadores o en un miss del cache,
+    y los validadores se guardan con la entrada. Si devuelve None (el recurso no
+    existe) el request lo resuelve Flask."""
+    key = cache_key(request)
+
+    async def validators():
+        probed = await probe()
+        if probed is None:
+            raise Delegar()
+        parts, last_modified = probed
+        etag = hashlib.sha1(repr((key, parts)).encode()).hexdigest()
+        if last_modified is not None:
+            last_modified = last_modified.replace(microsecond=0, tzinfo=timezone.utc)
+        return etag, last_modified
+
+    etag = last_modified = None
+    if request.headers.get("if-none-match") or request.headers.get("if-modified-since"):
+        etag, last_modified = await validators()
+        if request.headers.get("if-none-match"):
+            if_none_match = parse_etags(request.headers["if-none-match"])
+            matched = next((t for t in etag_variants(etag) if if_none_match.contains(t)), None)
+            if matched is not None:
+                return _with_validators(Response(status_code=304), matched, last_modified)
+        else:
+            since = parse_date(request.headers.get("if-modified-since"))
+            if since and last_modified and last_modified <= since:
+                return _with_validators(Response(status_code=304), etag, last_modified)
+
+    if not response_cache.enabled:
+        if etag is None:
+            etag, last_modified = await validators()
+        return _with_validators(await build(), etag, last_modified)
+
+    encoding = compression.negotiate(request.headers.get("accept-encoding"))
+    started_at = time.time_ns()
+    hit = response_cache.get(variant_key(key, encoding))
+    if hit is None:
+        hit = response_cache.get(key) if encoding else None
+        if hit is None:
+            # el probe va antes de armar la respuesta (ver cache.cached)
+            if etag is None:
+                etag, last_modified = await validators()
+            response = _with_validators(await build(), etag, last_modified)
+            hit = response.body, [(k, v) for k, v in response.headers.items() if k.lower() != "content-length"]
+            response_cache.set(key, *hit, tags, started_at)
+        if encoding:
+            hit = compression.encode(*hit, encoding)
+            response_cache.set(variant_key(key, encoding), *hit, tags, started_at)
+    body, headers = hit
+    response = Response(body, status_code=200, headers=dict(headers))
+    if "etag" not in response.headers:
+        response = _with_validators(response, etag, last_modified)
+    return response
+
+
+def _with_validators(response, etag, last_modified):
+    if etag is not None:
+        response.headers["ETag"] = f'"{etag}"'
+    if last_modified is not None:
+        response.headers["Last-Modified"] = http_date(last_modified)
+    return response
+
+
+async def paginated(server, request, items, next_cursor):
+    # igual que views.paginated_response
+    if request.query_params.get("format") == "array":
+        return server.json(items, {"X-Next-Cursor": next_cursor} if next_cursor else None)
+    return server.json({"items": items, "next_cursor": next_cursor})
+
+
+# --- probes (las mismas consultas que views.py) ---
+async def categorias_probe(s):
+    total, updated = (await s.execute(select(func.count(Categoria.id), func.max(Categoria.updated_at)))).one()
+    return (total, updated), updated
+
+
+async def posts_probe(s):
+    posts, comentarios, created, updated, commented, comentario_updated = (await s.execute(POSTS_VERSION)).one()
+    categorias, categorias_modified = await categorias_probe(s)
+    return (
+        (posts, comentarios, created, updated, commented, comentario_updated) + categorias,
+        _latest(created, updated, commented, comentario_updated, categorias_modified),
+    )
+
+
+async def post_probe(s, id):
+    row = (await s.execute(
+        select(Post.fecha_creacion, Post.updated_at, Post.comment_count, Post.last_comment_at)
+        .where(Post.id == id, Post.deleted_at.is_(None))
+    )).first()
+    if row is None:
+        return None
+    categorias_updated = await s.scalar(
+        select(func.max(Categoria.updated_at))
+        .join(post_categoria, post_categoria.c.categoria_id == Categoria.id)
+        .where(post_categoria.c.post_id == id)
+    )
+    modified = _latest(row.fecha_creacion, row.updated_at, row.last_comment_at, categorias_updated)
+    return (tuple(row), categorias_updated), modified
+
+
+async def comentarios_probe(s, post_id):
+    if (await s.execute(select(Post.id).where(Post.id == post_id, Post.deleted_at.is_(None)))).first() is None:
+        return None
+    total, created, updated = (await s.execute(
+        select(func.count(Comentario.id), func.max(Comentario.fecha_creacion), func.max(Comentario.updated_at))
+        .where(Comentario.post_id == post_id, Comentario.is_visible.is_(True))
+    )).one()
+    return (total, created, updated), _latest(created, updated)
+
+
+# --- rutas nativas ---
+async def users_list(server, request):
+    await server.require_roles(request, "admin")
+    if request.query_params.get("fields"):
+        # ?fields= (load_only) lo resuelve Flask
+        raise Delegar()
+    async with server.session() as s:
+        users = (await s.scalars(select(Usuario).where(Usuario.deleted_at.is_(None)))).all()
+        return server.json([dump_usuario(u) for u in users])
+
+
+async def user_detail(server, request, id):
+    claims = await server.claims(request)
+    async with server.session() as s:
+        user = await s.get(Usuario, id)
+        if user is None or user.deleted_at is not None:
+            raise Delegar()
+        if claims.get("role") != "admin" and int(claims["sub"]) != user.id:
+            raise Delegar()
+        return server.json(dump_usuario(user))
+
+
+async def posts_list(server, request):
+    if any(request.query_params.get(p) for p in ("ids", "include", "fields")):
+        # el multi-get, los documentos compuestos y ?fields= los arma Flask
+        raise Delegar()
+    async with server.session() as s:
+        async def build():
+            limit = page_limit(request)
+            stmt = select(Post).where(Post.is_published.is_(True))
+            try:
+                if request.query_params.get("categoria"):
+                    stmt = stmt.where(en_categorias(parse_ids(request.query_params["categoria"], "categoria")))
+                sort_col = post_sort(request.query_params.get("sort"))
+                stmt = keyset(stmt, sort_col, Post.id, request.query_params.get("cursor"), limit, descending=True)
+            except ValueError:
+                raise Delegar()
+            posts, next_cursor = split_page((await s.scalars(stmt)).all(), limit, sort_col.key)
+            return await paginated(server, request, [post_dump(p) for p in posts], next_cursor)
+
+        return await conditional_cached(request, lambda: posts_probe(s), ["posts"], build)
+
+
+async def post_detail(server, request, id):
+    if request.query_params.get("include"):
+        raise Delegar()
+    async with server.session() as s:
+        async def build():
+            post = await s.get(Post, id)
+            if post is None or post.deleted_at is not None:
+                raise Delegar()
+            return server.json(post_dump(post))
+
+        return await conditional_cached(request, lambda: post_probe(s, id), [f"post:{id}", "posts:detail"], build)
+
+
+async def comments_list(server, request, post_id):
+    if request.query_params.get("fields"):
+        raise Delegar()
+    async with server.session() as s:
+        async def build():
+            limit = page_limit(request)
+            try:
+                stmt = keyset(
+                    select(Comentario).where(Comentario.post_id == post_id, Comentario.is_visible.is_(True)),
+                    Comentario.fecha_creacion, Comentario.id, request.query_params.get("cursor"), limit,
+                )
+            except ValueError:
+                raise Delegar()
+            comentarios, next_cursor = split_page((await s.scalars(stmt)).all(), limit)
+            return await paginated(server, request, [comentario_dump(c) for c in comentarios], next_cursor)
+
+        return await conditional_cached(request, lambda: comentarios_probe(s, post_id), [f"comments:{post_id}"], build)
+
+
+async def categories_list(server, request):
+    if request.query_params.get("with_counts") in ("1", "true"):
+        # el GROUP BY lo resuelve Flask
+        raise Delegar()
+    async with server.session() as s:
+        async def build():
+            categorias = (await s.scalars(select(Categoria))).all()
+            return server.json([dump_categoria(c) for c in categorias])
+
+        return await conditional_cached(request, lambda: categorias_probe(s), ["categories"], build)
+
+
+async def category_detail(server, request, id):
+    async with server.session() as s:
+        categoria = await s.get(Categoria, id)
+        if categoria is None:
+            raise Delegar()
+        return server.json(dump_categoria(categoria))
+
+
+# (ruta de Starlette, regla de Flask para las métricas, handler)
+NATIVE_ROUTES = (
+    ("/api/users", "/api/users", users_list),
+    ("/api/users/{id:int}", "/api/users/<int:id>", user_detail),
+    ("/api/posts", "/api/posts", posts_list),
+    ("/api/posts/{id:int}", "/api/posts/<int:id>", post_detail),
+    ("/api/posts/{post_id:int}/comments", "/api/posts/<int:post_id>/comments", comments_list),
+    ("/api/categories", "/api/categories", categories_list),
+    ("/api/categories/{id:int}", "/api/categories/<int:id>", category_detail),
+)
+
+
+class NativeRoute:
+    """Endpoint ASGI: responde con el handler async o delega en Flask."""
+
+    def __init__(self, server, rule, handler):
+        self.server = server
+        self.rule = rule
+        self.handler = handler
+
+    async def __call__(self, scope, receive, send):
+        request = Request(scope, receive)
+        if request.method not in ("GET", "HEAD"):
+            return await self.server.wsgi(scope, receive, send)
+        started = time.perf_counter()
+        sql = [0, 0.0]
+        token = _sql.set(sql)
+        try:
+            response = await self.handler(self.server, request, **request.path_params)
+        except Delegar:
+            # Flask registra sus propias métricas
+            return await self.server.wsgi(scope, receive, send)
+        finally:
+            _sql.reset(token)
+        if response.status_code == 200:
+            encode(request, response)
+        origin = request.headers.get("origin")
+        if origin:
+            # lo mismo que agrega flask-cors (origins="*", supports_credentials=True)
+            response.headers["Access-Control-Allow-Origin"] = origin
+            response.headers["Access-Control-Allow-Credentials"] = "true"
+            response.headers["Vary"] = ", ".join(filter(None, ("Origin", response.headers.get("vary"))))
+        await response(scope, receive, send)
+        metrics.observe(self.rule, request.method, response.status_code, time.perf_counter() - started,
+                        sql[0], sql[1], len(response.body))
+
+
+def encode(request, response):
+    """Lo mismo que compression._after_request para las respuestas nativas."""
+    if not compression.compressible(response.headers.get("content-type"), None):
+        return
+    response.headers["Vary"] = "Accept-Encoding"
+    encoding = response.headers.get("content-encoding")
+    if encoding is None:
+        encoding = compression.negotiate(request.headers.get("accept-encoding"))
+        if encoding is None or len(response.body) < compression.min_size:
+            return
+        response.body = compression.compress(response.body, encoding)
+        response.headers["Content-Encoding"] = encoding
+        response.headers["Content-Length"] = str(len(response.body))
+    elif encoding not in ENCODINGS:
+        return
+    etag = response.headers.get("etag")
+    if etag and not etag.endswith(f'-{encoding}"'):
+        response.headers["ETag"] = f'{etag[:-1]}-{encoding}"'
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("asgi_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("asgi_started")
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    sql = _sql.get()
+    if sql is not None:
+        sql[0] += 1
+        sql[1] += elapsed
+
+
+def create_asgi_app(config=None):
+    server = ReadServer(create_app(config))
+    routes = [
+        Route(path, NativeRoute(server, rule, handler), methods=["GET", "HEAD", "POST", "PUT", "PATCH", "DELETE"])
+        for path, rule, handler in NATIVE_ROUTES
+    ]
+    routes.append(Mount("/", app=server.wsgi))
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        yield
+        await server.engine.dispose()
+
+    application = Starlette(routes=routes, lifespan=lifespan)
+    application.state.server = server
+    return application
+
+
+app = create_asgi_app()
@@ -0,0 +1,422 @@
+"""Benchmark de endpoints: latencia, filas/s y cantidad de SQL por ruta.
+
+Levanta `app` contra una base local (SQLite por defecto, o la que indique
+--database-url, ej. un MySQL de pruebas), la carga con datos sintéticos a
+varios tamaños y mide cada ruta registrada en app.py con el test client de Flask:
+
+    python bench.py --sizes 1000,100000,1000000 --output bench_results.json --budget bench_budget.json
+
+Los tamaños se cargan de menor a mayor sobre la misma base (cada tamaño agrega
+las filas que faltan). Los resultados se escriben en JSON y, si se pasa
+--budget, el proceso termina con código 1 si alguna ruta supera su presupuesto.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+N_USERS = 100
+N_CATEGORIAS = 20
+BENCH_PASSWORD = "bench123"
+
+
+# --- datos sintéticos ---
+def seed(n_posts, chunk_size=10000):
+    """Lleva la base a `n_posts` posts usando el generador de dbscript.py."""
+    import dbscript
+    from models import db, Usuario, Post
+
+    actuales = db.session.query(db.func.count(Post.id)).scalar()
+    dbscript.seed(
+        users=max(0, N_USERS - db.session.query(db.func.count(Usuario.id)).scalar()),
+        posts=n_posts - actuales, categorias=N_CATEGORIAS, password=BENCH_PASSWORD,
+        seed=n_posts, chunk_size=chunk_size,
+    )
+
+
+# --- escenarios ---
+class Context:
+    """Ids de muestra y tokens para armar los requests."""
+
+    def __init__(self, app):
+        from flask_jwt_extended import create_access_token
+        from models import db, Usuario, Post, Comentario
+
+        self.app = app
+        self.max_post = db.session.query(db.func.max(Post.id)).scalar()
+        self.max_comentario = db.session.query(db.func.max(Comentario.id)).scalar()
+        # cuentas de demo de dbscript.py
+        ids = dict(db.session.query(Usuario.username, Usuario.id).filter(Usuario.username.in_(("admin", "valen"))))
+        self.tokens = {
+            role: create_access_token(identity=str(ids[username]), additional_claims={"role": role})
+            for role, username in (("admin", "admin"), ("user", "valen"))
+        }
+        self.seq = 0
+        self.rng = random.Random(0)
+
+    def unique(self, prefix):
+        self.seq += 1
+        return f"{prefix}-{os.getpid()}-{time.time_ns()}-{self.seq}"
+
+    def post_id(self):
+        return self.rng.randint(1, self.max_post)
+
+    def new_post(self):
+        from models import db, Post
+        post = Post(titulo="para borrar", contenido="x", usuario_id=1)
+        db.session.add(post)
+        db.session.commit()
+        return post.id
+
+    def new_comentario(self):
+        from models import db, Comentario
+        comentario = Comentario(texto="para borrar", usuario_id=1, post_id=1)
+        db.session.add(comentario)
+        db.session.commit()
+        return comentario.id
+
+    def new_user(self):
+        from models import db, Usuario
+        user = Usuario(username=self.unique("u")[:50], email=self.unique("e")[:90] + "@mail.com")
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+    def new_categoria(self):
+        from models import db, Categoria
+        categoria = Categoria(nombre=self.unique("c")[:50])
+        db.session.add(categoria)
+        db.session.commit()
+        return categoria.id
+
+
+def request(method, url, role=None, **kwargs):
+    return {"method": method, "url": url, "role": role, **kwargs}
+
+
+# (endpoint, método) -> función(ctx) que arma el request; la preparación no se mide
+SCENARIOS = {
+    ("users_api", "GET"): lambda ctx: request("GET", "/api/users", "admin"),
+    ("user_detail_api", "GET"): lambda ctx: request("GET", "/api/users/2", "admin"),
+    ("user_detail_api", "DELETE"): lambda ctx: request("DELETE", f"/api/users/{ctx.new_user()}", "admin"),
+    ("user_register_api", "POST"): lambda ctx: request("POST", "/api/register", json={
+        "username": ctx.unique("r")[:50], "email": ctx.unique("r")[:90] + "@mail.com", "password": BENCH_PASSWORD}),
+    ("auth_login_api", "POST"): lambda ctx: request("POST", "/api/login", json={
+        "email": "valen@mail.com", "password": "valen123"}),
+    ("user_role_update_api", "PATCH"): lambda ctx: request(
+        "PATCH", f"/api/users/{ctx.new_user()}/role", "admin", json={"role": "moderator"}),
+    ("user_deactivate_api", "PATCH"): lambda ctx: request(
+        "PATCH", f"/api/users/{ctx.new_user()}/deactivate", "admin"),
+    ("posts_api", "GET"): lambda ctx: request("GET", "/api/posts?limit=20"),
+    ("posts_api", "POST"): lambda ctx: request("POST", "/api/posts", "admin", json={
+        "titulo": "Nuevo post", "contenido": "Contenido del benchmark", "categorias": [1, 2]}),
+    ("post_bulk_api", "POST"): lambda ctx: request("POST", "/api/posts/bulk", "admin", json=[
+        {"titulo": f"Bulk {i}", "contenido": "Contenido masivo", "categorias": [1, 3]} for i in range(100)]),
+    ("post_search_api", "GET"): lambda ctx: request("GET", "/api/posts/search?q=python flask&limit=20"),
+    ("post_detail_api", "GET"): lambda ctx: request("GET", f"/api/posts/{ctx.post_id()}"),
+    ("post_detail_api", "PUT"): lambda ctx: request(
+        "PUT", f"/api/posts/{ctx.new_post()}", "admin", json={"titulo": "Editado", "categorias": [4]}),
+    ("post_detail_api", "DELETE"): lambda ctx: request("DELETE", f"/api/posts/{ctx.new_post()}", "admin"),
+    ("comentarios_api", "GET"): lambda ctx: request("GET", f"/api/posts/{ctx.post_id()}/comments"),
+    ("comentarios_api", "POST"): lambda ctx: request(
+        "POST", f"/api/posts/{ctx.post_id()}/comments", "user", json={"texto": "Comentario de benchmark"}),
+    ("comentarios_bulk_api", "POST"): lambda ctx: request(
+        "POST", f"/api/posts/{ctx.post_id()}/comments/bulk", "user",
+        data="\n".join(json.dumps({"texto": f"c{i}"}) for i in range(100)), content_type="application/x-ndjson"),
+    ("comentario_detail_api", "PUT"): lambda ctx: request(
+        "PUT", f"/api/comments/{ctx.new_comentario()}", "admin", json={"texto": "Editado"}),
+    ("comentario_detail_api", "DELETE"): lambda ctx: request(
+        "DELETE", f"/api/comments/{ctx.new_comentario()}", "admin"),
+    ("categorias_api", "GET"): lambda ctx: request("GET", "/api/categories"),
+    ("categorias_api", "POST"): lambda ctx: request(
+        "POST", "/api/categories", "admin", json={"nombre": ctx.unique("cat")[:50]}),
+    ("categoria_detail_api", "GET"): lambda ctx: request("GET", "/api/categories/1"),
+    ("categoria_detail_api", "PUT"): lambda ctx: request(
+        "PUT", f"/api/categories/{ctx.new_categoria()}", "admin", json={"nombre": ctx.unique("cat")[:50]}),
+    ("categoria_detail_api", "DELETE"): lambda ctx: request(
+        "DELETE", f"/api/categories/{ctx.new_categoria()}", "admin"),
+    ("stats_api", "GET"): lambda ctx: request("GET", "/api/stats", "admin"),
+    # export incremental: lo que cambió en la última hora
+    ("export_api", "GET"): lambda ctx: request(
+        "GET", f"/api/export/posts.ndjson?since={(datetime.utcnow() - timedelta(hours=1)).isoformat()}", "admin"),
+    ("metrics_api", "GET"): lambda ctx: request("GET", "/api/metrics", "admin"),
+}
+
+# variantes por query string de rutas que ya están en SCENARIOS: nombre -> escenario
+VARIANTS = {
+    "GET /api/categories?with_counts=1": lambda ctx: request("GET", "/api/categories?with_counts=1&limit=50"),
+    # la categoría más popular (Zipf) corta la página enseguida; la menos popular recorre más posts
+    "GET /api/posts?categoria=<popular>": lambda ctx: request("GET", "/api/posts?categoria=1&limit=20"),
+    "GET /api/posts?categoria=<rara>": lambda ctx: request("GET", f"/api/posts?categoria={N_CATEGORIAS}&limit=20"),
+    "GET /api/posts?sort=most_discussed": lambda ctx: request("GET", "/api/posts?sort=most_discussed&limit=20"),
+    "GET /api/posts?ids=<20>&include=comments,autor,categorias": lambda ctx: request(
+        "GET", "/api/posts?include=comments,autor,categorias&ids=" + ",".join(str(ctx.post_id()) for _ in range(20))
+    ),
+    "GET /api/posts/<int:id>?include=comments,autor": lambda ctx: request(
+        "GET", f"/api/posts/{ctx.post_id()}?include=comments,autor"
+    ),
+    "GET /api/posts?fields=summary": lambda ctx: request("GET", "/api/posts?fields=summary&limit=100"),
+    "GET /api/posts?fields=id,titulo,fecha_creacion,autor": lambda ctx: request(
+        "GET", "/api/posts?fields=id,titulo,fecha_creacion,autor&limit=100"
+    ),
+}
+
+
+def bench_revocation(app, client, ctx, iterations, warmup, statements):
+    """GET /api/users/<id> autenticado con el chequeo de revocación de
+    revocation.py (copia en memoria), sin chequeo, y refrescando la copia en
+    cada request (lo que costaría ir a la base por request)."""
+    from revocation import revocations
+
+    jwt = app.extensions["flask-jwt-extended"]
+    scenario = SCENARIOS[("user_detail_api", "GET")]
+    interval = revocations.refresh_interval
+    modos = {
+        "sin chequeo": (lambda jwt_header, jwt_payload: False, interval),
+        "en memoria": (revocations.is_revoked, interval),
+        "refresco por request": (revocations.is_revoked, 0),
+    }
+    result = {}
+    try:
+        for modo, (loader, refresh) in modos.items():
+            jwt.token_in_blocklist_loader(loader)
+            revocations.refresh_interval = refresh
+            # que el próximo request ya use el intervalo nuevo
+            revocations._next_refresh = 0.0
+            result[f"GET /api/users/<int:id> [revocación: {modo}]"] = bench_route(
+                client, ctx, scenario, iterations, warmup, statements
+            )
+    finally:
+        jwt.token_in_blocklist_loader(revocations.is_revoked)
+        revocations.refresh_interval = interval
+    return result
+
+
+def routes(app):
+    """(endpoint, método, regla) de cada ruta registrada con un método implementado."""
+    for rule in app.url_map.iter_rules():
+        if rule.endpoint == "static":
+            continue
+        view_class = getattr(app.view_functions[rule.endpoint], "view_class", None)
+        for method in sorted(rule.methods - {"HEAD", "OPTIONS"}):
+            if view_class is not None and not hasattr(view_class, method.lower()):
+                continue
+            yield rule.endpoint, method, rule.rule
+
+
+def count_rows(response):
+    if response.mimetype == "application/x-ndjson":
+        return response.get_data().count(b"\n")
+    data = response.get_json(silent=True)
+    if isinstance(data, dict) and isinstance(data.get("items"), list):
+        return len(data["items"])
+    if isinstance(data, list):
+        return len(data)
+    return 1
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def bench_route(client, ctx, scenario, iterations, warmup, statements):
+    latencies, rows, sql, statuses = [], 0, [], set()
+    for i in range(warmup + iterations):
+        req = scenario(ctx)
+        headers = {}
+        if req["role"]:
+            headers["Authorization"] = f"Bearer {ctx.tokens[req['role']]}"
+        kwargs = {k: req[k] for k in ("json", "data", "content_type") if k in req}
+        statements[0] = 0
+        started = time.perf_counter()
+        response = client.open(req["url"], method=req["method"], headers=headers, **kwargs)
+        response.get_data()
+        elapsed = time.perf_counter() - started
+        if i < warmup:
+            continue
+        latencies.append(elapsed)
+        sql.append(statements[0])
+        rows += count_rows(response)
+        statuses.add(response.status_code)
+    total = sum(latencies)
+    return {
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 3),
+        "rows_per_s": round(rows / total, 1) if total else 0.0,
+        "statements": max(sql),
+        "status": sorted(statuses),
+    }
+
+
+def bench_serialization(n=10000):
+    """Microbenchmark: PostSchema().dump por fila contra el dumper compilado."""
+    from models import Post, Usuario, Categoria
+    from schemas import PostSchema
+    from views import dump_post
+
+    autor = Usuario(id=1, username="bench", email="bench@mail.com")
+    posts = [
+        Post(id=i, titulo=f"Post {i}", contenido="Contenido " * 50, fecha_creacion=datetime(2025, 1, 1),
+             updated_at=None, is_published=True, usuario_id=1, usuario=autor,
+             categorias=[Categoria(id=1, nombre="Tecnología")])
+        for i in range(n)
+    ]
+    result = {}
+    for name, dump in (("marshmallow", lambda p: PostSchema().dump(p)), ("compiled", dump_post)):
+        started = time.perf_counter()
+        for post in posts:
+            dump(post)
+        result[f"{name}_rows_per_s"] = round(n / (time.perf_counter() - started), 1)
+    return result
+
+
+_COLD_START = """
+import json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+application = app.create_app({"SQLALCHEMY_DATABASE_URI": sys.argv[1]})
+created = time.perf_counter()
+response = application.test_client().get("/api/categories")
+done = time.perf_counter()
+print(json.dumps({
+    "import_ms": round((imported - started) * 1000, 3),
+    "create_app_ms": round((created - imported) * 1000, 3),
+    "first_request_ms": round((done - created) * 1000, 3),
+    "total_ms": round((done - started) * 1000, 3),
+    "status": response.status_code,
+}))
+"""
+
+
+def cold_start(database_url):
+    """Import + create_app() + primer request, en un intérprete nuevo."""
+    import subprocess
+    output = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", _COLD_START, database_url],
+        check=True, capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def check_budget(results, budget):
+    """Devuelve la lista de violaciones del presupuesto."""
+    violations = []
+    default = budget.get("default", {})
+    for size, routes_result in results["sizes"].items():
+        for route, metrics in routes_result.items():
+            if "error" in metrics:
+                violations.append(f"[{size}] {route}: {metrics['error']}")
+                continue
+            limits = dict(default, **budget.get("routes", {}).get(route, {}))
+            for metric, limit in limits.items():
+                if metric.startswith("min_"):
+                    value = metrics.get(metric[4:])
+                    if value is not None and value < limit:
+                        violations.append(f"[{size}] {route}: {metric[4:]}={value} < {limit}")
+                elif metrics.get(metric) is not None and metrics[metric] > limit:
+                    violations.append(f"[{size}] {route}: {metric}={metrics[metric]} > {limit}")
+    return violations
+
+
+def print_route(route, metrics):
+    print(f"  {route:55} p50={metrics['p50_ms']:9.2f}ms p99={metrics['p99_ms']:9.2f}ms "
+          f"sql={metrics['statements']:3} rows/s={metrics['rows_per_s']:10.1f} {metrics['status']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,100000,1000000",
+                        help="cantidades de posts separadas por coma (default: 1000,100000,1000000)")
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--database-url", help="base a usar (default: SQLite en un directorio temporal)")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--budget", help="archivo JSON con presupuestos por ruta")
+    parser.add_argument("--routes", help="filtrar rutas que contengan este texto")
+    parser.add_argument("--with-cache", action="store_true", help="no desactivar el cache de respuestas")
+    args = parser.parse_args(argv)
+
+    workdir = None
+    if not args.database_url:
+        workdir = tempfile.mkdtemp(prefix="miniblog-bench-")
+        args.database_url = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+
+    from sqlalchemy import event
+    from app import create_app
+    from models import db
+    import search
+
+    config = {"SQLALCHEMY_DATABASE_URI": args.database_url}
+    if not args.with_cache:
+        config["RESPONSE_CACHE_SIZE"] = 0
+    app = create_app(config)
+
+    statements = [0]
+    results = {"database_url": args.database_url, "sizes": {}}
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", lambda *a: statements.__setitem__(0, statements[0] + 1))
+        db.create_all()
+        search.ensure_index()
+        results["serialization"] = bench_serialization()
+        print(f"serialización: {results['serialization']}")
+
+        for size in sorted(int(s) for s in args.sizes.split(",")):
+            started = time.perf_counter()
+            seed(size)
+            print(f"== {size} posts (carga: {time.perf_counter() - started:.1f}s)")
+            ctx = Context(app)
+            client = app.test_client()
+            size_results = {}
+            for endpoint, method, rule in routes(app):
+                route = f"{method} {rule}"
+                if args.routes and args.routes not in route:
+                    continue
+                scenario = SCENARIOS.get((endpoint, method))
+                if scenario is None:
+                    print(f"  {route}: sin escenario")
+                    size_results[route] = {"error": "sin escenario"}
+                    continue
+                metrics = bench_route(client, ctx, scenario, args.iterations, args.warmup, statements)
+                size_results[route] = metrics
+                print_route(route, metrics)
+            for route, scenario in VARIANTS.items():
+                if args.routes and args.routes not in route:
+                    continue
+                metrics = bench_route(client, ctx, scenario, args.iterations, args.warmup, statements)
+                size_results[route] = metrics
+                print_route(route, metrics)
+            revocation = bench_revocation(app, client, ctx, args.iterations, args.warmup, statements)
+            for route, metrics in revocation.items():
+                if args.routes and args.routes not in route:
+                    continue
+                size_results[route] = metrics
+                print_route(route, metrics)
+            results["sizes"][str(size)] = size_results
+
+    results["cold_start"] = cold_start(args.database_url)
+    print(f"arranque en frío: {results['cold_start']}")
+
+    with open(args.output, "w", encoding="utf-8") as fh:
+        json.dump(results, fh, indent=2, sort_keys=True)
+    print(f"Resultados en {args.output}")
+
+    if args.budget:
+        with open(args.budget, encoding="utf-8") as fh:
+            violations = check_budget(results, json.load(fh))
+        for violation in violations:
+            print(f"PRESUPUESTO EXCEDIDO {violation}")
+        if violations:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,358 @@
+"""Cache de respuestas para los GET públicos (posts, comentarios, categorías).
+
+Guarda el cuerpo JSON ya serializado en un LRU con TTL por proceso. Cada
+entrada lleva tags ("posts", "post:3", "comments:3", ...) y las vistas de
+escritura invalidan sólo los tags afectados.
+
+Con RESPONSE_CACHE_DIR configurado se agrega un segundo nivel en disco (idealmente
+un tmpfs como /dev/shm) que comparten todos los workers de gunicorn de la
+máquina: las entradas se publican ahí y las invalidaciones marcan un archivo por
+tag, así ningún worker sirve una entrada guardada antes de la última invalidación.
+"""
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import timezone
+from functools import wraps
+from urllib.parse import urlencode
+
+from flask import current_app, g, request, Response
+
+from compression import compression, etag_variants
+
+
+class ResponseCache:
+    def __init__(self, maxsize=512, ttl=30, shared_dir=None):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._tag_keys = {}
+        self._tag_stamps = {}
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.configure(maxsize, ttl, shared_dir)
+
+    def configure(self, maxsize, ttl, shared_dir=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.shared_dir = shared_dir
+        if shared_dir:
+            os.makedirs(os.path.join(shared_dir, "tags"), exist_ok=True)
+        self.clear()
+
+    def init_app(self, app):
+        app.config.setdefault("RESPONSE_CACHE_SIZE", 512)
+        app.config.setdefault("RESPONSE_CACHE_TTL", 30)
+        app.config.setdefault("RESPONSE_CACHE_DIR", None)
+        self.configure(
+            app.config["RESPONSE_CACHE_SIZE"],
+            app.config["RESPONSE_CACHE_TTL"],
+            app.config["RESPONSE_CACHE_DIR"],
+        )
+        app.extensions["response_cache"] = self
+
+    @property
+    def enabled(self):
+        return self.maxsize > 0
+
+    # --- lectura / escritura ---
+    def get(self, key):
+        """Devuelve (body, headers) o None."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, stored_at, tags, body, headers = entry
+                if expires <= now or self._stale(tags, stored_at):
+                    self._drop(key)
+                    self.evictions += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return body, headers
+
+        if self.shared_dir:
+            entry = self._read_shared(key, now)
+            if entry is not None:
+                with self._lock:
+                    self._store(key, entry)
+                    self.shared_hits += 1
+                return entry[3], entry[4]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, body, headers, tags, started_at):
+        """Guarda una respuesta. `started_at` (time.time_ns() antes de leer la DB)
+        evita guardar datos que una escritura concurrente ya invalidó."""
+        entry = (time.time() + self.ttl, started_at, tuple(tags), body, headers)
+        with self._lock:
+            if self._stale(entry[2], started_at):
+                return
+            self._store(key, entry)
+        if self.shared_dir:
+            self._write_shared(key, entry)
+
+    def invalidate(self, *tags):
+        stamp = time.time_ns()
+        with self._lock:
+            for tag in tags:
+                self._tag_stamps[tag] = stamp
+                for key in list(self._tag_keys.get(tag, ())):
+                    self._drop(key)
+                    self.invalidations += 1
+        if self.shared_dir:
+            for tag in tags:
+                path = self._tag_path(tag)
+                with open(path, "a"):
+                    pass
+                os.utime(path, ns=(stamp, stamp))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tag_keys.clear()
+            self._tag_stamps.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    # --- internos (llamar con el lock tomado) ---
+    def _store(self, key, entry):
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = entry
+        for tag in entry[2]:
+            self._tag_keys.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.maxsize:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self.evictions += 1
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tag_keys.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tag_keys[tag]
+
+    def _stale(self, tags, stored_at):
+        for tag in tags:
+            if self._tag_stamps.get(tag, 0) > stored_at:
+                return True
+            if self.shared_dir and self._shared_stamp(tag) > stored_at:
+                return True
+        return False
+
+    # --- nivel compartido en disco ---
+    def _tag_path(self, tag):
+        return os.path.join(self.shared_dir, "tags", hashlib.sha1(tag.encode()).hexdigest())
+
+    def _entry_path(self, key):
+        return os.path.join(self.shared_dir, hashlib.sha1(key.encode()).hexdigest() + ".json")
+
+    def _shared_stamp(self, tag):
+        try:
+            return os.stat(self._tag_path(tag)).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    def _read_shared(self, key, now):
+        path = self._entry_path(key)
+        try:
+            with open(path, encoding="utf-8") as fh:
+                data = json.load(fh)
+        except (FileNotFoundError, ValueError):
+            return None
+        if data["key"] != key:
+            return None
+        entry = (data["expires"], data["stored_at"], tuple(data["tags"]),
+                 base64.b64decode(data["body"]), [tuple(h) for h in data["headers"]])
+        with self._lock:
+            stale = entry[0] <= now or self._stale(entry[2], entry[1])
+        if stale:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            return None
+        return entry
+
+    def _write_shared(self, key, entry):
+        path = self._entry_path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}"
+        data = {
+            "key": key,
+            "expires": entry[0],
+            "stored_at": entry[1],
+            "tags": list(entry[2]),
+            # base64: las variantes comprimidas no son texto
+            "body": base64.b64encode(entry[3]).decode("ascii"),
+            "headers": entry[4],
+        }
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(data, fh)
+        os.replace(tmp, path)
+
+
+response_cache = ResponseCache()
+
+
+def cache_key():
+    args = sorted(request.args.items(multi=True))
+    return f"{request.path}?{urlencode(args)}"
+
+
+def variant_key(key, encoding):
+    """Clave de la variante comprimida de una entrada."""
+    return f"{key}#{encoding}" if encoding else key
+
+
+def cached(*tags):
+    """Cachea la respuesta 200 de un GET. Los tags pueden usar los argumentos
+    de la ruta, ej. @cached("post:{id}").
+
+    Si el cliente acepta compresión se guarda también la variante comprimida
+    (con los mismos tags), así los hits no vuelven a comprimir. Debajo de
+    @conditional, el ETag y el Last-Modified se guardan con la entrada."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not response_cache.enabled:
+                return fn(*args, **kwargs)
+
+            key = cache_key()
+            encoding = compression.negotiate(request.headers.get("Accept-Encoding"))
+            started_at = time.time_ns()
+            hit = response_cache.get(variant_key(key, encoding))
+            if hit is not None:
+                body, headers = hit
+                return Response(body, status=200, headers=headers)
+
+            entry_tags = [t.format(**kwargs) for t in tags]
+            hit = response_cache.get(key) if encoding else None
+            if hit is not None:
+                body, headers = hit
+            else:
+                # el probe de @conditional va antes de armar la respuesta: si algo
+                # cambia en el medio, el ETag queda viejo y no el cuerpo
+                probe = g.pop("conditional_probe", None)
+                validators = probe() if probe is not None else None
+                response = current_app.make_response(fn(*args, **kwargs))
+                if response.status_code != 200 or response.is_streamed:
+                    return response
+                set_validators(response, validators)
+                body = response.get_data()
+                headers = [(k, v) for k, v in response.headers.items() if k != "Content-Length"]
+                response_cache.set(key, body, headers, entry_tags, started_at)
+                if not encoding:
+                    return response
+
+            body, headers = compression.encode(body, headers, encoding)
+            response_cache.set(variant_key(key, encoding), body, headers, entry_tags, started_at)
+            return Response(body, status=200, headers=headers)
+        wrapper.response_cached = True
+        return wrapper
+    return decorator
+
+
+def validators_of(probed):
+    """(etag, last_modified) a partir de lo que devuelve un probe, o None."""
+    if probed is None:
+        return None
+    parts, last_modified = probed
+    etag = hashlib.sha1(repr((cache_key(), parts)).encode()).hexdigest()
+    if last_modified is not None:
+        last_modified = last_modified.replace(microsecond=0, tzinfo=timezone.utc)
+    return etag, last_modified
+
+
+def set_validators(response, validators):
+    if validators is None:
+        return
+    etag, last_modified = validators
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+
+
+def conditional(probe):
+    """GET condicional con ETag / Last-Modified.
+
+    `probe(**kwargs)` hace consultas baratas (contadores, MAX de columnas
+    indexadas) y devuelve (partes, last_modified), o None si no aplica (ej. el
+    recurso no existe). Si el cliente ya tiene esa versión se responde 304 sin
+    llamar a la vista ni serializar nada.
+
+    El probe sólo corre si el cliente mandó If-None-Match / If-Modified-Since.
+    Sin validadores, sobre una vista con @cached lo corre el cache en un miss y
+    guarda los validadores con la entrada, así un hit no consulta la base.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not (request.if_none_match or request.if_modified_since):
+                if response_cache.enabled and getattr(fn, "response_cached", False):
+                    g.conditional_probe = lambda: validators_of(probe(**kwargs))
+                    try:
+                        return fn(*args, **kwargs)
+                    finally:
+                        g.pop("conditional_probe", None)
+                validators = validators_of(probe(**kwargs))
+                response = current_app.make_response(fn(*args, **kwargs))
+                if response.status_code == 200:
+                    set_validators(response, validators)
+                return response
+
+            validators = validators_of(probe(**kwargs))
+            if validators is None:
+                return fn(*args, **kwargs)
+
+            etag, last_modified = validators
+            matched = etag
+            if request.if_none_match:
+                # el cliente puede tener cualquiera de las variantes (ver compression.py)
+                matched = next((t for t in etag_variants(etag) if request.if_none_match.contains(t)), None)
+                not_modified = matched is not None
+            else:
+                since = request.if_modified_since
+                not_modified = bool(last_modified and last_modified <= since)
+
+            if not not_modified:
+                if getattr(fn, "response_cached", False):
+                    # en un miss el cache guarda la entrada con estos validadores
+                    g.conditional_probe = lambda: validators
+                try:
+                    response = current_app.make_response(fn(*args, **kwargs))
+                finally:
+                    g.pop("conditional_probe", None)
+                if response.status_code == 200 and "ETag" not in response.headers:
+                    # con ETag ya viene del cache, y es el del cuerpo guardado
+                    set_validators(response, validators)
+                return response
+            response = Response(status=304)
+            response.set_etag(matched)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            return response
+        return wrapper
+    return decorator
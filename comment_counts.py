@@ -0,0 +1,202 @@
+"""comment_count y last_comment_at de Post (comentarios visibles).
+
+Igual que counters.py, se mantienen con eventos de la sesión en la misma
+transacción que el INSERT/DELETE/UPDATE del comentario: antes del flush se
+juntan los comentarios visibles que se agregan, se borran o cambian de
+visibilidad, y después del flush se aplica un UPDATE por post afectado:
+
+- comment_count = comment_count + delta, atómico y sin leer la fila;
+- last_comment_at: con altas, el máximo entre el actual y la fecha nueva; con
+  bajas u ocultamientos se recalcula con MAX(fecha_creacion), que sale del
+  índice (post_id, is_visible, fecha_creacion, id).
+
+Las cargas que insertan con Core (ComentarioBulkAPI) llaman a `bump()` y los
+borrados masivos (purge.py) a `quitar()`.
+`flask backfill-comment-counts` recalcula todo por tramos de ids con un commit
+por tramo, así nunca bloquea la tabla entera.
+"""
+from datetime import datetime
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import and_, case, event, func, inspect, or_, select, update
+from sqlalchemy.orm import Session
+
+from cache import response_cache
+from models import db, Post, Comentario
+
+_post = Post.__table__
+_comentario = Comentario.__table__
+
+
+def _visible(value):
+    # None: todavía no se aplicó el default de la columna (True)
+    return value is None or bool(value)
+
+
+class _Cambio:
+    __slots__ = ("delta", "ultima", "recalcular")
+
+    def __init__(self):
+        self.delta = 0
+        self.ultima = None
+        self.recalcular = False
+
+    def alta(self, fecha):
+        self.delta += 1
+        if fecha is not None and (self.ultima is None or fecha > self.ultima):
+            self.ultima = fecha
+
+    def baja(self):
+        self.delta -= 1
+        self.recalcular = True
+
+
+def _before_flush(session, flush_context, instances):
+    # los comentarios nuevos se leen después del flush, cuando ya tienen post_id y fecha
+    nuevos = [obj for obj in session.new if isinstance(obj, Comentario)]
+    bajas = []
+    for obj in session.deleted:
+        if isinstance(obj, Comentario) and _visible(obj.is_visible):
+            bajas.append(obj.post_id)
+    for obj in session.dirty:
+        if not isinstance(obj, Comentario):
+            continue
+        history = inspect(obj).attrs.is_visible.history
+        if not history.has_changes():
+            continue
+        # con active_history el valor anterior siempre está; si no, se asume visible
+        antes = _visible(history.deleted[0]) if history.deleted else True
+        ahora = _visible(obj.is_visible)
+        if antes and not ahora:
+            bajas.append(obj.post_id)
+        elif ahora and not antes:
+            nuevos.append(obj)
+    if nuevos or bajas:
+        pending = session.info.setdefault("comment_counts", ([], []))
+        pending[0].extend(nuevos)
+        pending[1].extend(bajas)
+
+
+def _after_flush(session, flush_context):
+    pending = session.info.pop("comment_counts", None)
+    if pending is None:
+        return
+    nuevos, bajas = pending
+    cambios = {}
+    for obj in nuevos:
+        if _visible(obj.is_visible):
+            cambios.setdefault(obj.post_id, _Cambio()).alta(obj.fecha_creacion)
+    for post_id in bajas:
+        cambios.setdefault(post_id, _Cambio()).baja()
+    apply(session.connection(), cambios)
+    session.info.setdefault("comment_counts_posts", set()).update(cambios)
+
+
+def _after_flush_postexec(session, flush_context):
+    # los Post ya cargados en la sesión tienen los valores viejos
+    for post_id in session.info.pop("comment_counts_posts", ()):
+        post = session.identity_map.get(inspect(Post).identity_key_from_primary_key((post_id,)))
+        if post is not None:
+            session.expire(post, ["comment_count", "last_comment_at"])
+
+
+def _after_rollback(session):
+    session.info.pop("comment_counts", None)
+    session.info.pop("comment_counts_posts", None)
+
+
+def _ultimo_visible():
+    return (
+        select(func.max(_comentario.c.fecha_creacion))
+        .where(_comentario.c.post_id == _post.c.id, _comentario.c.is_visible.is_(True))
+        .scalar_subquery()
+    )
+
+
+def apply(connection, cambios):
+    """Aplica {post_id: _Cambio} con un UPDATE por post."""
+    for post_id, cambio in cambios.items():
+        values = {}
+        if cambio.delta:
+            values["comment_count"] = _post.c.comment_count + cambio.delta
+        if cambio.recalcular:
+            values["last_comment_at"] = _ultimo_visible()
+        elif cambio.ultima is not None:
+            values["last_comment_at"] = case(
+                (or_(_post.c.last_comment_at.is_(None), _post.c.last_comment_at < cambio.ultima), cambio.ultima),
+                else_=_post.c.last_comment_at,
+            )
+        if values:
+            # updated_at es del contenido del post: que el onupdate no lo toque
+            connection.execute(
+                update(_post).where(_post.c.id == post_id).values(updated_at=_post.c.updated_at, **values)
+            )
+
+
+def bump(post_id, cantidad, ultima):
+    """Para altas masivas que no pasan por el ORM (y no disparan los eventos)."""
+    cambio = _Cambio()
+    cambio.delta = cantidad
+    cambio.ultima = ultima
+    apply(db.session.connection(), {post_id: cambio})
+
+
+def quitar(por_post):
+    """Para bajas u ocultamientos masivos con Core (ver purge.py): {post_id:
+    comentarios visibles quitados}. Se llama después del DELETE/UPDATE, así el
+    MAX(fecha_creacion) ya no los ve."""
+    cambios = {}
+    for post_id, cantidad in por_post.items():
+        cambio = cambios[post_id] = _Cambio()
+        cambio.delta = -cantidad
+        cambio.recalcular = True
+    apply(db.session.connection(), cambios)
+
+
+def backfill(chunk_size=1000, echo=None):
+    """Recalcula comment_count y last_comment_at de todos los posts, por tramos de
+    `chunk_size` ids con un commit por tramo. Devuelve la cantidad de posts."""
+    primero, ultimo = db.session.query(func.min(Post.id), func.max(Post.id)).one()
+    db.session.commit()
+    if primero is None:
+        return 0
+    visibles = and_(_comentario.c.post_id == _post.c.id, _comentario.c.is_visible.is_(True))
+    total = 0
+    for inicio in range(primero, ultimo + 1, chunk_size):
+        result = db.session.execute(
+            update(_post)
+            .where(_post.c.id.between(inicio, inicio + chunk_size - 1))
+            .values(
+                comment_count=select(func.count()).where(visibles).scalar_subquery(),
+                last_comment_at=_ultimo_visible(),
+                # una reparación no es una edición del post
+                updated_at=_post.c.updated_at,
+            )
+        )
+        db.session.commit()
+        total += result.rowcount
+        if echo:
+            echo(f"  posts {inicio}-{min(inicio + chunk_size - 1, ultimo)}")
+    response_cache.invalidate("posts", "posts:detail")
+    return total
+
+
+@click.command("backfill-comment-counts")
+@click.option("--chunk-size", default=1000, show_default=True, help="posts por transacción")
+@click.option("--verbose", is_flag=True)
+@with_appcontext
+def backfill_command(chunk_size, verbose):
+    """Recalcula comment_count y last_comment_at de los posts."""
+    started = datetime.utcnow()
+    total = backfill(chunk_size, click.echo if verbose else None)
+    click.echo(f"{total} posts recalculados en {(datetime.utcnow() - started).total_seconds():.1f}s")
+
+
+def init_app(app):
+    if not event.contains(Session, "before_flush", _before_flush):
+        event.listen(Session, "before_flush", _before_flush)
+        event.listen(Session, "after_flush", _after_flush)
+        event.listen(Session, "after_flush_postexec", _after_flush_postexec)
+        event.listen(Session, "after_rollback", _after_rollback)
+    app.cli.add_command(backfill_command)
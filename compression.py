@@ -0,0 +1,158 @@
+"""Compresión gzip / brotli de las respuestas según Accept-Encoding.
+
+- Sólo tipos de texto (JSON, NDJSON, texto de las métricas) y cuerpos de al
+  menos COMPRESS_MIN_SIZE bytes: comprimir un cuerpo chico cuesta más CPU de lo
+  que ahorra en la red.
+- brotli si el cliente lo acepta y el módulo `brotli` está instalado (dependencia
+  opcional); si no, gzip. COMPRESS_ENCODINGS = [] lo desactiva.
+- Las respuestas en streaming (export) se comprimen a medida que se generan,
+  sin juntar el cuerpo en memoria.
+- Los GET cacheados (ver cache.cached) guardan la variante comprimida como otra
+  entrada del cache con los mismos tags, así una página caliente se comprime
+  una sola vez y no en cada hit.
+- El ETag de una respuesta comprimida lleva el sufijo de la codificación
+  ("<hash>-gzip"); cache.conditional acepta cualquiera de las variantes.
+
+Los bytes antes y después y el CPU usado por codificación se publican en
+/api/metrics (miniblog_compression_*).
+"""
+import time
+import zlib
+
+from flask import request
+from werkzeug.http import parse_accept_header
+
+from metrics import metrics
+
+try:
+    import brotli
+except ImportError:  # dependencia opcional
+    brotli = None
+
+# orden de preferencia ante igual calidad en Accept-Encoding
+ENCODINGS = ("br", "gzip")
+COMPRESSIBLE = {"application/json", "application/x-ndjson", "text/plain"}
+
+
+def etag_variants(etag):
+    """El ETag sin comprimir y el de cada codificación."""
+    return [etag] + [f"{etag}-{encoding}" for encoding in ENCODINGS]
+
+
+def _mimetype(content_type):
+    return (content_type or "").split(";", 1)[0].strip().lower()
+
+
+class Compression:
+    def __init__(self):
+        self.encodings = ()
+        self.min_size = 500
+        self.gzip_level = 6
+        self.brotli_quality = 4
+
+    def init_app(self, app):
+        app.config.setdefault("COMPRESS_ENCODINGS", list(ENCODINGS))
+        app.config.setdefault("COMPRESS_MIN_SIZE", 500)
+        app.config.setdefault("COMPRESS_GZIP_LEVEL", 6)
+        # 4-5 comprime mejor que gzip -6 con un CPU parecido; 11 es para estáticos
+        app.config.setdefault("COMPRESS_BROTLI_QUALITY", 4)
+        self.encodings = tuple(
+            e for e in ENCODINGS
+            if e in app.config["COMPRESS_ENCODINGS"] and (e != "br" or brotli is not None)
+        )
+        self.min_size = app.config["COMPRESS_MIN_SIZE"]
+        self.gzip_level = app.config["COMPRESS_GZIP_LEVEL"]
+        self.brotli_quality = app.config["COMPRESS_BROTLI_QUALITY"]
+        app.after_request(self._after_request)
+        app.extensions["compression"] = self
+
+    # --- negociación ---
+    def negotiate(self, accept_encoding):
+        """Codificación a usar para este Accept-Encoding, o None."""
+        if not self.encodings or not accept_encoding:
+            return None
+        accept = parse_accept_header(accept_encoding)
+        best, best_q = None, 0
+        for encoding in self.encodings:
+            q = accept.quality(encoding)
+            if q > best_q:
+                best, best_q = encoding, q
+        return best
+
+    def compressible(self, content_type, size):
+        return _mimetype(content_type) in COMPRESSIBLE and (size is None or size >= self.min_size)
+
+    # --- compresión ---
+    def _compressor(self, encoding):
+        if encoding == "br":
+            c = brotli.Compressor(quality=self.brotli_quality)
+            return c.process, c.finish
+        c = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 31)  # 31: formato gzip
+        return c.compress, c.flush
+
+    def compress(self, body, encoding):
+        started = time.thread_time()
+        process, finish = self._compressor(encoding)
+        data = process(body) + finish()
+        metrics.observe_compression(encoding, len(body), len(data), time.thread_time() - started)
+        return data
+
+    def stream(self, chunks, encoding):
+        process, finish = self._compressor(encoding)
+        size_in = size_out = 0
+        cpu = 0.0
+        for chunk in chunks:
+            started = time.thread_time()
+            data = process(chunk)
+            cpu += time.thread_time() - started
+            size_in += len(chunk)
+            if data:
+                size_out += len(data)
+                yield data
+        started = time.thread_time()
+        data = finish()
+        cpu += time.thread_time() - started
+        size_out += len(data)
+        metrics.observe_compression(encoding, size_in, size_out, cpu)
+        yield data
+
+    def encode(self, body, headers, encoding):
+        """(body, headers) a enviar con `encoding` para un cuerpo ya armado.
+        `headers` es una lista de (nombre, valor) como la que guarda el cache."""
+        content_type = next((v for k, v in headers if k.lower() == "content-type"), None)
+        if encoding is None or not self.compressible(content_type, len(body)):
+            return body, headers
+        headers = [(k, v) for k, v in headers if k.lower() not in ("content-encoding", "content-length")]
+        headers.append(("Content-Encoding", encoding))
+        return self.compress(body, encoding), headers
+
+    # --- respuestas de Flask ---
+    def _after_request(self, response):
+        if response.status_code != 200 or request.method == "HEAD" or not self.compressible(response.content_type, None):
+            return response
+        response.vary.add("Accept-Encoding")
+
+        encoding = response.headers.get("Content-Encoding")
+        if encoding is None:
+            encoding = self.negotiate(request.headers.get("Accept-Encoding"))
+            if encoding is None:
+                return response
+            if response.is_streamed:
+                response.response = self.stream(response.iter_encoded(), encoding)
+                response.headers.pop("Content-Length", None)
+            else:
+                body = response.get_data()
+                if len(body) < self.min_size:
+                    return response
+                response.set_data(self.compress(body, encoding))
+            response.headers["Content-Encoding"] = encoding
+        elif encoding not in ENCODINGS:
+            return response
+
+        etag, weak = response.get_etag()
+        if etag and not etag.endswith(f"-{encoding}"):
+            response.set_etag(f"{etag}-{encoding}", weak)
+        return response
+
+
+compression = Compression()
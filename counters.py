@@ -0,0 +1,154 @@
+"""Contadores de posts, comentarios y usuarios para StatsAPI.
+
+En lugar de hacer COUNT(*) en cada request, los totales viven en
+`stats_counter` (una fila por contador) y en `stats_counter_diario` (una fila
+por contador y día). Se actualizan con eventos de la sesión de SQLAlchemy en la
+misma transacción que el INSERT/DELETE, así que nunca quedan a mitad de camino.
+
+`flask reconcile-stats` los recalcula desde cero si alguna vez se desfasan
+(ej. por cambios hechos a mano en la base).
+"""
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import event, func, insert, update
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.orm import Session
+
+from models import db, Usuario, Post, Comentario, StatsCounter, StatsCounterDiario
+
+# modelo -> (nombre del contador, columna de fecha para el bucket diario)
+COUNTED = {
+    Post: ("posts", "fecha_creacion"),
+    Comentario: ("comments", "fecha_creacion"),
+    Usuario: ("users", "created_at"),
+}
+
+
+def _dia(obj, fecha_attr):
+    fecha = getattr(obj, fecha_attr)
+    return (fecha or datetime.utcnow()).date()
+
+
+def _before_flush(session, flush_context, instances):
+    # Se junta todo antes del flush: después los objetos borrados ya no se pueden leer
+    totales = Counter()
+    diarios = Counter()
+    for objs, signo in ((session.new, 1), (session.deleted, -1)):
+        for obj in objs:
+            counted = COUNTED.get(type(obj))
+            if counted is None:
+                continue
+            nombre, fecha_attr = counted
+            totales[nombre] += signo
+            diarios[(nombre, _dia(obj, fecha_attr))] += signo
+    if totales:
+        pending = session.info.setdefault("stats_counter_deltas", (Counter(), Counter()))
+        pending[0].update(totales)
+        pending[1].update(diarios)
+
+
+def _after_flush(session, flush_context):
+    pending = session.info.pop("stats_counter_deltas", None)
+    if pending is None:
+        return
+    totales, diarios = pending
+    connection = session.connection()
+    for nombre, delta in totales.items():
+        if delta:
+            increment(connection, StatsCounter, {"nombre": nombre}, delta)
+    for (nombre, dia), delta in diarios.items():
+        if delta:
+            increment(connection, StatsCounterDiario, {"nombre": nombre, "dia": dia}, delta)
+
+
+def _after_rollback(session):
+    session.info.pop("stats_counter_deltas", None)
+
+
+def increment(connection, model, keys, delta):
+    """valor += delta en la fila `keys`, creándola si no existe (upsert atómico)."""
+    table = model.__table__
+    dialect = connection.dialect.name
+    values = dict(keys, valor=delta)
+    if dialect == "mysql":
+        stmt = mysql.insert(table).values(**values)
+        stmt = stmt.on_duplicate_key_update(valor=table.c.valor + stmt.inserted.valor)
+        connection.execute(stmt)
+    elif dialect == "sqlite":
+        stmt = sqlite.insert(table).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys), set_={"valor": table.c.valor + stmt.excluded.valor}
+        )
+        connection.execute(stmt)
+    else:
+        where = [table.c[k] == v for k, v in keys.items()]
+        result = connection.execute(update(table).where(*where).values(valor=table.c.valor + delta))
+        if result.rowcount == 0:
+            connection.execute(insert(table).values(**values))
+
+
+def bump(nombre, dias):
+    """Para altas/bajas masivas que no pasan por el ORM (y no disparan los eventos).
+
+    `dias` es {fecha: delta}; el total se actualiza con la suma.
+    """
+    connection = db.session.connection()
+    increment(connection, StatsCounter, {"nombre": nombre}, sum(dias.values()))
+    for dia, delta in dias.items():
+        if delta:
+            increment(connection, StatsCounterDiario, {"nombre": nombre, "dia": dia}, delta)
+
+
+def read_stats(desde):
+    """Devuelve ({nombre: total}, posts creados desde el instante `desde`).
+
+    Los días completos salen de los buckets diarios; sólo el pedazo del primer
+    día (desde `desde` hasta la medianoche) se cuenta en `post`, un rango del
+    índice de fecha_creacion de a lo sumo un día.
+    """
+    totales = dict(db.session.query(StatsCounter.nombre, StatsCounter.valor).all())
+    siguiente_dia = desde.date() + timedelta(days=1)
+    dias_completos = db.session.query(func.coalesce(func.sum(StatsCounterDiario.valor), 0)).filter(
+        StatsCounterDiario.nombre == "posts", StatsCounterDiario.dia >= siguiente_dia
+    ).scalar()
+    primer_dia = db.session.query(func.count(Post.id)).filter(
+        Post.fecha_creacion >= desde, Post.fecha_creacion < datetime.combine(siguiente_dia, datetime.min.time())
+    ).scalar()
+    return totales, int(dias_completos) + primer_dia
+
+
+def reconcile():
+    """Recalcula todos los contadores desde las tablas reales."""
+    db.session.query(StatsCounterDiario).delete()
+    db.session.query(StatsCounter).delete()
+    for model, (nombre, fecha_attr) in COUNTED.items():
+        fecha = getattr(model, fecha_attr)
+        total = db.session.query(func.count(model.id)).scalar()
+        db.session.add(StatsCounter(nombre=nombre, valor=total))
+        for dia, valor in db.session.query(func.date(fecha), func.count(model.id)).group_by(func.date(fecha)):
+            if dia is None:
+                continue
+            if isinstance(dia, str):
+                dia = date.fromisoformat(dia)
+            db.session.add(StatsCounterDiario(nombre=nombre, dia=dia, valor=valor))
+    db.session.commit()
+
+
+@click.command("reconcile-stats")
+@with_appcontext
+def reconcile_command():
+    """Recalcula los contadores de StatsAPI desde cero."""
+    reconcile()
+    totales, posts_semana = read_stats(datetime.utcnow() - timedelta(days=7))
+    click.echo(f"Contadores recalculados: {totales} (posts últimos 7 días: {posts_semana})")
+
+
+def init_app(app):
+    if not event.contains(Session, "before_flush", _before_flush):
+        event.listen(Session, "before_flush", _before_flush)
+        event.listen(Session, "after_flush", _after_flush)
+        event.listen(Session, "after_rollback", _after_rollback)
+    app.cli.add_command(reconcile_command)
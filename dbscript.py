@@ -1,71 +1,263 @@
-from app import app, db
-from models import Usuario, Post, Comentario, Categoria, Credenciales
-from passlib.hash import bcrypt
-from datetime import datetime
-
-with app.app_context():
-    db.drop_all()
-    db.create_all()
-
-    # Usuarios y sus credenciales
-    admin = Usuario(username="admin", email="admin@mail.com",
-                   role="admin", is_active=True, created_at=datetime.utcnow())
-    db.session.add(admin)
-    db.session.flush()  # Para obtener el ID
-    admin_cred = Credenciales(usuario_id=admin.id, 
-                            password_hash=bcrypt.hash("admin123"))
-    db.session.add(admin_cred)
-
-    mod = Usuario(username="mod", email="mod@mail.com",
-                 role="moderator", is_active=True, created_at=datetime.utcnow())
-    db.session.add(mod)
-    db.session.flush()
-    mod_cred = Credenciales(usuario_id=mod.id,
-                           password_hash=bcrypt.hash("mod123"))
-    db.session.add(mod_cred)
-
-    user = Usuario(username="valen", email="valen@mail.com",
-                  role="user", is_active=True, created_at=datetime.utcnow())
-    db.session.add(user)
-    db.session.flush()
-    user_cred = Credenciales(usuario_id=user.id,
-                            password_hash=bcrypt.hash("valen123"))
-    db.session.add(user_cred)
+"""Carga de datos de prueba.
 
-    db.session.commit()
+Sin argumentos crea las cuentas de demo (admin, mod, valen) y un puñado de
+posts y comentarios, como antes. Para pruebas de carga se puede pedir cualquier
+volumen:
+
+    python dbscript.py --users 10000 --posts 1000000 --seed 42 --workers 4
+
+- Los posts tienen entre 1 y --max-categorias categorías, elegidas con
+  popularidad tipo Zipf (pocas categorías concentran la mayoría de los posts).
+- Los comentarios por post siguen una ley de potencia (Pareto): la mayoría de
+  los posts tiene pocos y unos pocos tienen cientos.
+- Todo se inserta con INSERT masivos por lotes (--chunk-size) con ids
+  explícitos, así que se puede correr varias veces y cada corrida agrega filas.
+- Los usuarios sintéticos comparten un único hash de --password (bcrypt se
+  calcula una sola vez).
+- Con la misma --seed se generan los mismos datos sin importar --workers: cada
+  lote tiene su propia semilla derivada (las fechas son relativas al día de la
+  corrida).
+- --workers N genera los lotes en N procesos; los INSERT los hace el proceso
+  principal (SQLite admite un solo escritor a la vez).
+
+No borra nada salvo que se pase --drop. El esquema tiene que existir (`flask db
+upgrade`); para bases descartables alcanza con --create-schema.
+"""
+import argparse
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+DEMO_USERS = (
+    # username, role, password
+    ("admin", "admin", "admin123"),
+    ("mod", "moderator", "mod123"),
+    ("valen", "user", "valen123"),
+)
+DEMO_CATEGORIAS = ("Tecnología", "Deportes", "Cocina")
+TEMAS = ("python", "flask", "mysql", "cocina", "futbol", "viajes", "musica", "cine", "ciencia", "libros")
+PALABRAS = (
+    "el", "la", "de", "que", "y", "en", "un", "para", "con", "por", "una", "sobre", "como", "mas",
+    "datos", "proyecto", "receta", "partido", "equipo", "codigo", "servidor", "consulta", "tiempo",
+    "semana", "idea", "ejemplo", "prueba", "version", "cambio", "resultado", "problema", "solucion",
+)
+MAX_COMENTARIOS_POR_POST = 500
+
+
+# --- generación (corre en los procesos del pool, no toca la base) ---
+def _texto(rng, min_palabras, max_palabras):
+    return " ".join(rng.choices(PALABRAS, k=rng.randint(min_palabras, max_palabras))).capitalize() + "."
 
-    # Categorías
-    cat1 = Categoria(nombre="Tecnología")
-    cat2 = Categoria(nombre="Deportes")
-    cat3 = Categoria(nombre="Cocina")
 
-    db.session.add_all([cat1, cat2, cat3])
+def generar_lote(seed, primer_post_id, n_posts, usuario_ids, categoria_ids, opciones):
+    """Devuelve (posts, post_categoria, comentarios) para los posts primer_post_id..+n_posts.
+
+    Los comentarios salen sin id: los asigna el proceso principal al insertar.
+    """
+    rng = random.Random(seed)
+    inicio = opciones["inicio"]
+    paso = opciones["paso"]
+    alpha = opciones["alpha"]
+    # popularidad tipo Zipf: la categoría i-ésima pesa 1/i
+    pesos = [1 / (i + 1) for i in range(len(categoria_ids))]
+    posts, links, comentarios = [], [], []
+    for post_id in range(primer_post_id, primer_post_id + n_posts):
+        fecha = inicio + timedelta(seconds=(post_id - opciones["primer_post"]) * paso)
+        posts.append({
+            "id": post_id,
+            "titulo": f"{_texto(rng, 3, 8)[:-1]} #{rng.choice(TEMAS)}"[:200],
+            "contenido": _texto(rng, 20, 200),
+            "fecha_creacion": fecha,
+            "is_published": rng.random() > 0.05,
+            "usuario_id": rng.choice(usuario_ids),
+            "comment_count": 0,
+            "last_comment_at": None,
+        })
+        if categoria_ids:
+            elegidas = set(rng.choices(categoria_ids, weights=pesos, k=rng.randint(1, opciones["max_categorias"])))
+            links.extend({"post_id": post_id, "categoria_id": c} for c in elegidas)
+        n_comentarios = min(int(rng.paretovariate(alpha)) - 1, MAX_COMENTARIOS_POR_POST)
+        for _ in range(n_comentarios):
+            creado = fecha + timedelta(seconds=rng.randint(1, 30 * 86400))
+            comentario = {
+                "texto": _texto(rng, 3, 40),
+                "fecha_creacion": creado,
+                # sin editar: si no, el default (ahora) los marca a todos como recién cambiados
+                "updated_at": creado,
+                "is_visible": rng.random() > 0.03,
+                "usuario_id": rng.choice(usuario_ids),
+                "post_id": post_id,
+            }
+            comentarios.append(comentario)
+            # los inserts con Core no pasan por comment_counts.py
+            if comentario["is_visible"]:
+                post = posts[-1]
+                post["comment_count"] += 1
+                if post["last_comment_at"] is None or comentario["fecha_creacion"] > post["last_comment_at"]:
+                    post["last_comment_at"] = comentario["fecha_creacion"]
+    return posts, links, comentarios
+
+
+# --- carga ---
+def _next_id(table):
+    from models import db
+    return (db.session.query(db.func.max(table.c.id)).scalar() or 0) + 1
+
+
+def crear_demo():
+    """Crea las cuentas y categorías de demo que falten."""
+    from passlib.hash import bcrypt
+    from models import db, Usuario, Credenciales, Categoria
+
+    existentes = {u for (u,) in db.session.query(Usuario.username)}
+    for username, role, password in DEMO_USERS:
+        if username in existentes:
+            continue
+        user = Usuario(username=username, email=f"{username}@mail.com", role=role, is_active=True)
+        user.credential = Credenciales(password_hash=bcrypt.hash(password))
+        db.session.add(user)
+    existentes = {n for (n,) in db.session.query(Categoria.nombre)}
+    db.session.add_all(Categoria(nombre=n) for n in DEMO_CATEGORIAS if n not in existentes)
     db.session.commit()
 
-    # Posts
-    post1 = Post(titulo="Post del Admin", contenido="Contenido admin",
-                 usuario_id=admin.id)
-    post2 = Post(titulo="Post del Mod", contenido="Contenido moderador",
-                 usuario_id=mod.id)
-    post3 = Post(titulo="Post del Usuario", contenido="Contenido usuario",
-                 usuario_id=user.id)
 
-    # Asignar categorías a los posts
-    post1.categorias.append(cat1)
-    post2.categorias.append(cat2)
-    post3.categorias.append(cat3)
+def crear_usuarios(n, password):
+    """Agrega n usuarios sintéticos (userN / userN@mail.com) con el mismo hash."""
+    from passlib.hash import bcrypt
+    from models import db, Usuario, Credenciales
 
-    db.session.add_all([post1, post2, post3])
+    if n <= 0:
+        return
+    password_hash = bcrypt.hash(password)
+    primero = _next_id(Usuario.__table__)
+    ahora = datetime.utcnow()
+    ids = range(primero, primero + n)
+    db.session.execute(Usuario.__table__.insert(), [
+        {"id": i, "username": f"user{i}", "email": f"user{i}@mail.com",
+         "role": "user", "is_active": True, "created_at": ahora}
+        for i in ids
+    ])
+    db.session.execute(Credenciales.__table__.insert(), [
+        {"usuario_id": i, "password_hash": password_hash} for i in ids
+    ])
     db.session.commit()
 
-    # Comentarios
-    com1 = Comentario(texto="Buen post!", usuario_id=user.id, post_id=post1.id)
-    com2 = Comentario(texto="Gracias por compartir", usuario_id=mod.id, post_id=post1.id)
-    com3 = Comentario(texto="Interesante artículo", usuario_id=admin.id, post_id=post2.id)
-    com4 = Comentario(texto="Muy útil!", usuario_id=user.id, post_id=post3.id)
-    com5 = Comentario(texto="Excelente", usuario_id=mod.id, post_id=post3.id)
 
-    db.session.add_all([com1, com2, com3, com4, com5])
+def crear_categorias(n):
+    """Completa hasta n categorías en total."""
+    from models import db, Categoria
+
+    faltan = n - db.session.query(db.func.count(Categoria.id)).scalar()
+    if faltan <= 0:
+        return
+    primero = _next_id(Categoria.__table__)
+    ahora = datetime.utcnow()
+    db.session.execute(Categoria.__table__.insert(), [
+        {"id": i, "nombre": f"categoria-{i}", "updated_at": ahora} for i in range(primero, primero + faltan)
+    ])
     db.session.commit()
 
-    print("Base de datos cargada con datos de prueba.")
+
+def crear_posts(n_posts, seed=0, chunk_size=10000, workers=0, max_categorias=3, alpha=1.2, dias=365):
+    """Agrega n_posts posts con sus categorías y comentarios. Devuelve las filas insertadas."""
+    from models import db, Usuario, Categoria, Post, Comentario, post_categoria
+
+    if n_posts <= 0:
+        return 0
+    usuario_ids = [i for (i,) in db.session.query(Usuario.id).order_by(Usuario.id)]
+    categoria_ids = [i for (i,) in db.session.query(Categoria.id).order_by(Categoria.id)]
+    primer_post = _next_id(Post.__table__)
+    comentario_id = _next_id(Comentario.__table__)
+    opciones = {
+        "primer_post": primer_post,
+        "inicio": datetime.utcnow() - timedelta(days=dias),
+        "paso": dias * 86400 / max(n_posts, 1),
+        "alpha": alpha,
+        "max_categorias": max_categorias,
+    }
+    # la semilla de cada lote depende de --seed y del primer id, no del worker que lo genere
+    lotes = [
+        (seed * 1_000_003 + inicio, inicio, min(chunk_size, primer_post + n_posts - inicio),
+         usuario_ids, categoria_ids, opciones)
+        for inicio in range(primer_post, primer_post + n_posts, chunk_size)
+    ]
+
+    def insertar(lote):
+        nonlocal comentario_id
+        posts, links, comentarios = lote
+        for comentario in comentarios:
+            comentario["id"] = comentario_id
+            comentario_id += 1
+        db.session.execute(Post.__table__.insert(), posts)
+        if links:
+            db.session.execute(post_categoria.insert(), links)
+        if comentarios:
+            db.session.execute(Comentario.__table__.insert(), comentarios)
+        db.session.commit()
+        return len(posts) + len(links) + len(comentarios)
+
+    filas = 0
+    if workers > 0:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for lote in pool.map(generar_lote, *zip(*lotes)):
+                filas += insertar(lote)
+    else:
+        for args in lotes:
+            filas += insertar(generar_lote(*args))
+    return filas
+
+
+def seed(users=0, posts=0, categorias=0, password="demo123", **kwargs):
+    """Cuentas de demo + volumen sintético; recalcula contadores e índice de búsqueda."""
+    import counters
+    import search
+
+    crear_demo()
+    crear_usuarios(users, password)
+    crear_categorias(categorias)
+    filas = crear_posts(posts, **kwargs)
+    counters.reconcile()
+    search.reindex()
+    return filas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Carga datos de prueba en la base de la app.")
+    parser.add_argument("--users", type=int, default=0, help="usuarios sintéticos a agregar")
+    parser.add_argument("--posts", type=int, default=3, help="posts a agregar")
+    parser.add_argument("--categorias", type=int, default=3, help="cantidad total de categorías")
+    parser.add_argument("--max-categorias", type=int, default=3, help="máximo de categorías por post")
+    parser.add_argument("--alpha", type=float, default=1.2,
+                        help="exponente de la ley de potencia de comentarios (más bajo = colas más largas)")
+    parser.add_argument("--dias", type=int, default=365, help="los posts se reparten en los últimos N días")
+    parser.add_argument("--password", default="demo123", help="contraseña de los usuarios sintéticos")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=0, help="procesos para generar los lotes")
+    parser.add_argument("--drop", action="store_true", help="borra todas las tablas antes de cargar")
+    parser.add_argument("--create-schema", action="store_true",
+                        help="crea las tablas que falten con create_all (bases de prueba; si no, flask db upgrade)")
+    args = parser.parse_args(argv)
+
+    from app import create_app
+    from models import db
+
+    app = create_app()
+    with app.app_context():
+        if args.drop:
+            db.drop_all()
+        if args.drop or args.create_schema:
+            db.create_all()
+        started = time.perf_counter()
+        filas = seed(
+            users=args.users, posts=args.posts, categorias=args.categorias, password=args.password,
+            seed=args.seed, chunk_size=args.chunk_size, workers=args.workers,
+            max_categorias=args.max_categorias, alpha=args.alpha, dias=args.dias,
+        )
+        elapsed = time.perf_counter() - started
+        print(f"Base de datos cargada: {filas} filas en {elapsed:.1f}s ({filas / elapsed * 60:,.0f} filas/min).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Chequeo de planes de consulta: ninguna vista debe recorrer tablas enteras.
+
+Carga datos sintéticos (dbscript.py) en una base aparte, ejecuta cada ruta de
+app.py con los mismos escenarios que bench.py (y sus variantes por query string,
+bench.VARIANTS: categoria=, with_counts, sort=, include=, fields=, ids=),
+captura las consultas SQL que emite y corre EXPLAIN sobre cada una. Falla
+(código 1) si alguna hace un full table scan sobre una tabla con más de
+--threshold filas:
+
+    python explain_check.py --posts 20000 --threshold 1000
+
+- SQLite: `EXPLAIN QUERY PLAN`, un paso `SCAN <tabla>` sin índice.
+- MySQL: `EXPLAIN`, filas con type = ALL.
+
+Las rutas que por diseño leen una tabla completa se excluyen con --allow
+(ej. --allow "GET /api/users").
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+
+_SQLITE_SCAN = re.compile(r"^SCAN (\w+)(?: AS \w+)?$")
+_ALIAS = re.compile(r"^(\w+?)_\d+$")
+
+
+def _tabla(nombre, tablas):
+    # los alias de SQLAlchemy son <tabla>_<n> (ej. usuario_1 en los joined loads)
+    if nombre in tablas:
+        return nombre
+    match = _ALIAS.match(nombre)
+    if match and match.group(1) in tablas:
+        return match.group(1)
+    return None
+
+
+def full_scans(connection, statement, parameters, tablas):
+    """Devuelve [(tabla, filas estimadas)] de los full scans del plan de `statement`."""
+    from querylog import explain
+
+    dialect = connection.dialect.name
+    scans = []
+    if dialect == "sqlite":
+        for row in explain(connection, statement, parameters):
+            match = _SQLITE_SCAN.match(row[-1])
+            tabla = match and _tabla(match.group(1), tablas)
+            if tabla:
+                scans.append((tabla, tablas[tabla]))
+    elif dialect == "mysql":
+        # columnas de EXPLAIN en MySQL: id, select_type, table, partitions, type, ..., rows, ...
+        for row in explain(connection, statement, parameters):
+            tabla = row[2] and _tabla(row[2], tablas)
+            if row[4] == "ALL" and tabla:
+                scans.append((tabla, max(row[9] or 0, tablas[tabla])))
+    return scans
+
+
+def capture(app, client, ctx, scenario):
+    """Ejecuta el escenario y devuelve las consultas (sin INSERT) que emitió la vista."""
+    from sqlalchemy import event
+    from models import db
+
+    req = scenario(ctx)
+    queries = []
+
+    def listener(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE", "WITH")):
+            queries.append((statement, parameters))
+
+    headers = {}
+    if req["role"]:
+        headers["Authorization"] = f"Bearer {ctx.tokens[req['role']]}"
+    kwargs = {k: req[k] for k in ("json", "data", "content_type") if k in req}
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        response = client.open(req["url"], method=req["method"], headers=headers, **kwargs)
+        response.get_data()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+    return response.status_code, queries
+
+
+def check(client, ctx, route, scenario, tablas, threshold, verbose):
+    """Corre el escenario y devuelve las violaciones (full scans) de sus consultas."""
+    from models import db
+
+    violations = []
+    status, queries = capture(client.application, client, ctx, scenario)
+    with db.engine.connect() as connection:
+        vistas = set()
+        for statement, parameters in queries:
+            if statement in vistas:
+                continue
+            vistas.add(statement)
+            scans = [(t, n) for t, n in full_scans(connection, statement, parameters, tablas) if n > threshold]
+            if scans:
+                detalle = ", ".join(f"{t} ({n} filas)" for t, n in scans)
+                violations.append(f"{route}: full scan de {detalle}\n    {' '.join(statement.split())}")
+            elif verbose:
+                print(f"  {route}: ok {' '.join(statement.split())[:120]}")
+    print(f"  {route} [{status}] {len(vistas)} consultas")
+    return violations
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, default=20000, help="posts a cargar antes de chequear")
+    parser.add_argument("--threshold", type=int, default=1000,
+                        help="filas a partir de las cuales un full scan es un error")
+    parser.add_argument("--database-url", help="base a usar (default: SQLite en un directorio temporal)")
+    parser.add_argument("--allow", action="append", default=[], help="ruta excluida (ej. 'GET /api/users')")
+    parser.add_argument("--verbose", action="store_true", help="mostrar también las consultas sin problemas")
+    args = parser.parse_args(argv)
+
+    if not args.database_url:
+        args.database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='miniblog-explain-'), 'explain.db')}"
+
+    from app import create_app
+    from models import db
+    import search
+    from bench import Context, SCENARIOS, VARIANTS, routes, seed
+
+    # sin cache: cada request tiene que llegar a la base
+    app = create_app({"SQLALCHEMY_DATABASE_URI": args.database_url, "RESPONSE_CACHE_SIZE": 0})
+    violations = []
+    with app.app_context():
+        db.create_all()
+        search.ensure_index()
+        seed(args.posts)
+        tablas = {
+            nombre: db.session.execute(db.text(f"SELECT COUNT(*) FROM {nombre}")).scalar()
+            for nombre in db.metadata.tables
+        }
+        ctx = Context(app)
+        client = app.test_client()
+        escenarios = [
+            (f"{method} {rule}", SCENARIOS.get((endpoint, method))) for endpoint, method, rule in routes(app)
+        ]
+        escenarios += list(VARIANTS.items())
+        for route, scenario in escenarios:
+            if scenario is None or route in args.allow:
+                print(f"  {route}: omitida")
+                continue
+            violations += check(client, ctx, route, scenario, tablas, args.threshold, args.verbose)
+
+    for violation in violations:
+        print(f"FULL SCAN {violation}")
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,28 @@
+# gunicorn -c gunicorn.conf.py "app:create_app()"
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("GUNICORN_WORKERS", 2))
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+# con preload la app se importa una vez en el master y los workers la heredan con el fork
+preload_app = os.environ.get("GUNICORN_PRELOAD", "0") == "1"
+
+
+def on_starting(server):
+    # los volcados de métricas de una corrida anterior no deben sumarse a esta
+    import metrics
+    metrics.clear_dir(os.environ.get("METRICS_DIR"))
+
+
+def post_fork(server, worker):
+    # las conexiones abiertas en el master no se pueden compartir entre procesos
+    if preload_app:
+        from models import db
+        app = worker.app.wsgi()
+        with app.app_context():
+            db.engine.dispose(close=False)
+
+
+def post_worker_init(worker):
+    from app import warm_up
+    warm_up(worker.wsgi)
@@ -0,0 +1,191 @@
+"""Hash y verificación de contraseñas (bcrypt) en un pool de procesos acotado.
+
+Cada bcrypt tarda ~250 ms de CPU. Hacerlo en el thread del request hace que una
+ráfaga de logins deje sin workers al resto de los endpoints, así que se delega a
+un pool de procesos con cupo fijo (workers + cola). Si el cupo está lleno se
+falla enseguida con PoolSaturado y la vista responde 503 con Retry-After.
+
+Si un proceso del pool muere (ej. el OOM killer) el executor queda roto para
+siempre (BrokenProcessPool): se descarta y el pedido se reintenta una vez en
+un pool nuevo; si vuelve a fallar, PoolSaturado.
+
+Configuración:
+- PASSWORD_HASH_WORKERS: procesos del pool (0 = hashear en el mismo thread).
+- PASSWORD_HASH_QUEUE: pedidos que pueden esperar además de los que se procesan.
+- PASSWORD_HASH_TIMEOUT: segundos máximos esperando un resultado.
+- BCRYPT_ROUNDS: costo de los hashes nuevos; los hashes con otro costo se
+  regeneran en el próximo login correcto.
+"""
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from passlib.hash import bcrypt
+
+
+class PoolSaturado(Exception):
+    pass
+
+
+# --- funciones que corren en los procesos del pool ---
+def _timed(fn, *args):
+    started = time.time()
+    result = fn(*args)
+    return result, started, time.time() - started
+
+
+def _hash(password, rounds):
+    return bcrypt.using(rounds=rounds).hash(password)
+
+
+def _verify(password, password_hash):
+    return bcrypt.verify(password, password_hash)
+
+
+class PasswordHasher:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self.configure(workers=0, queue=0, timeout=10, rounds=12)
+
+    def configure(self, workers, queue, timeout, rounds):
+        self.shutdown()
+        self.workers = workers
+        self.queue = queue
+        self.timeout = timeout
+        self.rounds = rounds
+        self._slots = threading.BoundedSemaphore(max(workers, 1) + queue)
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.hash_seconds = 0.0
+        self.queue_wait_seconds = 0.0
+        self.max_queue_wait = 0.0
+
+    def init_app(self, app):
+        workers_default = min(4, os.cpu_count() or 1)
+        app.config.setdefault("PASSWORD_HASH_WORKERS", workers_default)
+        app.config.setdefault("PASSWORD_HASH_QUEUE", 2 * workers_default)
+        app.config.setdefault("PASSWORD_HASH_TIMEOUT", 10)
+        app.config.setdefault("BCRYPT_ROUNDS", 12)
+        self.configure(
+            app.config["PASSWORD_HASH_WORKERS"],
+            app.config["PASSWORD_HASH_QUEUE"],
+            app.config["PASSWORD_HASH_TIMEOUT"],
+            app.config["BCRYPT_ROUNDS"],
+        )
+        app.extensions["password_hasher"] = self
+
+    def shutdown(self):
+        if self._executor is not None and self._pid == os.getpid():
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+
+    # --- API ---
+    def hash(self, password):
+        return self._run(_hash, password, self.rounds)
+
+    def verify(self, password, password_hash):
+        return self._run(_verify, password, password_hash)
+
+    def needs_rehash(self, password_hash):
+        return bcrypt.using(rounds=self.rounds).needs_update(password_hash)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "in_flight": self.in_flight,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "hash_seconds_total": round(self.hash_seconds, 6),
+                "queue_wait_seconds_total": round(self.queue_wait_seconds, 6),
+                "queue_wait_seconds_max": round(self.max_queue_wait, 6),
+            }
+
+    # --- internos ---
+    def _pool(self):
+        # el pool no sobrevive a un fork (ej. workers de gunicorn): uno por proceso
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+                self._pid = os.getpid()
+            return self._executor
+
+    def _discard(self, executor):
+        """Saca del medio un executor roto (si otro thread no lo reemplazó ya)."""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _acquire(self):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PoolSaturado()
+        with self._lock:
+            self.in_flight += 1
+
+    def _release(self, future=None):
+        self._slots.release()
+        with self._lock:
+            self.in_flight -= 1
+
+    def _in_pool(self, fn, *args):
+        self._acquire()
+        executor = self._pool()
+        try:
+            future = executor.submit(_timed, fn, *args)
+        except BrokenProcessPool:
+            self._release()
+            self._discard(executor)
+            raise
+        except Exception:
+            self._release()
+            raise
+        # el cupo se libera cuando el proceso termina, aunque acá se haya dejado de esperar
+        future.add_done_callback(self._release)
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            future.cancel()
+            raise PoolSaturado()
+        except BrokenProcessPool:
+            self._discard(executor)
+            raise
+
+    def _run(self, fn, *args):
+        submitted = time.time()
+        if self.workers <= 0:
+            self._acquire()
+            try:
+                result, started, elapsed = _timed(fn, *args)
+            finally:
+                self._release()
+        else:
+            try:
+                result, started, elapsed = self._in_pool(fn, *args)
+            except BrokenProcessPool:
+                try:
+                    result, started, elapsed = self._in_pool(fn, *args)
+                except BrokenProcessPool:
+                    raise PoolSaturado()
+
+        waited = max(0.0, started - submitted)
+        with self._lock:
+            self.completed += 1
+            self.hash_seconds += elapsed
+            self.queue_wait_seconds += waited
+            self.max_queue_wait = max(self.max_queue_wait, waited)
+        return result
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,134 @@
+"""Prueba de carga: app WSGI (gunicorn) contra el modo ASGI (uvicorn).
+
+Levanta cada servidor con la misma cantidad de workers sobre la misma base,
+abre N conexiones concurrentes que piden en loop las rutas de lectura y
+reporta requests/s, latencia p50/p99 y errores por nivel de concurrencia:
+
+    python loadtest.py --database-url sqlite:////tmp/miniblog.db --concurrency 10,50,100,200 --duration 10
+
+Sin --database-url crea una base SQLite temporal y la carga con --posts posts.
+El cache de respuestas se desactiva para medir el acceso a la base. Con
+--latency-ms se simula una base remota (un sleep por request en cada vista).
+"""
+import argparse
+import asyncio
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+SERVERS = {
+    "wsgi": ["gunicorn", "-c", "gunicorn.conf.py", "app:create_app()"],
+    "asgi": ["uvicorn", "asgi:app", "--no-access-log"],
+}
+PATHS = ("/api/posts", "/api/posts/{id}", "/api/posts/{id}/comments", "/api/categories")
+
+
+def prepare(database_url, n_posts):
+    from app import create_app
+    from models import db
+    import bench
+    import search
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": database_url})
+    with app.app_context():
+        db.create_all()
+        search.ensure_index()
+        bench.seed(n_posts)
+
+
+def start(name, port, workers, database_url):
+    env = dict(
+        os.environ,
+        DATABASE_URL=database_url,
+        FLASK_RESPONSE_CACHE_SIZE="0",
+        GUNICORN_BIND=f"127.0.0.1:{port}",
+        GUNICORN_WORKERS=str(workers),
+    )
+    cmd = list(SERVERS[name])
+    if name == "asgi":
+        cmd += ["--port", str(port), "--workers", str(workers)]
+    proc = subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/api/categories").status_code == 200:
+                return proc
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError(f"{name} no arrancó en el puerto {port}")
+
+
+async def load(base_url, concurrency, duration, n_posts):
+    latencies = []
+    errors = 0
+    deadline = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        async def worker(n):
+            nonlocal errors
+            i = n
+            while time.monotonic() < deadline:
+                path = PATHS[i % len(PATHS)].format(id=1 + (i * 7919) % n_posts)
+                i += concurrency
+                started = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    if response.status_code != 200:
+                        errors += 1
+                        continue
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(worker(n) for n in range(concurrency)))
+
+    latencies.sort()
+    return {
+        "rps": len(latencies) / duration,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else None,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else None,
+        "errors": errors,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", help="base a usar (default: SQLite temporal con --posts posts)")
+    parser.add_argument("--posts", type=int, default=5000)
+    parser.add_argument("--concurrency", default="10,50,100,200")
+    parser.add_argument("--duration", type=float, default=10.0, help="segundos por nivel de concurrencia")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--servers", default="wsgi,asgi")
+    args = parser.parse_args(argv)
+
+    if not args.database_url:
+        workdir = tempfile.mkdtemp(prefix="miniblog-load-")
+        args.database_url = f"sqlite:///{os.path.join(workdir, 'load.db')}"
+        prepare(args.database_url, args.posts)
+
+    print(f"{'servidor':8} {'conexiones':>10} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errores':>8}")
+    for port, name in enumerate(args.servers.split(","), start=8800):
+        proc = start(name, port, args.workers, args.database_url)
+        try:
+            for concurrency in (int(c) for c in args.concurrency.split(",")):
+                r = asyncio.run(load(f"http://127.0.0.1:{port}", concurrency, args.duration, args.posts))
+                print(f"{name:8} {concurrency:>10} {r['rps']:>9.1f} {r['p50_ms'] or 0:>9.1f} "
+                      f"{r['p99_ms'] or 0:>9.1f} {r['errors']:>8}")
+        finally:
+            proc.send_signal(signal.SIGTERM)
+            proc.wait(timeout=30)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
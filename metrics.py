@@ -0,0 +1,258 @@
+"""Métricas por endpoint en formato Prometheus (GET /api/metrics, solo admin).
+
+Por cada regla de URL y método se acumula:
+- histograma de latencia (miniblog_http_request_duration_seconds),
+- requests por status (miniblog_http_requests_total),
+- sentencias SQL y su tiempo (miniblog_sql_statements_total, miniblog_sql_seconds_total),
+- bytes de respuesta (miniblog_http_response_bytes_total).
+
+Además, por codificación (ver compression.py), los bytes antes y después de
+comprimir y el CPU usado (miniblog_compression_*).
+
+En las respuestas en streaming (export) se mide hasta que arranca el envío: ni
+el SQL posterior ni los bytes enviados cuentan.
+
+Por request el costo es un par de perf_counter y unas sumas bajo un lock; el
+SQL se mide con eventos del engine sobre todos los binds (principal y réplicas).
+
+Con varios workers cada proceso tiene sus propios contadores. Si METRICS_DIR
+está configurado, cada proceso vuelca los suyos a `<METRICS_DIR>/<pid>.json`
+como mucho cada METRICS_FLUSH_INTERVAL segundos, y /api/metrics suma los
+archivos de todos los procesos (incluidos los que ya terminaron, para que los
+contadores no retrocedan). gunicorn.conf.py vacía el directorio al arrancar.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UNMATCHED = "<unmatched>"
+
+
+def _new_series():
+    return {
+        "buckets": [0] * len(BUCKETS),
+        "sum": 0.0,
+        "count": 0,
+        "status": {},
+        "sql_statements": 0,
+        "sql_seconds": 0.0,
+        "response_bytes": 0,
+    }
+
+
+def _new_compression():
+    return {"responses": 0, "bytes_in": 0, "bytes_out": 0, "cpu_seconds": 0.0}
+
+
+def _merge(total, series):
+    for i, n in enumerate(series["buckets"]):
+        total["buckets"][i] += n
+    for key in ("sum", "count", "sql_statements", "sql_seconds", "response_bytes"):
+        total[key] += series[key]
+    for status, n in series["status"].items():
+        total["status"][status] = total["status"].get(status, 0) + n
+
+
+def clear_dir(path):
+    """Borra los volcados de una corrida anterior."""
+    if not path or not os.path.isdir(path):
+        return
+    for name in os.listdir(path):
+        if name.endswith(".json"):
+            os.unlink(os.path.join(path, name))
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}
+        self._compression = {}
+        self.shared_dir = None
+        self.flush_interval = 1.0
+        self._next_flush = 0.0
+
+    def init_app(self, app, db):
+        app.config.setdefault("METRICS_DIR", None)
+        app.config.setdefault("METRICS_FLUSH_INTERVAL", 1.0)
+        self.shared_dir = app.config["METRICS_DIR"]
+        self.flush_interval = app.config["METRICS_FLUSH_INTERVAL"]
+        if self.shared_dir:
+            os.makedirs(self.shared_dir, exist_ok=True)
+            # lo acumulado desde el último volcado no se pierde al terminar el worker
+            atexit.register(self.flush)
+
+        with app.app_context():
+            for engine in db.engines.values():
+                event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+                event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        app.before_request(_before_request)
+        app.after_request(self._after_request)
+        app.extensions["metrics"] = self
+
+    # --- registro ---
+    def _after_request(self, response):
+        started = g.pop("metrics_started", None)
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        sql_statements, sql_seconds = g.pop("metrics_sql", (0, 0.0))
+        rule = request.url_rule.rule if request.url_rule is not None else UNMATCHED
+        size = response.content_length if not response.is_streamed else None
+        self.observe(rule, request.method, response.status_code, elapsed, sql_statements, sql_seconds, size)
+        return response
+
+    def observe(self, rule, method, status, elapsed, sql_statements=0, sql_seconds=0.0, size=None):
+        """Registra un request (también lo usan las rutas nativas de asgi.py)."""
+        key = (rule, method)
+        status = str(status)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _new_series()
+            for i, le in enumerate(BUCKETS):
+                if elapsed <= le:
+                    series["buckets"][i] += 1
+            series["sum"] += elapsed
+            series["count"] += 1
+            series["status"][status] = series["status"].get(status, 0) + 1
+            series["sql_statements"] += sql_statements
+            series["sql_seconds"] += sql_seconds
+            if size:
+                series["response_bytes"] += size
+        if self.shared_dir and time.monotonic() >= self._next_flush:
+            self.flush()
+
+    def observe_compression(self, encoding, size_in, size_out, cpu_seconds):
+        with self._lock:
+            stats = self._compression.get(encoding)
+            if stats is None:
+                stats = self._compression[encoding] = _new_compression()
+            stats["responses"] += 1
+            stats["bytes_in"] += size_in
+            stats["bytes_out"] += size_out
+            stats["cpu_seconds"] += cpu_seconds
+
+    # --- varios procesos ---
+    def flush(self):
+        """Vuelca los contadores de este proceso a METRICS_DIR (escritura atómica)."""
+        if not self.shared_dir:
+            return
+        self._next_flush = time.monotonic() + self.flush_interval
+        with self._lock:
+            data = {
+                "requests": {f"{rule}\t{method}": s for (rule, method), s in self._series.items()},
+                "compression": self._compression,
+            }
+            payload = json.dumps(data)
+        path = os.path.join(self.shared_dir, f"{os.getpid()}.json")
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            fh.write(payload)
+        os.replace(tmp, path)
+
+    def collect(self):
+        """({(rule, method): serie}, {codificación: stats}) sumando todos los procesos."""
+        if not self.shared_dir:
+            with self._lock:
+                return (
+                    {key: json.loads(json.dumps(s)) for key, s in self._series.items()},
+                    json.loads(json.dumps(self._compression)),
+                )
+        self.flush()
+        total = {}
+        compression = {}
+        for name in os.listdir(self.shared_dir):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.shared_dir, name), encoding="utf-8") as fh:
+                    data = json.load(fh)
+            except (OSError, ValueError):
+                continue
+            for key, series in data["requests"].items():
+                key = tuple(key.split("\t", 1))
+                _merge(total.setdefault(key, _new_series()), series)
+            for encoding, stats in data["compression"].items():
+                merged = compression.setdefault(encoding, _new_compression())
+                for name, value in stats.items():
+                    merged[name] += value
+        return total, compression
+
+    # --- formato Prometheus ---
+    def render(self):
+        series, compression = self.collect()
+        series = sorted(series.items())
+        lines = []
+
+        def metric(name, kind, help_text):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        metric("miniblog_http_request_duration_seconds", "histogram", "Latencia de los requests por ruta.")
+        for (rule, method), s in series:
+            labels = f'rule="{_escape(rule)}",method="{method}"'
+            for le, n in zip(BUCKETS, s["buckets"]):
+                lines.append(f'miniblog_http_request_duration_seconds_bucket{{{labels},le="{le}"}} {n}')
+            lines.append(f'miniblog_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {s["count"]}')
+            lines.append(f"miniblog_http_request_duration_seconds_sum{{{labels}}} {s['sum']:.6f}")
+            lines.append(f"miniblog_http_request_duration_seconds_count{{{labels}}} {s['count']}")
+
+        metric("miniblog_http_requests_total", "counter", "Requests por ruta y status.")
+        for (rule, method), s in series:
+            for status, n in sorted(s["status"].items()):
+                lines.append(
+                    f'miniblog_http_requests_total{{rule="{_escape(rule)}",method="{method}",status="{status}"}} {n}'
+                )
+
+        for name, key, help_text, fmt in (
+            ("miniblog_sql_statements_total", "sql_statements", "Sentencias SQL ejecutadas por ruta.", "{}"),
+            ("miniblog_sql_seconds_total", "sql_seconds", "Tiempo en sentencias SQL por ruta.", "{:.6f}"),
+            ("miniblog_http_response_bytes_total", "response_bytes", "Bytes de respuesta por ruta.", "{}"),
+        ):
+            metric(name, "counter", help_text)
+            for (rule, method), s in series:
+                lines.append(f'{name}{{rule="{_escape(rule)}",method="{method}"}} {fmt.format(s[key])}')
+
+        for name, key, help_text, fmt in (
+            ("miniblog_compression_responses_total", "responses", "Respuestas comprimidas por codificación.", "{}"),
+            ("miniblog_compression_input_bytes_total", "bytes_in", "Bytes antes de comprimir.", "{}"),
+            ("miniblog_compression_output_bytes_total", "bytes_out", "Bytes después de comprimir.", "{}"),
+            ("miniblog_compression_cpu_seconds_total", "cpu_seconds", "CPU usado en comprimir.", "{:.6f}"),
+        ):
+            metric(name, "counter", help_text)
+            for encoding, stats in sorted(compression.items()):
+                lines.append(f'{name}{{encoding="{encoding}"}} {fmt.format(stats[key])}')
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def _before_request():
+    g.metrics_started = time.perf_counter()
+    g.metrics_sql = (0, 0.0)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("metrics_started")
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    if has_request_context() and "metrics_sql" in g:
+        statements, seconds = g.metrics_sql
+        g.metrics_sql = (statements + 1, seconds + elapsed)
+
+
+metrics = Metrics()
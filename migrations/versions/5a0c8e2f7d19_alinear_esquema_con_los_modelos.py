@@ -0,0 +1,89 @@
+"""Alinear esquema con los modelos
+
+Revision ID: 5a0c8e2f7d19
+Revises: bf9f6328779a
+Create Date: 2026-10-18 09:41:26.305117
+
+Las columnas role, created_at, updated_at, is_published e is_visible y la tabla
+credenciales se agregaron a los modelos sin migración: una base creada con
+`flask db upgrade` no las tenía y la revisión d5e8c0b3a7f2 fallaba. Las bases
+que ya las tienen (creadas con create_all y después marcadas con `db stamp`)
+no cambian: cada paso se aplica sólo si falta.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5a0c8e2f7d19'
+down_revision = 'bf9f6328779a'
+branch_labels = None
+depends_on = None
+
+
+def _columnas(inspector, tabla):
+    return {c['name'] for c in inspector.get_columns(tabla)}
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    usuario = _columnas(inspector, 'usuario')
+    post = _columnas(inspector, 'post')
+    comentario = _columnas(inspector, 'comentario')
+
+    if not inspector.has_table('credenciales'):
+        op.create_table('credenciales',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('usuario_id', sa.Integer(), nullable=False),
+        sa.Column('password_hash', sa.String(length=256), nullable=False),
+        sa.ForeignKeyConstraint(['usuario_id'], ['usuario.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('usuario_id')
+        )
+        if 'password_hash' in usuario:
+            op.execute(
+                "INSERT INTO credenciales (usuario_id, password_hash) SELECT id, password_hash FROM usuario"
+            )
+
+    with op.batch_alter_table('usuario', schema=None) as batch_op:
+        if 'role' not in usuario:
+            batch_op.add_column(sa.Column('role', sa.String(length=20), server_default='user', nullable=False))
+        if 'created_at' not in usuario:
+            batch_op.add_column(sa.Column('created_at', sa.DateTime(), nullable=True))
+        if 'password_hash' in usuario:
+            batch_op.drop_column('password_hash')
+    if 'is_active' in usuario:
+        op.execute("UPDATE usuario SET is_active = 1 WHERE is_active IS NULL")
+        with op.batch_alter_table('usuario', schema=None) as batch_op:
+            batch_op.alter_column('is_active', existing_type=sa.Boolean(), nullable=False)
+
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        if 'updated_at' not in post:
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+        if 'is_published' not in post:
+            batch_op.add_column(sa.Column('is_published', sa.Boolean(), server_default=sa.true(), nullable=False))
+
+    if 'is_visible' not in comentario:
+        with op.batch_alter_table('comentario', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('is_visible', sa.Boolean(), server_default=sa.true(), nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('comentario', schema=None) as batch_op:
+        batch_op.drop_column('is_visible')
+
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.drop_column('is_published')
+        batch_op.drop_column('updated_at')
+
+    with op.batch_alter_table('usuario', schema=None) as batch_op:
+        batch_op.alter_column('is_active', existing_type=sa.Boolean(), nullable=True)
+        batch_op.add_column(sa.Column('password_hash', sa.String(length=256), nullable=True))
+        batch_op.drop_column('created_at')
+        batch_op.drop_column('role')
+    op.execute(
+        "UPDATE usuario SET password_hash = "
+        "(SELECT password_hash FROM credenciales WHERE credenciales.usuario_id = usuario.id)"
+    )
+    op.drop_table('credenciales')
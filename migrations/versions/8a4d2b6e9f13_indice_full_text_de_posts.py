@@ -0,0 +1,36 @@
+"""Indice full-text de posts
+
+Revision ID: 8a4d2b6e9f13
+Revises: 3c1f7a9d2e41
+Create Date: 2026-10-17 12:40:51.093117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a4d2b6e9f13'
+down_revision = '3c1f7a9d2e41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'mysql':
+        op.create_index('ft_post_titulo_contenido', 'post', ['titulo', 'contenido'], mysql_prefix='FULLTEXT')
+    elif dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE post_fts USING fts5("
+            "titulo, contenido, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        op.execute("INSERT INTO post_fts (rowid, titulo, contenido) SELECT id, titulo, contenido FROM post")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'mysql':
+        op.drop_index('ft_post_titulo_contenido', table_name='post')
+    elif dialect == 'sqlite':
+        op.execute("DROP TABLE post_fts")
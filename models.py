@@ -1,12 +1,17 @@
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
 
-db = SQLAlchemy()
+from replicas import RoutingSession
+
+# RoutingSession manda las lecturas de los GET a las réplicas, si hay (ver replicas.py)
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
 post_categoria = db.Table(
     'post_categoria',
     db.Column('post_id', db.Integer, db.ForeignKey('post.id'), primary_key=True),
-    db.Column('categoria_id', db.Integer, db.ForeignKey('categoria.id'), primary_key=True)
+    db.Column('categoria_id', db.Integer, db.ForeignKey('categoria.id'), primary_key=True),
+    # la PK sirve para post -> categorías; este índice para categoría -> posts
+    db.Index('ix_post_categoria_categoria_id_post_id', 'categoria_id', 'post_id'),
 )
 
 
@@ -18,10 +23,15 @@ class Usuario(db.Model):
     role = db.Column(db.String(20), default='user', nullable=False)
     is_active = db.Column(db.Boolean, default=True, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # alta o último cambio (rol, activación): el export incremental filtra por acá
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    # borrado lógico: el purgador (ver purge.py) elimina la fila y lo que cuelga de ella
+    deleted_at = db.Column(db.DateTime, index=True)
 
     # Relaciones para facilitar consultas ORM
-    posts = db.relationship("Post", backref="usuario", lazy=True)
-    comentarios = db.relationship("Comentario", backref="usuario", lazy=True)
+    # El autor se trae con JOIN junto al post/comentario para evitar N+1 en los listados
+    posts = db.relationship("Post", backref=db.backref("usuario", lazy="joined"), lazy=True)
+    comentarios = db.relationship("Comentario", backref=db.backref("usuario", lazy="joined"), lazy=True)
     credential = db.relationship("Credenciales", uselist=False, back_populates="usuario")
 
 
@@ -35,30 +45,82 @@ class Credenciales(db.Model):
 
 class Post(db.Model):
     __tablename__ = "post"
+    __table_args__ = (
+        # índice de la búsqueda full-text (ver search.py); en SQLite se usa FTS5
+        db.Index("ft_post_titulo_contenido", "titulo", "contenido", mysql_prefix="FULLTEXT").ddl_if(dialect="mysql"),
+        # listado de publicados en orden de fecha (keyset por fecha_creacion, id)
+        db.Index("ix_post_is_published_fecha_creacion_id", "is_published", "fecha_creacion", "id"),
+        db.Index("ix_post_fecha_creacion", "fecha_creacion"),
+        # listado ?sort=most_discussed (keyset por comment_count, id)
+        db.Index("ix_post_is_published_comment_count_id", "is_published", "comment_count", "id"),
+    )
     id = db.Column(db.Integer, primary_key=True)
     titulo = db.Column(db.String(200), nullable=False)
     contenido = db.Column(db.Text, nullable=False)
     fecha_creacion = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, onupdate=datetime.utcnow)
+    # index: MAX() del ETag de los listados (ver views.POSTS_VERSION)
+    updated_at = db.Column(db.DateTime, onupdate=datetime.utcnow, index=True)
     is_published = db.Column(db.Boolean, default=True, nullable=False)
+    # comentarios visibles, mantenidos en la misma transacción (ver comment_counts.py)
+    comment_count = db.Column(db.Integer, default=0, server_default="0", nullable=False)
+    last_comment_at = db.Column(db.DateTime, index=True)
+    # comienzo de contenido calculado en el SELECT para ?fields=extracto (ver views.post_load_options)
+    extracto = db.query_expression()
+    # borrado lógico (ver purge.py); un post borrado además queda despublicado
+    deleted_at = db.Column(db.DateTime, index=True)
 
-    usuario_id = db.Column(db.Integer, db.ForeignKey("usuario.id"), nullable=False)
-    categorias = db.relationship("Categoria", secondary=post_categoria, backref=db.backref("posts", lazy="dynamic"))
+    # index: posts de un usuario al borrarlo (ver purge.py)
+    usuario_id = db.Column(db.Integer, db.ForeignKey("usuario.id"), nullable=False, index=True)
+    # selectin: las categorías de toda una página se cargan con un único SELECT ... IN
+    categorias = db.relationship(
+        "Categoria", secondary=post_categoria, lazy="selectin",
+        backref=db.backref("posts", lazy="dynamic")
+    )
     comentarios = db.relationship("Comentario", backref="post", lazy=True)
 
 
 class Comentario(db.Model):
     __tablename__ = "comentario"
+    __table_args__ = (
+        # comentarios visibles de un post en orden de fecha (keyset por fecha_creacion, id)
+        db.Index("ix_comentario_post_id_is_visible_fecha_creacion_id", "post_id", "is_visible", "fecha_creacion", "id"),
+    )
     id = db.Column(db.Integer, primary_key=True)
     texto = db.Column(db.Text, nullable=False)
     fecha_creacion = db.Column(db.DateTime, default=datetime.utcnow)
-    is_visible = db.Column(db.Boolean, default=True, nullable=False)
+    # alta, edición u ocultamiento; index: ETag de los listados (ver views.POSTS_VERSION)
+    # y export incremental
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    # active_history: comment_counts.py necesita el valor anterior aunque no esté cargado
+    is_visible = db.column_property(db.Column(db.Boolean, default=True, nullable=False), active_history=True)
 
-    usuario_id = db.Column(db.Integer, db.ForeignKey("usuario.id"), nullable=False)
+    usuario_id = db.Column(db.Integer, db.ForeignKey("usuario.id"), nullable=False, index=True)
     post_id = db.Column(db.Integer, db.ForeignKey("post.id"), nullable=False)
 
 
 class Categoria(db.Model):
     __tablename__ = "categoria"
     id = db.Column(db.Integer, primary_key=True)
-    nombre = db.Column(db.String(50), nullable=False, unique=True)
\ No newline at end of file
+    nombre = db.Column(db.String(50), nullable=False, unique=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+# Tokens emitidos antes de revoked_before (epoch en ms) dejan de ser válidos (ver revocation.py)
+class TokenRevocacion(db.Model):
+    __tablename__ = "token_revocacion"
+    usuario_id = db.Column(db.Integer, db.ForeignKey("usuario.id"), primary_key=True)
+    revoked_before = db.Column(db.BigInteger, nullable=False, index=True)
+
+
+# Contadores mantenidos en la misma transacción que los inserts/deletes (ver counters.py)
+class StatsCounter(db.Model):
+    __tablename__ = "stats_counter"
+    nombre = db.Column(db.String(50), primary_key=True)
+    valor = db.Column(db.BigInteger, default=0, nullable=False)
+
+
+class StatsCounterDiario(db.Model):
+    __tablename__ = "stats_counter_diario"
+    nombre = db.Column(db.String(50), primary_key=True)
+    dia = db.Column(db.Date, primary_key=True)
+    valor = db.Column(db.BigInteger, default=0, nullable=False)
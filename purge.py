@@ -0,0 +1,255 @@
+"""Borrado de posts y usuarios, por conjuntos y por lotes.
+
+Borrar un post arrastra sus comentarios y sus filas de post_categoria; borrar un
+usuario, además sus posts y sus comentarios en posts ajenos. Nada de eso pasa
+por el ORM (que cargaría y borraría fila por fila): son DELETE ... WHERE ... IN
+de a PURGE_BATCH_SIZE filas con un commit por lote, y los contadores
+(counters.py, comment_counts.py) se ajustan con lo borrado.
+
+Primero se marca deleted_at, que basta para que el post o el usuario
+desaparezca del API; un post marcado además queda despublicado, así sale de los
+listados sin tocar sus consultas ni sus índices. Los comentarios de un usuario
+marcado se ocultan en el momento. Después:
+
+- SOFT_DELETE = False (default): el mismo request purga las filas.
+- SOFT_DELETE = True: el request responde enseguida y las filas las purga
+  `flask purge-deleted` (una vez, o con --watch como proceso aparte).
+
+Lo que quede marcado a medias (un request cortado) lo termina el purgador. La
+fila del usuario, sus credenciales y su revocación de tokens se borran recién
+cuando vencieron sus tokens (JWT_ACCESS_TOKEN_EXPIRES después de deleted_at):
+antes, borrar la revocación los volvería a dar por válidos.
+"""
+from collections import Counter
+from datetime import datetime, timedelta
+import time
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import and_, delete, func, select, update
+
+from cache import response_cache
+import comment_counts
+import counters
+import search
+from models import db, Usuario, Credenciales, Post, Comentario, TokenRevocacion, post_categoria
+from revocation import revocations
+
+_post = Post.__table__
+_comentario = Comentario.__table__
+_usuario = Usuario.__table__
+
+
+def _por_dia(fechas):
+    """{día: -cantidad} para counters.bump."""
+    dias = Counter()
+    for fecha in fechas:
+        dias[(fecha or datetime.utcnow()).date()] -= 1
+    return dias
+
+
+# --- borrado lógico ---
+def soft_delete_post(post):
+    """Marca el post como borrado y lo despublica. Se guarda con el commit del llamador."""
+    post.deleted_at = datetime.utcnow()
+    post.is_published = False
+
+
+def soft_delete_user(user):
+    """Marca al usuario y a sus posts como borrados y oculta sus comentarios, con
+    UPDATE por conjunto. Se guarda con el commit del llamador. Devuelve los ids
+    de los posts que perdieron comentarios visibles."""
+    ahora = datetime.utcnow()
+    user.deleted_at = ahora
+    user.is_active = False
+    revocations.revoke_user(user.id)
+    db.session.execute(
+        update(_post)
+        .where(_post.c.usuario_id == user.id, _post.c.deleted_at.is_(None))
+        .values(deleted_at=ahora, is_published=False)
+    )
+    visibles = and_(_comentario.c.usuario_id == user.id, _comentario.c.is_visible.is_(True))
+    por_post = dict(db.session.execute(
+        select(_comentario.c.post_id, func.count()).where(visibles).group_by(_comentario.c.post_id)
+    ).all())
+    if por_post:
+        db.session.execute(update(_comentario).where(visibles).values(is_visible=False))
+        comment_counts.quitar(por_post)
+    return list(por_post)
+
+
+# --- borrado físico ---
+class Purga:
+    """Un pase de borrado de a `limite` filas con un commit por lote. Con
+    `max_lotes` se corta al llegar al tope; lo que falte sigue marcado y lo
+    retoma el próximo pase. Los métodos devuelven False si quedó trabajo."""
+
+    def __init__(self, limite, max_lotes=None):
+        self.limite = limite
+        self.max_lotes = max_lotes
+        self.lotes = 0
+        self.totales = Counter()
+        self._tags = set()
+
+    def agotada(self):
+        return self.max_lotes is not None and self.lotes >= self.max_lotes
+
+    def _commit(self):
+        db.session.commit()
+        self.lotes += 1
+        if self._tags:
+            response_cache.invalidate(*self._tags)
+            self._tags.clear()
+
+    def comentarios(self, where):
+        while not self.agotada():
+            filas = db.session.execute(
+                select(_comentario.c.id, _comentario.c.fecha_creacion).where(where).limit(self.limite)
+            ).all()
+            if not filas:
+                return True
+            db.session.execute(delete(_comentario).where(_comentario.c.id.in_([f.id for f in filas])))
+            counters.bump("comments", _por_dia(f.fecha_creacion for f in filas))
+            self.totales["comentarios"] += len(filas)
+            self._commit()
+        return False
+
+    def posts(self, post_ids):
+        """Elimina posts ya marcados; primero sus comentarios, por lotes."""
+        if not self.comentarios(_comentario.c.post_id.in_(post_ids)) or self.agotada():
+            return False
+        posts = db.session.execute(
+            select(_post.c.id, _post.c.fecha_creacion).where(_post.c.id.in_(post_ids))
+        ).all()
+        if posts:
+            ids = [p.id for p in posts]
+            db.session.execute(delete(post_categoria).where(post_categoria.c.post_id.in_(ids)))
+            db.session.execute(delete(_post).where(_post.c.id.in_(ids)))
+            counters.bump("posts", _por_dia(p.fecha_creacion for p in posts))
+            search.remove_posts(ids)
+            self.totales["posts"] += len(ids)
+            self._tags.update(["posts", "posts:detail"] + [f"comments:{i}" for i in ids])
+        self._commit()
+        return True
+
+    def usuario(self, user_id, fila):
+        """Elimina los posts y comentarios de un usuario ya marcado y, con `fila`,
+        al usuario mismo."""
+        while True:
+            if self.agotada():
+                return False
+            ids = db.session.scalars(
+                select(_post.c.id).where(_post.c.usuario_id == user_id).order_by(_post.c.id).limit(self.limite)
+            ).all()
+            if not ids:
+                break
+            if not self.posts(ids):
+                return False
+        if not self.comentarios(_comentario.c.usuario_id == user_id):
+            return False
+        if not fila:
+            return True
+        if self.agotada():
+            return False
+        creado = db.session.scalar(select(_usuario.c.created_at).where(_usuario.c.id == user_id))
+        db.session.execute(delete(Credenciales.__table__).where(Credenciales.usuario_id == user_id))
+        db.session.execute(delete(TokenRevocacion.__table__).where(TokenRevocacion.usuario_id == user_id))
+        if db.session.execute(delete(_usuario).where(_usuario.c.id == user_id)).rowcount:
+            counters.bump("users", _por_dia([creado]))
+            self.totales["usuarios"] += 1
+        self._commit()
+        return True
+
+    def pendientes(self):
+        """Todo lo marcado: posts, y después usuarios (sus filas, si ya vencieron sus tokens)."""
+        while not self.agotada():
+            ids = db.session.scalars(
+                select(_post.c.id).where(_post.c.deleted_at.isnot(None)).order_by(_post.c.id).limit(self.limite)
+            ).all()
+            if not ids:
+                break
+            if not self.posts(ids):
+                return False
+
+        vencidos = _tokens_vencidos_antes()
+        ultimo = 0
+        while not self.agotada():
+            usuarios = db.session.execute(
+                select(_usuario.c.id, _usuario.c.deleted_at)
+                .where(_usuario.c.deleted_at.isnot(None), _usuario.c.id > ultimo)
+                .order_by(_usuario.c.id).limit(self.limite)
+            ).all()
+            if not usuarios:
+                return True
+            for user_id, deleted_at in usuarios:
+                if not self.usuario(user_id, fila=vencidos is not None and deleted_at <= vencidos):
+                    return False
+                ultimo = user_id
+        return False
+
+
+def _tokens_vencidos_antes():
+    """Los usuarios marcados antes de esto ya no tienen tokens válidos (None: los tokens no vencen)."""
+    expires = current_app.config["JWT_ACCESS_TOKEN_EXPIRES"]
+    if expires is False:
+        return None
+    if not isinstance(expires, timedelta):
+        expires = timedelta(seconds=expires)
+    return datetime.utcnow() - expires
+
+
+# --- API ---
+def _purga():
+    return Purga(current_app.config["PURGE_BATCH_SIZE"])
+
+
+def delete_post(post):
+    """Borra un post: lo marca y, sin SOFT_DELETE, lo purga en el momento."""
+    # el id antes del commit, que expira el objeto
+    post_id = post.id
+    soft_delete_post(post)
+    db.session.commit()
+    response_cache.invalidate("posts", f"post:{post_id}", f"comments:{post_id}")
+    if not current_app.config["SOFT_DELETE"]:
+        _purga().posts([post_id])
+
+
+def delete_user(user):
+    """Borra un usuario: lo marca (con sus posts y comentarios) y, sin
+    SOFT_DELETE, purga su contenido en el momento. La fila queda para el purgador."""
+    user_id = user.id
+    post_ids = soft_delete_user(user)
+    db.session.commit()
+    response_cache.invalidate(
+        "posts", "posts:detail", *(f"comments:{i}" for i in post_ids), *(f"post:{i}" for i in post_ids)
+    )
+    if not current_app.config["SOFT_DELETE"]:
+        _purga().usuario(user_id, fila=False)
+
+
+@click.command("purge-deleted")
+@click.option("--batch-size", type=int, help="filas por lote (default: PURGE_BATCH_SIZE)")
+@click.option("--max-batches", type=int, help="lotes por pase; lo que falte queda para el siguiente")
+@click.option("--watch", type=float, help="repetir cada N segundos en lugar de terminar")
+@with_appcontext
+def purge_command(batch_size, max_batches, watch):
+    """Elimina las filas de los posts y usuarios borrados."""
+    while True:
+        started = time.monotonic()
+        purga = Purga(batch_size or current_app.config["PURGE_BATCH_SIZE"], max_batches)
+        terminado = purga.pendientes()
+        totales = ", ".join(f"{n} {nombre}" for nombre, n in sorted(purga.totales.items())) or "nada"
+        click.echo(
+            f"Purgado: {totales} en {purga.lotes} lotes ({time.monotonic() - started:.1f}s)"
+            + ("" if terminado else "; quedan pendientes")
+        )
+        if watch is None:
+            return
+        time.sleep(watch)
+
+
+def init_app(app):
+    app.config.setdefault("SOFT_DELETE", False)
+    app.config.setdefault("PURGE_BATCH_SIZE", 500)
+    app.cli.add_command(purge_command)
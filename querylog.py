@@ -0,0 +1,165 @@
+"""Detector de N+1 y log de consultas lentas.
+
+Con QUERYLOG_MODE distinto de "off" se registran eventos del engine que, dentro
+de cada request, agrupan los SELECT por forma (la sentencia con los literales
+y las listas de IN normalizadas). Si una misma forma se repite más de
+QUERYLOG_REPEAT_THRESHOLD veces es casi seguro un N+1 (ej. un
+`Usuario.query.get` dentro del loop que arma la respuesta):
+
+- "raise" (tests): se lanza NMasUnoDetectado en la consulta que pasa el umbral,
+  así el traceback apunta al loop.
+- "log" (canary): se loguea un warning con la vista y las últimas líneas del
+  stack que son código de la app.
+
+Además, en cualquiera de los dos modos, toda sentencia que tarde más de
+QUERYLOG_SLOW_MS se loguea con su plan (EXPLAIN). Las vistas que repiten
+consultas a propósito (lotes del export, chunks de las cargas masivas) se
+marcan con @allow_repeated_queries.
+"""
+import os
+import re
+import time
+import traceback
+from collections import Counter
+from functools import wraps
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+MODES = ("off", "log", "raise")
+_APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_IN_LIST = re.compile(r"\(\s*(?:\?|%s|:\w+)(?:\s*,\s*(?:\?|%s|:\w+))+\s*\)")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_SPACES = re.compile(r"\s+")
+
+
+class NMasUnoDetectado(Exception):
+    pass
+
+
+def normalize(statement):
+    """Forma de la sentencia: sin literales y con las listas de IN colapsadas."""
+    shape = _STRING.sub("?", statement)
+    shape = _NUMBER.sub("?", shape)
+    shape = _IN_LIST.sub("(?)", shape)
+    return _SPACES.sub(" ", shape).strip()
+
+
+def explain(connection, statement, parameters):
+    """Plan de `statement` como lista de filas (tuplas) según el dialecto."""
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        prefix = "EXPLAIN QUERY PLAN"
+    elif dialect in ("mysql", "mariadb", "postgresql"):
+        prefix = "EXPLAIN"
+    else:
+        return []
+    return [tuple(row) for row in connection.exec_driver_sql(f"{prefix} {statement}", parameters)]
+
+
+def stack_excerpt(limit=6):
+    """Últimos frames del stack que pertenecen a la app (sin librerías)."""
+    frames = [
+        f for f in traceback.extract_stack()
+        if f.filename.startswith(_APP_DIR) and f.filename != __file__ and "site-packages" not in f.filename
+    ]
+    return "".join(traceback.format_list(frames[-limit:]))
+
+
+def allow_repeated_queries(fn):
+    """Para vistas que repiten la misma consulta por diseño (lotes, chunks)."""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        g.querylog_allow_repeats = True
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+def _reset():
+    # g es del app context, que puede abarcar varios requests (ej. tests dentro de app_context())
+    g.querylog_shapes = Counter()
+    g.querylog_allow_repeats = False
+
+
+class QueryLog:
+    def __init__(self):
+        self.mode = "off"
+        self.threshold = 10
+        self.slow_seconds = None
+
+    def init_app(self, app, db):
+        app.config.setdefault("QUERYLOG_MODE", "off")
+        app.config.setdefault("QUERYLOG_REPEAT_THRESHOLD", 10)
+        app.config.setdefault("QUERYLOG_SLOW_MS", 500)
+        self.mode = app.config["QUERYLOG_MODE"]
+        if self.mode not in MODES:
+            raise ValueError(f"QUERYLOG_MODE debe ser uno de {MODES}")
+        self.threshold = app.config["QUERYLOG_REPEAT_THRESHOLD"]
+        slow_ms = app.config["QUERYLOG_SLOW_MS"]
+        self.slow_seconds = slow_ms / 1000 if slow_ms else None
+        app.extensions["querylog"] = self
+        if self.mode == "off":
+            # apagado no agrega ningún listener
+            return
+        with app.app_context():
+            for engine in db.engines.values():
+                event.listen(engine, "before_cursor_execute", self._before)
+                event.listen(engine, "after_cursor_execute", self._after)
+        app.before_request(_reset)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("querylog_started", []).append(time.perf_counter())
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get("querylog_started")
+        if not started:
+            return
+        elapsed = time.perf_counter() - started.pop()
+        if statement.startswith("EXPLAIN"):
+            # los EXPLAIN de _log_slow
+            return
+        if self.slow_seconds is not None and elapsed >= self.slow_seconds:
+            self._log_slow(conn, statement, parameters, elapsed, executemany)
+        if has_request_context() and not executemany and statement.lstrip()[:6].upper() == "SELECT":
+            self._track(statement)
+
+    # --- N+1 ---
+    def _track(self, statement):
+        if g.get("querylog_allow_repeats"):
+            return
+        shapes = g.get("querylog_shapes")
+        if shapes is None:
+            return
+        shape = normalize(statement)
+        shapes[shape] += 1
+        if shapes[shape] != self.threshold + 1:
+            return
+        message = (
+            f"posible N+1 en {request.method} {request.path} (vista {request.endpoint}): "
+            f"la misma consulta se ejecutó más de {self.threshold} veces\n  {shape}\n{stack_excerpt()}"
+        )
+        if self.mode == "raise":
+            raise NMasUnoDetectado(message)
+        current_app.logger.warning(message)
+
+    # --- consultas lentas ---
+    def _log_slow(self, conn, statement, parameters, elapsed, executemany):
+        plan = []
+        if not executemany:
+            try:
+                # conexión aparte: la del evento todavía tiene el cursor abierto
+                with conn.engine.connect() as other:
+                    plan = explain(other, statement, parameters)
+            except Exception as exc:  # el log no debe romper el request
+                plan = [(f"EXPLAIN falló: {exc}",)]
+        vista = f"{request.method} {request.path} (vista {request.endpoint})" if has_request_context() else "fuera de request"
+        lines = "\n".join("    " + " | ".join(str(c) for c in row) for row in plan)
+        current_app.logger.warning(
+            f"consulta lenta ({elapsed * 1000:.1f} ms) en {vista}\n  {' '.join(statement.split())}\n"
+            f"  parámetros: {parameters!r}\n  plan:\n{lines}"
+        )
+
+
+querylog = QueryLog()
@@ -0,0 +1,175 @@
+"""Lecturas en réplicas.
+
+Si SQLALCHEMY_REPLICA_URIS tiene URIs (variable DATABASE_REPLICA_URLS, separadas
+por coma), cada una se registra como bind `replica_<n>` y la sesión manda ahí
+las consultas de los requests GET/HEAD, eligiendo una réplica por request en
+round-robin. Todo lo demás va a la base principal:
+
+- requests que no son GET/HEAD, flushes e INSERT/UPDATE/DELETE explícitos;
+- el resto de un request después de que escribió algo;
+- los requests de un cliente que escribió hace menos de REPLICA_STICKY_SECONDS
+  (cookie `REPLICA_STICKY_COOKIE`), para que lea lo que acaba de escribir aunque
+  la réplica venga atrasada;
+- lo que corre fuera de un request (CLI, scripts).
+
+`stats()` devuelve cantidad y tiempo de consultas por bind (para GET /stats).
+`flask sync-sqlite-replicas` copia la base principal SQLite a las réplicas
+SQLite, para probar todo localmente con archivos.
+"""
+import itertools
+import sqlite3
+import threading
+import time
+
+import click
+from flask import g, has_request_context, request
+from flask.cli import with_appcontext
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.sql.dml import UpdateBase
+
+READ_METHODS = ("GET", "HEAD")
+
+
+def replica_binds(config):
+    """Binds de SQLALCHEMY_BINDS más uno por réplica."""
+    binds = dict(config.get("SQLALCHEMY_BINDS") or {})
+    for n, uri in enumerate(config.get("SQLALCHEMY_REPLICA_URIS") or []):
+        binds[f"replica_{n}"] = uri
+    return binds
+
+
+class RoutingSession(Session):
+    """Session de models.db (ver SQLAlchemy(session_options=...))."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not isinstance(clause, UpdateBase):
+            engine = replicas.engine_for_request()
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class Replicas:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._round_robin = itertools.count()
+        self.keys = []
+        self.sticky_seconds = 5
+        self.cookie = "miniblog_primary"
+        self._stats = {}
+        self._db = None
+
+    def init_app(self, app, db):
+        app.config.setdefault("SQLALCHEMY_REPLICA_URIS", [])
+        app.config.setdefault("REPLICA_STICKY_SECONDS", 5)
+        app.config.setdefault("REPLICA_STICKY_COOKIE", "miniblog_primary")
+        self.keys = [f"replica_{n}" for n in range(len(app.config["SQLALCHEMY_REPLICA_URIS"]))]
+        self.sticky_seconds = app.config["REPLICA_STICKY_SECONDS"]
+        self.cookie = app.config["REPLICA_STICKY_COOKIE"]
+        self._stats = {}
+        self._db = db
+
+        with app.app_context():
+            for key, engine in db.engines.items():
+                self._instrument(engine, key or "primary")
+        if not event.contains(RoutingSession, "after_flush", _after_flush):
+            event.listen(RoutingSession, "after_flush", _after_flush)
+        app.before_request(_reset)
+        app.after_request(self._after_request)
+        app.cli.add_command(sync_sqlite_replicas_command)
+        app.extensions["replicas"] = self
+
+    # --- ruteo ---
+    def engine_for_request(self):
+        if not self.keys or not has_request_context():
+            return None
+        if "db_replica" not in g:
+            g.db_replica = None if self._must_use_primary() else self._next_key()
+        if g.db_replica is None or g.get("db_wrote"):
+            return None
+        return self._db.engines[g.db_replica]
+
+    def _must_use_primary(self):
+        if request.method not in READ_METHODS:
+            return True
+        try:
+            return float(request.cookies.get(self.cookie, 0)) > time.time()
+        except ValueError:
+            return False
+
+    def _next_key(self):
+        return self.keys[next(self._round_robin) % len(self.keys)]
+
+    def _after_request(self, response):
+        # quien escribió lee de la principal por un rato (tolerancia al atraso de las réplicas)
+        if self.keys and request.method not in READ_METHODS and response.status_code < 400:
+            hasta = time.time() + self.sticky_seconds
+            response.set_cookie(self.cookie, f"{hasta:.3f}", max_age=int(self.sticky_seconds) + 1, httponly=True)
+        return response
+
+    # --- métricas ---
+    def _instrument(self, engine, name):
+        stats = self._stats[name] = {"queries": 0, "seconds": 0.0, "errors": 0}
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def before(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def after(conn, cursor, statement, parameters, context, executemany):
+            elapsed = time.perf_counter() - conn.info["query_started"].pop()
+            with self._lock:
+                stats["queries"] += 1
+                stats["seconds"] += elapsed
+
+        @event.listens_for(engine, "handle_error")
+        def error(context):
+            if context.connection is not None and context.connection.info.get("query_started"):
+                context.connection.info["query_started"].pop()
+            with self._lock:
+                stats["errors"] += 1
+
+    def stats(self):
+        with self._lock:
+            return {name: dict(s, seconds=round(s["seconds"], 6)) for name, s in self._stats.items()}
+
+
+def _reset():
+    # g es del app context, que puede abarcar varios requests (ej. tests dentro de app_context())
+    g.pop("db_replica", None)
+    g.pop("db_wrote", None)
+
+
+def _after_flush(session, flush_context):
+    if has_request_context():
+        g.db_wrote = True
+
+
+replicas = Replicas()
+
+
+@click.command("sync-sqlite-replicas")
+@with_appcontext
+def sync_sqlite_replicas_command():
+    """Copia la base principal SQLite a cada réplica SQLite (pruebas locales)."""
+    db = replicas._db
+    primary = db.engine.url
+    if primary.get_backend_name() != "sqlite":
+        raise click.ClickException("la base principal no es SQLite")
+    source = sqlite3.connect(primary.database)
+    try:
+        for key in replicas.keys:
+            target_url = db.engines[key].url
+            if target_url.get_backend_name() != "sqlite":
+                click.echo(f"{key}: no es SQLite, se omite")
+                continue
+            db.engines[key].dispose()
+            target = sqlite3.connect(target_url.database)
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+            click.echo(f"{key}: copiada a {target_url.database}")
+    finally:
+        source.close()
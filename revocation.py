@@ -0,0 +1,95 @@
+"""Revocación de tokens JWT sin consultar la base en cada request.
+
+Cada usuario puede tener una marca "tokens emitidos antes de X" en la tabla
+`token_revocacion`. Las acciones de admin (desactivar, cambiar rol) la
+actualizan. Cada proceso guarda una copia de esa tabla en un dict y la
+refresca de forma incremental (sólo las filas nuevas) cada
+TOKEN_REVOCATION_REFRESH segundos. El chequeo por request es una búsqueda en
+el dict, hecha desde el jwt_required() que ya usan todos los decoradores de views.py.
+"""
+import threading
+import time
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from models import db, TokenRevocacion
+
+# margen para no perder filas commiteadas tarde o escritas por otro servidor con el reloj corrido
+OVERLAP_MS = 5000
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+class TokenRevocations:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._epochs = {}
+        self._last_seen = 0
+        self._next_refresh = 0.0
+        self.refresh_interval = 2.0
+        self.refreshes = 0
+
+    def init_app(self, app, jwt):
+        app.config.setdefault("TOKEN_REVOCATION_REFRESH", 2.0)
+        self.refresh_interval = app.config["TOKEN_REVOCATION_REFRESH"]
+        jwt.token_in_blocklist_loader(self.is_revoked)
+        jwt.revoked_token_loader(lambda jwt_header, jwt_payload: ({"error": "token revocado"}, 401))
+        app.extensions["token_revocations"] = self
+        if not event.contains(Session, "after_commit", _after_commit):
+            event.listen(Session, "after_commit", _after_commit)
+            event.listen(Session, "after_rollback", _after_rollback)
+
+    def is_revoked(self, jwt_header, jwt_payload):
+        self._maybe_refresh()
+        epoch = self._epochs.get(int(jwt_payload["sub"]))
+        # iat viene en segundos: ante la duda (mismo segundo) el token se considera revocado
+        return epoch is not None and jwt_payload["iat"] * 1000 <= epoch
+
+    def revoke_user(self, usuario_id):
+        """Invalida los tokens ya emitidos del usuario. Se guarda con el commit
+        del llamador y recién ahí se aplica en este proceso: si hay rollback,
+        el token sigue valiendo acá igual que en los demás workers."""
+        epoch = _now_ms()
+        db.session.merge(TokenRevocacion(usuario_id=usuario_id, revoked_before=epoch))
+        db.session.info.setdefault("token_revocations", []).append((self, usuario_id, epoch))
+
+    def _apply(self, usuario_id, epoch):
+        with self._lock:
+            self._epochs[usuario_id] = max(epoch, self._epochs.get(usuario_id, 0))
+
+    def _maybe_refresh(self):
+        if time.monotonic() < self._next_refresh:
+            return
+        # un solo thread refresca; el resto sigue con la copia actual
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            since = self._last_seen - OVERLAP_MS
+            # conexión propia: no se mezcla con la transacción del request
+            with db.engine.connect() as conn:
+                rows = conn.execute(
+                    select(TokenRevocacion.usuario_id, TokenRevocacion.revoked_before)
+                    .where(TokenRevocacion.revoked_before > since)
+                ).all()
+            for usuario_id, epoch in rows:
+                self._epochs[usuario_id] = max(epoch, self._epochs.get(usuario_id, 0))
+                self._last_seen = max(self._last_seen, epoch)
+            self.refreshes += 1
+            self._next_refresh = time.monotonic() + self.refresh_interval
+        finally:
+            self._lock.release()
+
+
+def _after_commit(session):
+    for revocations, usuario_id, epoch in session.info.pop("token_revocations", ()):
+        revocations._apply(usuario_id, epoch)
+
+
+def _after_rollback(session):
+    session.info.pop("token_revocations", None)
+
+
+revocations = TokenRevocations()
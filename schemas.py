@@ -34,6 +34,8 @@ class PostSchema(Schema):
     fecha_creacion = fields.DateTime(dump_only=True)
     updated_at = fields.DateTime(dump_only=True)
     is_published = fields.Bool()
+    comment_count = fields.Int(dump_only=True)
+    last_comment_at = fields.DateTime(dump_only=True)
     usuario_id = fields.Int()
     categorias = fields.List(fields.Int(), load_only=True)
     categorias_detalle = fields.List(fields.Nested(CategoriaSchema), dump_only=True)
@@ -0,0 +1,144 @@
+"""Búsqueda full-text sobre el título y el contenido de los posts.
+
+- MySQL: índice FULLTEXT sobre (titulo, contenido) y MATCH ... AGAINST en modo
+  lenguaje natural. InnoDB mantiene el índice solo.
+- SQLite (desarrollo / tests): tabla virtual FTS5 `post_fts` que las vistas de
+  posts actualizan en la misma transacción con index_post/remove_post.
+
+La tabla FTS5 se crea sólo al armar el esquema: la migración 8a4d2b6e9f13,
+`flask reindex-search` o ensure_index() después de un create_all. Nunca desde
+un request: el CREATE VIRTUAL TABLE hace commit solo y el rollback del
+request dejaría la tabla vacía. Sin la tabla, las escrituras no la tocan y
+search_posts() lanza IndiceNoCreado.
+"""
+import re
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import Float, Integer, text
+from sqlalchemy.dialects.mysql import match
+
+from models import db, Post
+
+FTS_TABLE = "post_fts"
+
+# el título pesa el doble que el contenido en el ranking de SQLite
+_BM25 = f"bm25({FTS_TABLE}, 2.0, 1.0)"
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def _dialect():
+    return db.session.get_bind().dialect.name
+
+
+def _fts_query(q):
+    # se citan los términos para que caracteres de la sintaxis FTS5 no rompan la consulta
+    return " OR ".join(f'"{w}"' for w in _WORD.findall(q))
+
+
+class IndiceNoCreado(Exception):
+    pass
+
+
+# bases (url del engine) donde ya se vio la tabla FTS5: no se vuelve a consultar
+_con_indice = set()
+
+
+def has_index():
+    """True si la base es SQLite y tiene la tabla FTS5."""
+    if _dialect() != "sqlite":
+        return False
+    url = str(db.session.get_bind().url)
+    if url in _con_indice:
+        return True
+    exists = db.session.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": FTS_TABLE},
+    ).first()
+    if exists:
+        _con_indice.add(url)
+    return exists is not None
+
+
+def ensure_index():
+    """Crea la tabla FTS5 si falta (SQLite) y la llena con los posts existentes.
+    Sólo para armar el esquema (ver arriba); hace commit."""
+    if _dialect() != "sqlite" or has_index():
+        return
+    db.session.execute(text(
+        f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+        "titulo, contenido, tokenize = 'unicode61 remove_diacritics 2')"
+    ))
+    db.session.execute(text(
+        f"INSERT INTO {FTS_TABLE} (rowid, titulo, contenido) SELECT id, titulo, contenido FROM post"
+    ))
+    db.session.commit()
+
+
+def index_post(post):
+    """Agrega o actualiza un post en el índice. Llamar antes del commit, con el id ya asignado."""
+    index_rows([{"id": post.id, "titulo": post.titulo, "contenido": post.contenido}])
+
+
+def index_rows(rows):
+    """Versión por lotes de index_post: `rows` son dicts con id, titulo y contenido."""
+    if not rows or not has_index():
+        return
+    db.session.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), [{"id": r["id"]} for r in rows])
+    db.session.execute(
+        text(f"INSERT INTO {FTS_TABLE} (rowid, titulo, contenido) VALUES (:id, :titulo, :contenido)"),
+        [{"id": r["id"], "titulo": r["titulo"], "contenido": r["contenido"]} for r in rows],
+    )
+
+
+def remove_post(post_id):
+    remove_posts([post_id])
+
+
+def remove_posts(post_ids):
+    if not post_ids or not has_index():
+        return
+    db.session.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), [{"id": i} for i in post_ids])
+
+
+def reindex():
+    if _dialect() != "sqlite":
+        return
+    db.session.execute(text(f"DROP TABLE IF EXISTS {FTS_TABLE}"))
+    _con_indice.discard(str(db.session.get_bind().url))
+    ensure_index()
+
+
+def search_posts(q, limit, offset=0):
+    """Devuelve [(post, score)] de posts publicados, más relevantes primero.
+    En SQLite lanza IndiceNoCreado si falta la tabla FTS5."""
+    if _dialect() == "mysql":
+        score = match(Post.titulo, Post.contenido, against=q).in_natural_language_mode()
+        query = db.session.query(Post, score.label("score")).filter(score > 0)
+        order = [score.desc(), Post.id.desc()]
+    else:
+        terms = _fts_query(q)
+        if not terms:
+            return []
+        if not has_index():
+            raise IndiceNoCreado()
+        hits = text(
+            f"SELECT rowid AS post_id, -{_BM25} AS score FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :q"
+        ).bindparams(q=terms).columns(post_id=Integer, score=Float).subquery()
+        query = db.session.query(Post, hits.c.score).join(hits, hits.c.post_id == Post.id)
+        order = [hits.c.score.desc(), Post.id.desc()]
+
+    query = query.filter(Post.is_published.is_(True)).order_by(*order)
+    return query.offset(offset).limit(limit).all()
+
+
+@click.command("reindex-search")
+@with_appcontext
+def reindex_command():
+    """Reconstruye el índice de búsqueda de posts (SQLite)."""
+    reindex()
+    click.echo("Índice de búsqueda reconstruido.")
+
+
+def init_app(app):
+    app.cli.add_command(reindex_command)
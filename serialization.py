@@ -0,0 +1,132 @@
+"""Serialización rápida para los listados.
+
+`compile_dumper(Schema, Modelo)` convierte un schema de marshmallow, una sola
+vez, en una función fila -> dict generada con el mismo resultado que
+`Schema().dump(fila)`, sin recorrer los fields ni crear schemas por fila.
+
+`Fieldset` resuelve ?fields= de un listado: qué columnas cargar (el resto queda
+diferido en el SELECT con load_only) y un dumper compilado para ese subconjunto.
+
+OrjsonProvider reemplaza el encoder JSON de Flask (jsonify y los dict que
+devuelven las vistas) cuando orjson está instalado; si no, se usa el de Flask.
+"""
+from functools import lru_cache
+
+from marshmallow import fields
+from sqlalchemy.orm import load_only
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # dependencia opcional
+    orjson = None
+
+
+# fields cuyo _serialize devuelve el valor tal cual viene de la columna
+_PASSTHROUGH = (fields.Integer, fields.String, fields.Boolean)
+
+
+def compile_dumper(schema_cls, model, only=None):
+    """Devuelve una función obj -> dict equivalente a schema_cls(only=only).dump(obj).
+
+    Los fields que el modelo no tiene (ej. categorias_detalle en Post) se omiten,
+    igual que hace marshmallow cuando falta el atributo.
+    """
+    schema = schema_cls(only=only)
+    namespace = {}
+    items = []
+    for name, field in schema.dump_fields.items():
+        key = field.data_key or name
+        attr = field.attribute or name
+        if not hasattr(model, attr):
+            continue
+        getter = f"obj.{attr}"
+        if isinstance(field, _PASSTHROUGH) and not getattr(field, "as_string", False):
+            expr = getter
+        elif isinstance(field, fields.DateTime) and (field.format or "iso") == "iso":
+            expr = f"(None if obj.{attr} is None else obj.{attr}.isoformat())"
+        else:
+            # cualquier otro field se delega a marshmallow
+            namespace[f"f_{name}"] = field
+            expr = f"f_{name}.serialize({attr!r}, obj)"
+        items.append(f"{key!r}: {expr}")
+
+    source = "def dump(obj):\n    return {" + ", ".join(items) + "}\n"
+    exec(compile(source, f"<dumper {schema_cls.__name__}>", "exec"), namespace)
+    return namespace["dump"]
+
+
+class Fieldset:
+    """Campos de ?fields= para un schema y su modelo.
+
+    Los campos del schema que son columnas del modelo se cargan con load_only;
+    `extras` son campos que arma la vista (ej. autor) y `presets` nombres que
+    equivalen a varios campos (ej. summary).
+    """
+
+    def __init__(self, schema_cls, model, extras=(), presets=None):
+        self.schema_cls = schema_cls
+        self.model = model
+        schema = schema_cls()
+        self.columns = frozenset(
+            name for name, field in schema.dump_fields.items()
+            if hasattr(model, field.attribute or name)
+        )
+        self.extras = frozenset(extras)
+        self.presets = {k: frozenset(v) for k, v in (presets or {}).items()}
+        self._dumper = lru_cache(maxsize=64)(self._compile)
+
+    def parse(self, value):
+        """Campos pedidos en "id,titulo,autor", o None si no se pidió ninguno (todos)."""
+        if not value:
+            return None
+        pedidos = set()
+        for name in (v.strip() for v in value.split(",")):
+            if name:
+                pedidos |= self.presets.get(name, {name})
+        validos = self.columns | self.extras
+        if not pedidos or pedidos - validos:
+            opciones = sorted(validos) + sorted(self.presets)
+            raise ValueError(f"fields debe ser una lista de: {', '.join(opciones)}")
+        return frozenset(pedidos)
+
+    def load_only(self, pedidos, *necesarios):
+        """Opción de carga con las columnas de `pedidos` más las que la vista
+        necesita aunque no se devuelvan (ej. las del cursor); la PK siempre va."""
+        names = (pedidos & self.columns) | set(necesarios)
+        return load_only(*(getattr(self.model, name) for name in sorted(names)))
+
+    def dumper(self, pedidos):
+        """compile_dumper de las columnas pedidas (se compila una vez por combinación)."""
+        return self._dumper(pedidos & self.columns)
+
+    def _compile(self, columnas):
+        if not columnas:
+            # sólo campos de la vista (ej. fields=autor)
+            return lambda obj: {}
+        return compile_dumper(self.schema_cls, self.model, only=sorted(columnas))
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Mismo contrato que el provider por defecto (claves ordenadas), con orjson."""
+
+    options = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS if orjson else 0
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self.options).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if self._app.debug:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default, option=self.options | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def init_app(app):
+    if orjson is not None and app.config.get("FAST_JSON", True):
+        app.json = OrjsonProvider(app)
@@ -0,0 +1,92 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+from cache import response_cache  # noqa: E402
+import search  # noqa: E402
+from models import db, Usuario, Post, Comentario, Categoria  # noqa: E402
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'test.db'}",
+        "SQLALCHEMY_REPLICA_URIS": [],
+        "RESPONSE_CACHE_SIZE": 0,
+        "QUERYLOG_MODE": "raise",
+    })
+    with app.app_context():
+        db.create_all()
+        search.ensure_index()
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def cache(app):
+    """Cache de respuestas prendido (el fixture `app` lo apaga)."""
+    response_cache.configure(64, 30)
+    yield response_cache
+    response_cache.configure(0, 30)
+
+
+@pytest.fixture
+def statements(app):
+    """Lista con las sentencias SQL ejecutadas; se vacía con `statements.clear()`."""
+    ejecutadas = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        ejecutadas.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", registrar)
+    yield ejecutadas
+    event.remove(db.engine, "before_cursor_execute", registrar)
+
+
+@pytest.fixture
+def blog(app):
+    """Arma posts con autor, categorías y comentarios de autores distintos."""
+    def crear(posts, comentarios=0, categorias=2):
+        base = db.session.query(db.func.count(Usuario.id)).scalar()
+        autores = [Usuario(username=f"autor{base + i}", email=f"autor{base + i}@mail.com") for i in range(3)]
+        cats = [Categoria(nombre=f"cat{base}-{i}") for i in range(categorias)]
+        db.session.add_all(autores + cats)
+        inicio = datetime(2025, 1, 1)
+        creados = []
+        for i in range(posts):
+            post = Post(
+                titulo=f"Post {i}", contenido=f"Contenido del post {i}", usuario=autores[i % len(autores)],
+                categorias=cats, fecha_creacion=inicio + timedelta(minutes=i),
+            )
+            post.comentarios = [
+                Comentario(texto=f"c{j}", usuario=autores[j % len(autores)], fecha_creacion=inicio + timedelta(minutes=i, seconds=j))
+                for j in range(comentarios)
+            ]
+            creados.append(post)
+        db.session.add_all(creados)
+        db.session.commit()
+        return creados
+    return crear
+
+
+@pytest.fixture
+def admin(app):
+    """Headers de un admin."""
+    user = Usuario(username="admin", email="admin@mail.com", role="admin")
+    db.session.add(user)
+    db.session.commit()
+    token = create_access_token(identity=str(user.id), additional_claims={"role": "admin"})
+    return {"Authorization": f"Bearer {token}"}
@@ -0,0 +1,100 @@
+"""Alta masiva de posts y comentarios: resultados por item y contadores."""
+import json
+
+from sqlalchemy.exc import SQLAlchemyError
+
+import search
+from models import db, Post, Comentario, Categoria
+
+
+def stats(client, headers):
+    return client.get("/api/stats", headers=headers).get_json()
+
+
+def assert_contadores_al_dia(client, headers):
+    data = stats(client, headers)
+    assert data["total_posts"] == Post.query.count()
+    assert data["total_comments"] == Comentario.query.count()
+    for post in Post.query:
+        visibles = [c for c in post.comentarios if c.is_visible]
+        assert post.comment_count == len(visibles)
+        assert post.last_comment_at == max((c.fecha_creacion for c in visibles), default=None)
+
+
+def test_posts_con_items_invalidos(client, admin):
+    categoria = Categoria(nombre="Python")
+    db.session.add(categoria)
+    db.session.commit()
+    items = [
+        {"titulo": "Uno", "contenido": "a", "categorias": [categoria.id, 999]},
+        {"contenido": "sin título"},
+        "no es un objeto",
+        {"titulo": "Dos", "contenido": "b"},
+    ]
+    response = client.post("/api/posts/bulk", json=items, headers=admin)
+    assert response.status_code == 200
+    data = response.get_json()
+    assert (data["created"], data["failed"]) == (2, 2)
+    assert [(r["index"], r["status"]) for r in data["results"]] == [(0, 201), (1, 400), (2, 400), (3, 201)]
+    assert "titulo" in data["results"][1]["error"]
+
+    uno = db.session.get(Post, data["results"][0]["id"])
+    assert uno.titulo == "Uno"
+    assert [c.id for c in uno.categorias] == [categoria.id]
+    assert [post.titulo for post, _ in search.search_posts("Dos", 10, 0)] == ["Dos"]
+    assert_contadores_al_dia(client, admin)
+
+
+def test_posts_en_ndjson(client, admin):
+    lineas = [json.dumps({"titulo": "Uno", "contenido": "a"}), "{roto", "", json.dumps({"titulo": "Dos", "contenido": "b"})]
+    response = client.post(
+        "/api/posts/bulk", data="\n".join(lineas) + "\n", content_type="application/x-ndjson", headers=admin,
+    )
+    data = response.get_json()
+    assert [(r["index"], r["status"]) for r in data["results"]] == [(0, 201), (1, 400), (2, 201)]
+    assert sorted(p.titulo for p in Post.query) == ["Dos", "Uno"]
+    assert_contadores_al_dia(client, admin)
+
+
+def test_un_chunk_que_falla_no_deja_contadores_a_medias(client, admin, monkeypatch):
+    index_rows = search.index_rows
+    llamadas = []
+
+    def falla_el_segundo(rows):
+        llamadas.append(rows)
+        if len(llamadas) == 2:
+            raise SQLAlchemyError("falla")
+        index_rows(rows)
+
+    monkeypatch.setattr(search, "index_rows", falla_el_segundo)
+    items = [{"titulo": f"Post {i}", "contenido": "c"} for i in range(5)]
+    data = client.post("/api/posts/bulk?chunk_size=2", json=items, headers=admin).get_json()
+    assert [r["status"] for r in data["results"]] == [201, 201, 500, 500, 201]
+    assert (data["created"], data["failed"]) == (3, 2)
+    assert sorted(p.titulo for p in Post.query) == ["Post 0", "Post 1", "Post 4"]
+    assert_contadores_al_dia(client, admin)
+
+
+def test_comentarios_actualizan_comment_count(client, blog, admin):
+    (post,) = blog(posts=1, comentarios=2)
+    items = [{"texto": "uno"}, {}, {"texto": "dos"}, {"texto": "tres"}]
+    response = client.post(f"/api/posts/{post.id}/comments/bulk?chunk_size=2", json=items, headers=admin)
+    data = response.get_json()
+    assert [(r["index"], r["status"]) for r in data["results"]] == [(0, 201), (1, 400), (2, 201), (3, 201)]
+
+    db.session.expire_all()
+    assert db.session.get(Post, post.id).comment_count == 5
+    assert_contadores_al_dia(client, admin)
+    detalle = client.get(f"/api/posts/{post.id}").get_json()
+    assert detalle["comment_count"] == 5
+
+
+def test_comentarios_de_un_post_inexistente(client, admin):
+    response = client.post("/api/posts/999/comments/bulk", json=[{"texto": "x"}], headers=admin)
+    assert response.status_code == 404
+    assert Comentario.query.count() == 0
+
+
+def test_cuerpo_que_no_es_una_lista(client, admin):
+    response = client.post("/api/posts/bulk", json={"titulo": "x"}, headers=admin)
+    assert response.status_code == 400
@@ -0,0 +1,73 @@
+"""Las escrituras invalidan las entradas del cache que las muestran."""
+import pytest
+
+
+def cacheado(client, statements, url):
+    """GET que queda en el cache: el segundo no consulta la base."""
+    client.get(url)
+    statements.clear()
+    response = client.get(url)
+    assert statements == []
+    return response
+
+
+def titulos(client, url="/api/posts"):
+    return [p["titulo"] for p in client.get(url).get_json()["items"]]
+
+
+def test_editar_un_post(client, blog, admin, cache, statements):
+    posts = blog(posts=2)
+    post_id = posts[0].id
+    cacheado(client, statements, "/api/posts")
+    cacheado(client, statements, f"/api/posts/{post_id}")
+
+    response = client.put(f"/api/posts/{post_id}", json={"titulo": "Editado"}, headers=admin)
+    assert response.status_code == 200, response.get_data(as_text=True)
+
+    assert "Editado" in titulos(client)
+    assert client.get(f"/api/posts/{post_id}").get_json()["titulo"] == "Editado"
+
+
+def test_renombrar_una_categoria(client, blog, admin, cache, statements):
+    (post,) = blog(posts=1, categorias=1)
+    categoria_id = post.categorias[0].id
+    urls = ["/api/categories", "/api/posts", f"/api/posts/{post.id}"]
+    for url in urls:
+        cacheado(client, statements, url)
+
+    response = client.put(f"/api/categories/{categoria_id}", json={"nombre": "Renombrada"}, headers=admin)
+    assert response.status_code == 200, response.get_data(as_text=True)
+
+    assert [c["nombre"] for c in client.get("/api/categories").get_json()] == ["Renombrada"]
+    (item,) = client.get("/api/posts").get_json()["items"]
+    assert item["categorias_detalle"] == [{"id": categoria_id, "nombre": "Renombrada"}]
+    assert client.get(f"/api/posts/{post.id}").get_json()["categorias_detalle"][0]["nombre"] == "Renombrada"
+
+
+@pytest.mark.parametrize("soft_delete", [False, True])
+def test_borrar_un_post(app, client, blog, admin, cache, statements, soft_delete):
+    app.config["SOFT_DELETE"] = soft_delete
+    borrado, otro = blog(posts=2, comentarios=1)
+    borrado_id, titulo = borrado.id, otro.titulo
+    urls = ["/api/posts", f"/api/posts/{borrado_id}", f"/api/posts/{borrado_id}/comments"]
+    for url in urls:
+        cacheado(client, statements, url)
+
+    assert client.delete(f"/api/posts/{borrado_id}", headers=admin).status_code == 200
+
+    assert titulos(client) == [titulo]
+    assert client.get(f"/api/posts/{borrado_id}").status_code == 404
+    assert client.get(f"/api/posts/{borrado_id}/comments").status_code == 404
+
+
+def test_borrar_un_usuario(client, blog, admin, cache, statements):
+    posts = blog(posts=3, comentarios=1)
+    autor_id, post_id = posts[0].usuario_id, posts[0].id
+    quedan = sorted(p.titulo for p in posts if p.usuario_id != autor_id)
+    cacheado(client, statements, "/api/posts")
+    cacheado(client, statements, f"/api/posts/{post_id}")
+
+    assert client.delete(f"/api/users/{autor_id}", headers=admin).status_code == 200
+
+    assert sorted(titulos(client)) == quedan
+    assert client.get(f"/api/posts/{post_id}").status_code == 404
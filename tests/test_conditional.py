@@ -0,0 +1,69 @@
+"""ETag / 304 de los GET de posts."""
+import pytest
+
+from models import db, Post, Comentario
+
+
+@pytest.mark.parametrize("url", ["/api/posts", "/api/posts?sort=most_discussed", "/api/posts/{id}", "/api/posts?ids={id}"])
+def test_comentar_cambia_el_etag_sin_tocar_updated_at(client, blog, url):
+    (post,) = blog(posts=1, comentarios=1)
+    url = url.format(id=post.id)
+    etag = client.get(url).headers["ETag"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    db.session.add(Comentario(texto="otro", usuario_id=post.usuario_id, post_id=post.id))
+    db.session.commit()
+    assert db.session.get(Post, post.id).updated_at is None
+
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+@pytest.mark.parametrize("url", ["/api/posts", "/api/posts/{id}", "/api/posts/{id}/comments", "/api/categories"])
+def test_sin_validadores_un_hit_no_consulta_la_base(client, blog, statements, cache, url):
+    (post,) = blog(posts=1, comentarios=2)
+    url = url.format(id=post.id)
+    etag = client.get(url).headers["ETag"]
+
+    statements.clear()
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.headers["ETag"] == etag
+    assert statements == []
+
+    # con validadores corre el probe, que da el mismo ETag que quedó guardado
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+    assert statements
+
+
+def test_sin_validadores_ni_cache_el_probe_corre_una_vez(client, blog, statements):
+    blog(posts=3, comentarios=1)
+    statements.clear()
+    response = client.get("/api/posts")
+    assert response.headers["ETag"]
+    assert sum("stats_counter" in s for s in statements) == 1
+
+
+def test_ocultar_un_comentario_cambia_el_etag_del_listado(client, blog):
+    (post,) = blog(posts=1, comentarios=3)
+    etag = client.get("/api/posts").headers["ETag"]
+    comentario = db.session.get(Comentario, post.comentarios[0].id)
+    comentario.is_visible = False
+    db.session.commit()
+    assert client.get("/api/posts", headers={"If-None-Match": etag}).status_code == 200
+
+
+@pytest.mark.parametrize("encoding", [None, "gzip"])
+def test_un_validador_viejo_no_deja_una_entrada_sin_etag(client, blog, cache, encoding):
+    blog(posts=2, comentarios=1)
+    response = client.get("/api/posts", headers={"If-None-Match": '"viejo"'})
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+
+    headers = {"Accept-Encoding": encoding} if encoding else {}
+    response = client.get("/api/posts", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["ETag"] is not None
+    assert response.headers["Last-Modified"] is not None
+    assert client.get("/api/posts", headers={"If-None-Match": etag}).status_code == 304
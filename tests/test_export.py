@@ -0,0 +1,90 @@
+"""Export NDJSON completo e incremental (?since=)."""
+import json
+from datetime import datetime
+
+import pytest
+
+import views
+from models import db, Usuario, Post, Comentario
+
+
+@pytest.fixture
+def lotes_chicos(monkeypatch):
+    monkeypatch.setattr(views, "EXPORT_BATCH_SIZE", 2)
+
+
+def exportar(client, headers, recurso, since=None):
+    url = f"/api/export/{recurso}.ndjson"
+    if since:
+        url += f"?since={since.isoformat()}"
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_export_completo(client, blog, admin, lotes_chicos):
+    ids = [p.id for p in blog(posts=5, comentarios=2)]
+    exportados = exportar(client, admin, "posts")
+    assert [p["id"] for p in exportados] == ids
+    assert all(len(p["comentarios"]) == 2 for p in exportados)
+    assert len(exportar(client, admin, "comments")) == 10
+
+
+def test_posts_cambiados(client, blog, admin, lotes_chicos):
+    editado, comentado, ocultado, _ = blog(posts=4, comentarios=1)
+    since = datetime.utcnow()
+
+    editado.titulo = "Editado"
+    db.session.add(Comentario(texto="nuevo", usuario_id=comentado.usuario_id, post_id=comentado.id))
+    ocultado.comentarios[0].is_visible = False
+    nuevo = Post(titulo="Nuevo", contenido="c", usuario_id=editado.usuario_id)
+    db.session.add(nuevo)
+    db.session.commit()
+    esperados = sorted([editado.id, comentado.id, ocultado.id, nuevo.id])
+
+    assert [p["id"] for p in exportar(client, admin, "posts", since)] == esperados
+
+
+def test_comentarios_cambiados(client, blog, admin, lotes_chicos):
+    (post,) = blog(posts=1, comentarios=3)
+    since = datetime.utcnow()
+    editado = post.comentarios[1]
+    editado.texto = "editado"
+    db.session.commit()
+    (otro,) = blog(posts=1, comentarios=2)
+    esperados = sorted([editado.id] + [c.id for c in otro.comentarios])
+
+    assert sorted(c["id"] for c in exportar(client, admin, "comments", since)) == esperados
+
+
+def test_comentarios_con_el_mismo_updated_at(client, blog, admin, lotes_chicos):
+    (post,) = blog(posts=1, comentarios=5)
+    esperados = sorted(c.id for c in post.comentarios)
+    mismo = datetime(2030, 1, 1)
+    db.session.query(Comentario).update({"updated_at": mismo})
+    db.session.commit()
+    assert [c["id"] for c in exportar(client, admin, "comments", mismo)] == esperados
+
+
+def test_usuarios_con_cambio_de_rol_o_desactivados(client, blog, admin, lotes_chicos):
+    blog(posts=3)
+    promovido, desactivado, _ = [u.id for u in Usuario.query.filter(Usuario.username.like("autor%")).order_by(Usuario.id)]
+    since = datetime.utcnow()
+
+    assert client.patch(f"/api/users/{promovido}/role", json={"role": "moderator"}, headers=admin).status_code == 200
+    assert client.patch(f"/api/users/{desactivado}/deactivate", headers=admin).status_code == 200
+
+    exportados = exportar(client, admin, "users", since)
+    assert [(u["id"], u["role"], u["is_active"]) for u in exportados] == [
+        (promovido, "moderator", True), (desactivado, "user", False),
+    ]
+
+
+def test_post_borrado_no_se_exporta(app, client, blog, admin):
+    app.config["SOFT_DELETE"] = True
+    since = datetime.utcnow()
+    borrado, queda = blog(posts=2, comentarios=1)
+    borrado_id, queda_id = borrado.id, queda.id
+    assert client.delete(f"/api/posts/{borrado_id}", headers=admin).status_code == 200
+    assert [p["id"] for p in exportar(client, admin, "posts", since)] == [queda_id]
+    assert db.session.get(Post, borrado_id) is not None
@@ -0,0 +1,46 @@
+"""Pool de procesos de hashing.py."""
+import os
+import signal
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from hashing import PasswordHasher, PoolSaturado
+
+
+@pytest.fixture
+def hasher():
+    hasher = PasswordHasher()
+    hasher.configure(workers=1, queue=1, timeout=30, rounds=4)
+    yield hasher
+    hasher.shutdown()
+
+
+def test_un_proceso_muerto_no_rompe_el_pool(hasher):
+    password_hash = hasher.hash("secreta")
+    roto = hasher._executor
+    for pid in list(roto._processes):
+        os.kill(pid, signal.SIGKILL)
+    deadline = time.monotonic() + 10
+    while not roto._broken and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    assert hasher.verify("secreta", password_hash)
+    assert hasher._executor is not roto
+    assert hasher.stats()["in_flight"] == 0
+
+
+class _PoolRoto:
+    def submit(self, *args, **kwargs):
+        raise BrokenProcessPool("roto")
+
+    def shutdown(self, **kwargs):
+        pass
+
+
+def test_si_el_reintento_falla_responde_pool_saturado(hasher, monkeypatch):
+    monkeypatch.setattr(hasher, "_pool", _PoolRoto)
+    with pytest.raises(PoolSaturado):
+        hasher.hash("secreta")
+    assert hasher.stats()["in_flight"] == 0
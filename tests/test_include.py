@@ -0,0 +1,22 @@
+"""?include= combinado con ?fields= e ?ids=."""
+import pytest
+
+
+@pytest.mark.parametrize("query", ["", "&ids={ids}"])
+def test_include_comments_con_fields_sin_id(client, blog, query):
+    posts = blog(posts=3, comentarios=2)
+    ids = ",".join(str(p.id) for p in posts)
+    response = client.get("/api/posts?fields=titulo&include=comments" + query.format(ids=ids))
+    assert response.status_code == 200, response.get_data(as_text=True)
+    data = response.get_json()
+    assert [set(item) for item in data["items"]] == [{"titulo", "comentarios_next_cursor"}] * 3
+    assert sorted(c["post_id"] for c in data["included"]["comentarios"]) == sorted([p.id for p in posts] * 2)
+
+
+def test_include_comments_asigna_los_comentarios_de_cada_post(client, blog):
+    vacio = blog(posts=1)[0]
+    con_comentarios = blog(posts=1, comentarios=2)[0]
+    data = client.get(
+        f"/api/posts?fields=id,titulo&include=comments&ids={vacio.id},{con_comentarios.id}"
+    ).get_json()
+    assert {c["post_id"] for c in data["included"]["comentarios"]} == {con_comentarios.id}
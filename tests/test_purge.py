@@ -0,0 +1,40 @@
+"""DELETE de posts y usuarios con la purga en el mismo request."""
+import pytest
+
+from models import db, Post, Comentario
+
+
+@pytest.fixture
+def lotes_chicos(app):
+    # un lote por comentario: la misma consulta se repite más veces que QUERYLOG_REPEAT_THRESHOLD
+    app.config["PURGE_BATCH_SIZE"] = 1
+
+
+def test_borrar_post_purga_por_lotes_sin_n_mas_uno(client, blog, admin, lotes_chicos):
+    (post,) = blog(posts=1, comentarios=15)
+    post_id = post.id
+    response = client.delete(f"/api/posts/{post_id}", headers=admin)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    assert db.session.get(Post, post_id) is None
+    assert Comentario.query.filter_by(post_id=post_id).count() == 0
+
+
+def test_borrar_usuario_purga_por_lotes_sin_n_mas_uno(client, blog, admin, lotes_chicos):
+    posts = blog(posts=12, comentarios=2)
+    autor_id = posts[0].usuario_id
+    response = client.delete(f"/api/users/{autor_id}", headers=admin)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    assert Post.query.filter_by(usuario_id=autor_id).count() == 0
+    assert Comentario.query.filter_by(usuario_id=autor_id).count() == 0
+
+
+@pytest.mark.parametrize("metodo", ["put", "delete"])
+def test_comentario_de_un_post_borrado_da_404(app, client, blog, admin, metodo):
+    app.config["SOFT_DELETE"] = True
+    (post,) = blog(posts=1, comentarios=1)
+    comentario_id = post.comentarios[0].id
+    assert client.delete(f"/api/posts/{post.id}", headers=admin).status_code == 200
+
+    response = getattr(client, metodo)(f"/api/comments/{comentario_id}", json={"texto": "editado"}, headers=admin)
+    assert response.status_code == 404
+    assert db.session.get(Comentario, comentario_id).texto == "c0"
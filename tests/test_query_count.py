@@ -0,0 +1,41 @@
+"""La cantidad de SQL por request no crece con las filas de la respuesta (sin N+1)."""
+import pytest
+
+N = 15
+
+
+def contar(client, statements, url):
+    statements.clear()
+    response = client.get(url)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return len(statements)
+
+
+@pytest.mark.parametrize("url", [
+    "/api/posts",
+    "/api/posts?include=comments,autor,categorias",
+    "/api/posts?fields=id,titulo,autor",
+    "/api/posts?sort=most_discussed",
+])
+def test_listado_de_posts(client, blog, statements, url):
+    blog(posts=1, comentarios=1)
+    uno = contar(client, statements, url)
+    blog(posts=N, comentarios=N)
+    assert len(client.get(url).get_json()["items"]) == N + 1
+    assert contar(client, statements, url) == uno
+
+
+@pytest.mark.parametrize("sufijo", ["", "?include=comments,autor"])
+def test_detalle_de_post(client, blog, statements, sufijo):
+    (chico,) = blog(posts=1, comentarios=1)
+    (grande,) = blog(posts=1, comentarios=N)
+    assert contar(client, statements, f"/api/posts/{chico.id}{sufijo}") == \
+        contar(client, statements, f"/api/posts/{grande.id}{sufijo}")
+
+
+def test_comentarios_de_un_post(client, blog, statements):
+    (chico,) = blog(posts=1, comentarios=1)
+    (grande,) = blog(posts=1, comentarios=N)
+    uno = contar(client, statements, f"/api/posts/{chico.id}/comments")
+    assert len(client.get(f"/api/posts/{grande.id}/comments").get_json()["items"]) == N
+    assert contar(client, statements, f"/api/posts/{grande.id}/comments") == uno
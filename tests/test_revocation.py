@@ -0,0 +1,58 @@
+"""Revocación de tokens al cambiar el rol o desactivar un usuario."""
+import time
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from models import db, Usuario
+from revocation import revocations
+
+
+@pytest.fixture
+def usuario(app):
+    user = Usuario(username="valen", email="valen@mail.com", role="user")
+    db.session.add(user)
+    db.session.commit()
+    yield user
+    # las marcas viven en el proceso, no en la base de cada test
+    revocations._epochs.clear()
+
+
+def token(user):
+    access = create_access_token(identity=str(user.id), additional_claims={"role": user.role})
+    return {"Authorization": f"Bearer {access}"}
+
+
+def siguiente_segundo():
+    # iat va en segundos: un token del mismo segundo que la revocación se considera revocado
+    time.sleep(1.01 - time.time() % 1)
+
+
+def test_cambiar_el_rol_revoca_el_token_viejo(client, admin, usuario):
+    viejo = token(usuario)
+    assert client.get(f"/api/users/{usuario.id}", headers=viejo).status_code == 200
+
+    response = client.patch(f"/api/users/{usuario.id}/role", json={"role": "moderator"}, headers=admin)
+    assert response.status_code == 200, response.get_data(as_text=True)
+
+    response = client.get(f"/api/users/{usuario.id}", headers=viejo)
+    assert response.status_code == 401
+    assert response.get_json() == {"error": "token revocado"}
+
+    siguiente_segundo()
+    assert client.get(f"/api/users/{usuario.id}", headers=token(usuario)).status_code == 200
+
+
+def test_desactivar_revoca_el_token(client, admin, usuario):
+    viejo = token(usuario)
+    assert client.patch(f"/api/users/{usuario.id}/deactivate", headers=admin).status_code == 200
+    response = client.get(f"/api/users/{usuario.id}", headers=viejo)
+    assert response.status_code == 401
+    assert response.get_json() == {"error": "token revocado"}
+
+
+def test_sin_commit_no_se_revoca(client, usuario):
+    headers = token(usuario)
+    revocations.revoke_user(usuario.id)
+    db.session.rollback()
+    assert client.get(f"/api/users/{usuario.id}", headers=headers).status_code == 200
@@ -0,0 +1,29 @@
+"""Búsqueda full-text (FTS5 en SQLite)."""
+from sqlalchemy import text
+
+import search
+from models import db
+
+
+def test_busca_posts_indexados(client, blog, admin):
+    blog(posts=2)
+    response = client.post("/api/posts", headers=admin, json={"titulo": "Flask y SQLite", "contenido": "búsqueda"})
+    assert response.status_code == 201, response.get_data(as_text=True)
+    items = client.get("/api/posts/search?q=flask").get_json()["items"]
+    assert [p["titulo"] for p in items] == ["Flask y SQLite"]
+
+
+def test_sin_indice_la_busqueda_no_lo_crea(client, blog, admin):
+    db.session.execute(text(f"DROP TABLE {search.FTS_TABLE}"))
+    db.session.commit()
+    search._con_indice.clear()
+    blog(posts=2)
+    assert client.post("/api/posts", headers=admin, json={"titulo": "Flask", "contenido": "x"}).status_code == 201
+
+    response = client.get("/api/posts/search?q=flask")
+    assert response.status_code == 503
+    assert "reindex-search" in response.get_json()["error"]
+    assert not search.has_index()
+
+    search.reindex()
+    assert len(client.get("/api/posts/search?q=flask").get_json()["items"]) == 1
@@ -0,0 +1,111 @@
+"""Los dumpers compilados devuelven lo mismo que marshmallow."""
+from datetime import datetime
+
+import pytest
+
+from models import Usuario, Post, Comentario, Categoria
+from schemas import PostSchema, ComentarioSchema, UsuarioSchema, CategoriaSchema
+from serialization import compile_dumper
+from views import (
+    dump_post, dump_comentario, dump_usuario, dump_categoria,
+    post_dump, comentario_dump, POST_FIELDS, COMENTARIO_FIELDS, USUARIO_FIELDS,
+)
+
+FECHA = datetime(2025, 3, 4, 5, 6, 7, 890123)
+
+
+def autor(**kwargs):
+    return Usuario(**{"id": 7, "username": "valen", "email": "valen@mail.com", "role": "user",
+                      "is_active": True, "created_at": FECHA, **kwargs})
+
+
+def post(**kwargs):
+    return Post(**{
+        "id": 1, "titulo": "Hola", "contenido": "Contenido", "fecha_creacion": FECHA, "updated_at": FECHA,
+        "is_published": True, "comment_count": 2, "last_comment_at": FECHA, "usuario_id": 7,
+        "usuario": autor(), "categorias": [Categoria(id=1, nombre="Python"), Categoria(id=2, nombre="Flask")],
+        **kwargs,
+    })
+
+
+def comentario(**kwargs):
+    return Comentario(**{"id": 3, "texto": "Buen post", "fecha_creacion": FECHA, "is_visible": True,
+                         "usuario_id": 7, "post_id": 1, "usuario": autor(), **kwargs})
+
+
+POSTS = [post(), post(updated_at=None, last_comment_at=None, comment_count=0, categorias=[]), post(usuario=None)]
+COMENTARIOS = [comentario(), comentario(fecha_creacion=None, is_visible=False)]
+USUARIOS = [autor(), autor(created_at=None, is_active=False, role="admin")]
+
+
+@pytest.mark.parametrize("dump, schema, objetos", [
+    (dump_post, PostSchema, POSTS),
+    (dump_comentario, ComentarioSchema, COMENTARIOS),
+    (dump_usuario, UsuarioSchema, USUARIOS),
+    (dump_categoria, CategoriaSchema, [Categoria(id=1, nombre="Python")]),
+])
+def test_dumper_igual_a_marshmallow(dump, schema, objetos):
+    for obj in objetos:
+        assert dump(obj) == schema().dump(obj)
+
+
+def test_salida_de_un_post():
+    assert dump_post(POSTS[1]) == {
+        "id": 1, "titulo": "Hola", "contenido": "Contenido", "fecha_creacion": "2025-03-04T05:06:07.890123",
+        "updated_at": None, "is_published": True, "comment_count": 0, "last_comment_at": None, "usuario_id": 7,
+    }
+
+
+@pytest.mark.parametrize("obj", POSTS)
+def test_post_dump_con_autor_y_categorias(obj):
+    esperado = PostSchema().dump(obj)
+    esperado["categorias_detalle"] = CategoriaSchema(many=True).dump(obj.categorias)
+    if obj.usuario is not None:
+        esperado.update(autor=obj.usuario.username, email=obj.usuario.email)
+    assert post_dump(obj) == esperado
+
+
+@pytest.mark.parametrize("obj", COMENTARIOS)
+def test_comentario_dump_con_usuario(obj):
+    esperado = ComentarioSchema().dump(obj)
+    esperado["usuario"] = UsuarioSchema(only=("id", "username", "email")).dump(obj.usuario)
+    assert comentario_dump(obj) == esperado
+
+
+@pytest.mark.parametrize("fieldset, schema, objetos, subconjuntos", [
+    (POST_FIELDS, PostSchema, POSTS,
+     [("id",), ("titulo", "updated_at"), ("last_comment_at", "comment_count"), tuple(sorted(POST_FIELDS.columns))]),
+    (COMENTARIO_FIELDS, ComentarioSchema, COMENTARIOS, [("id", "texto"), ("fecha_creacion", "is_visible")]),
+    (USUARIO_FIELDS, UsuarioSchema, USUARIOS, [("username",), ("created_at", "is_active", "role")]),
+])
+def test_fieldset_igual_a_schema_only(fieldset, schema, objetos, subconjuntos):
+    for campos in subconjuntos:
+        dump = fieldset.dumper(fieldset.parse(",".join(campos)))
+        for obj in objetos:
+            assert dump(obj) == schema(only=campos).dump(obj)
+
+
+def test_fields_con_campos_de_la_vista():
+    obj = POSTS[0]
+    campos = POST_FIELDS.parse("id,autor,categorias_detalle")
+    assert post_dump(obj, campos) == {
+        "id": 1, "autor": "valen", "categorias_detalle": [{"id": 1, "nombre": "Python"}, {"id": 2, "nombre": "Flask"}],
+    }
+    assert post_dump(obj, POST_FIELDS.parse("email")) == {"email": "valen@mail.com"}
+    assert comentario_dump(COMENTARIOS[0], COMENTARIO_FIELDS.parse("id,usuario")) == {
+        "id": 3, "usuario": {"id": 7, "username": "valen", "email": "valen@mail.com"},
+    }
+
+
+def test_fields_desde_la_api(client, blog):
+    blog(posts=3, comentarios=2)
+    completos = {p["id"]: p for p in client.get("/api/posts").get_json()["items"]}
+    parciales = client.get("/api/posts?fields=id,titulo,fecha_creacion,autor").get_json()["items"]
+    assert parciales and all(
+        p == {k: completos[p["id"]][k] for k in ("id", "titulo", "fecha_creacion", "autor")} for p in parciales
+    )
+
+
+def test_only_en_compile_dumper():
+    dump = compile_dumper(PostSchema, Post, only=("id", "last_comment_at"))
+    assert dump(POSTS[1]) == {"id": 1, "last_comment_at": None}
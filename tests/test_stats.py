@@ -0,0 +1,21 @@
+"""StatsAPI desde los contadores."""
+from datetime import datetime, timedelta
+
+from models import db, Post
+
+
+def test_posts_last_week_es_una_ventana_de_7x24_horas(client, blog, admin):
+    (post,) = blog(posts=1)
+    ahora = datetime.utcnow()
+    # hace 7 días y 5 minutos cae (casi siempre) en el mismo día calendario que el
+    # borde de la ventana: con días completos contaría, con 7×24 horas no
+    hace = [timedelta(days=8), timedelta(days=7, minutes=5), timedelta(days=7, minutes=-5),
+            timedelta(days=6, hours=12), timedelta(days=1), timedelta(0)]
+    db.session.add_all(
+        Post(titulo=f"p{i}", contenido="c", usuario_id=post.usuario_id, fecha_creacion=ahora - delta)
+        for i, delta in enumerate(hace)
+    )
+    db.session.commit()
+    data = client.get("/api/stats", headers=admin).get_json()
+    assert data["posts_last_week"] == 4
+    assert data["total_posts"] == 7
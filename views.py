@@ -1,14 +1,31 @@
-from flask import request, jsonify
+from flask import current_app, request, jsonify, Response, stream_with_context
 from flask.views import MethodView
 from flask_jwt_extended import (
     jwt_required, create_access_token, get_jwt, get_jwt_identity
 )
 from marshmallow import ValidationError
-from passlib.hash import bcrypt
-from datetime import datetime
+from sqlalchemy import and_, exists, func, or_, select, union
+from sqlalchemy.orm import joinedload, lazyload, selectinload, with_expression
+from sqlalchemy.exc import SQLAlchemyError
+from datetime import datetime, timedelta
 from functools import wraps
-
-from models import db, Usuario, Credenciales, Post, Comentario, Categoria
+import base64
+import binascii
+import itertools
+import json
+
+from cache import cached, conditional, response_cache
+import counters
+import comment_counts
+import search
+import purge
+from hashing import password_hasher, PoolSaturado
+from revocation import revocations
+from replicas import replicas
+from metrics import metrics
+from querylog import allow_repeated_queries
+from serialization import compile_dumper, Fieldset
+from models import db, Usuario, Credenciales, Post, Comentario, Categoria, StatsCounter, post_categoria
 from schemas import (
     UsuarioSchema, RegisterSchema, LoginSchema, PostSchema,
     ComentarioSchema, CategoriaSchema, RoleUpdateSchema
@@ -52,23 +69,553 @@ def check_ownership(resource_owner_id):
         return False
 
 
+def post_or_404(id, *options):
+    """El post, si existe y no está borrado (ver purge.py)."""
+    return Post.query.options(*options).filter(Post.id == id, Post.deleted_at.is_(None)).first_or_404()
+
+
+def comentario_or_404(id):
+    """El comentario, si su post no está borrado."""
+    return (
+        Comentario.query.join(Post, Comentario.post_id == Post.id)
+        .filter(Comentario.id == id, Post.deleted_at.is_(None))
+        .first_or_404()
+    )
+
+
+def user_or_404(id):
+    return Usuario.query.filter(Usuario.id == id, Usuario.deleted_at.is_(None)).first_or_404()
+
+
+# --- PAGINACIÓN ---
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(*values):
+    values = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(values).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        values = json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, ValueError):
+        raise ValueError("cursor inválido")
+    if not isinstance(values, list):
+        raise ValueError("cursor inválido")
+    return values
+
+
+def page_limit():
+    limit = request.args.get("limit", DEFAULT_PAGE_SIZE, type=int)
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def keyset(query, sort_col, id_col, cursor, limit, descending=False):
+    """Filtra y ordena `query` (Query o select()) por (sort_col, id) a partir del
+    cursor y pide una fila de más para saber si hay página siguiente. Lo usa
+    también asgi.py. `sort_col` es una fecha (fecha_creacion) o un entero
+    (comment_count)."""
+    if cursor:
+        try:
+            value, last_id = decode_cursor(cursor)
+            if isinstance(sort_col.type, db.DateTime):
+                value = datetime.fromisoformat(value)
+            else:
+                value = int(value)
+            last_id = int(last_id)
+        except (TypeError, ValueError):
+            raise ValueError("cursor inválido")
+        if descending:
+            query = query.filter(or_(sort_col < value, and_(sort_col == value, id_col < last_id)))
+        else:
+            query = query.filter(or_(sort_col > value, and_(sort_col == value, id_col > last_id)))
+
+    if descending:
+        query = query.order_by(sort_col.desc(), id_col.desc())
+    else:
+        query = query.order_by(sort_col.asc(), id_col.asc())
+    return query.limit(limit + 1)
+
+
+def split_page(rows, limit, sort_attr="fecha_creacion"):
+    """(filas de la página, next_cursor) a partir de las limit + 1 filas leídas."""
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, sort_attr), last.id)
+    return rows, next_cursor
+
+
+def paginate(query, sort_col, id_col, descending=False):
+    """Paginación keyset (?limit=&cursor=) ordenada por (sort_col, id), en general
+    (fecha_creacion, id).
+
+    El costo de cada página no depende de su posición: se filtra a partir de la
+    última fila vista en lugar de usar OFFSET. Devuelve (filas, next_cursor).
+    """
+    limit = page_limit()
+    rows = keyset(query, sort_col, id_col, request.args.get("cursor"), limit, descending).all()
+    return split_page(rows, limit, sort_col.key)
+
+
+# ?sort= del listado de posts -> columna del keyset (siempre descendente)
+POST_SORTS = {
+    "recent": Post.fecha_creacion,
+    "most_discussed": Post.comment_count,
+}
+
+
+def post_sort(value):
+    """Columna de orden para ?sort= (por defecto "recent")."""
+    if not value:
+        return POST_SORTS["recent"]
+    if value not in POST_SORTS:
+        raise ValueError(f"sort debe ser uno de: {', '.join(POST_SORTS)}")
+    return POST_SORTS[value]
+
+
+def parse_ids(value, nombre):
+    """Ids de un parámetro "1,2,3" (sin repetidos, como mucho MAX_PAGE_SIZE)."""
+    try:
+        ids = {int(v) for v in value.split(",") if v.strip()}
+    except ValueError:
+        raise ValueError(f"{nombre} debe ser una lista de ids separados por coma")
+    if not ids or len(ids) > MAX_PAGE_SIZE:
+        raise ValueError(f"{nombre} debe tener entre 1 y {MAX_PAGE_SIZE} ids")
+    return sorted(ids)
+
+
+def en_categorias(ids):
+    """Condición "el post tiene alguna de estas categorías" como semijoin (EXISTS)
+    sobre la PK (post_id, categoria_id) de post_categoria: el listado recorre los
+    posts en el orden del keyset y corta al llenar la página, sin cargar
+    Categoria.posts ni duplicar posts con varias categorías."""
+    return exists().where(post_categoria.c.post_id == Post.id, post_categoria.c.categoria_id.in_(ids))
+
+
+def paginated_response(items, next_cursor, included=None):
+    # Modo compatibilidad: ?format=array devuelve la lista sola como antes y
+    # el cursor siguiente viaja en el header X-Next-Cursor
+    if request.args.get("format") == "array":
+        response = jsonify(items)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return response, 200
+    body = {"items": items, "next_cursor": next_cursor}
+    if included is not None:
+        body["included"] = included
+    return jsonify(body), 200
+
+
+# ?include= de los posts (documento compuesto, ver compound())
+INCLUDES = ("comments", "autor", "categorias")
+# comentarios incluidos por post; el resto se pide a /comments con comentarios_next_cursor
+INCLUDE_COMMENTS_PER_POST = DEFAULT_PAGE_SIZE
+
+
+def parse_include(value):
+    """Conjunto de relaciones de un parámetro "comments,autor"."""
+    if not value:
+        return set()
+    pedidas = {v.strip() for v in value.split(",") if v.strip()}
+    if pedidas - set(INCLUDES):
+        raise ValueError(f"include debe ser una lista de: {', '.join(INCLUDES)}")
+    return pedidas
+
+
+# --- GET CONDICIONAL ---
+# Cada probe resume la versión de un recurso con contadores mantenidos o
+# COUNT/MAX sobre columnas indexadas; con eso se arma el ETag sin cargar ni
+# serializar filas. @conditional sólo lo llama si el cliente mandó validadores o
+# si la respuesta no sale del cache.
+def _latest(*timestamps):
+    timestamps = [t for t in timestamps if t is not None]
+    return max(timestamps) if timestamps else None
+
+
+def categorias_probe():
+    total, updated = db.session.query(func.count(Categoria.id), func.max(Categoria.updated_at)).one()
+    return (total, updated), updated
+
+
+# resumen de un conjunto acotado de posts (?ids=); comment_count y
+# last_comment_at no tocan updated_at (ver comment_counts.py)
+POSTS_PROBE_COLUMNS = (
+    func.count(Post.id), func.max(Post.fecha_creacion), func.max(Post.updated_at),
+    func.sum(Post.comment_count), func.max(Post.last_comment_at),
+)
+
+
+def _contador(nombre):
+    return select(StatsCounter.valor).where(StatsCounter.nombre == nombre).scalar_subquery()
+
+
+def _maximo(columna):
+    # un MAX por subconsulta: así cada uno sale del extremo de su índice
+    return select(func.max(columna)).scalar_subquery()
+
+
+# Versión de toda la tabla sin recorrerla: altas y bajas de posts y comentarios
+# por los contadores de counters.py, y posts nuevos o editados, comentarios
+# nuevos y comentarios ocultados o editados por el MAX de columnas indexadas.
+# Incluye posts no publicados: a lo sumo cambia el ETag sin que cambie la página.
+POSTS_VERSION = select(
+    _contador("posts"), _contador("comments"),
+    _maximo(Post.fecha_creacion), _maximo(Post.updated_at), _maximo(Post.last_comment_at),
+    _maximo(Comentario.updated_at),
+)
+
+
+def posts_probe():
+    posts, comentarios, created, updated, commented, comentario_updated = db.session.execute(POSTS_VERSION).one()
+    categorias, categorias_modified = categorias_probe()
+    return (
+        (posts, comentarios, created, updated, commented, comentario_updated) + categorias,
+        _latest(created, updated, commented, comentario_updated, categorias_modified),
+    )
+
+
+def post_probe(id):
+    row = db.session.query(
+        Post.fecha_creacion, Post.updated_at, Post.comment_count, Post.last_comment_at
+    ).filter(Post.id == id, Post.deleted_at.is_(None)).first()
+    if row is None:
+        return None
+    categorias_updated = db.session.query(func.max(Categoria.updated_at)).join(
+        post_categoria, post_categoria.c.categoria_id == Categoria.id
+    ).filter(post_categoria.c.post_id == id).scalar()
+    modified = _latest(row.fecha_creacion, row.updated_at, row.last_comment_at, categorias_updated)
+    return (tuple(row), categorias_updated), modified
+
+
+def posts_list_probe():
+    """posts_probe, o con ?ids= el resumen de esos posts (y de sus comentarios si
+    se incluyen) en lugar del de toda la tabla."""
+    try:
+        includes = parse_include(request.args.get("include"))
+        ids = parse_ids(request.args["ids"], "ids") if request.args.get("ids") else None
+    except ValueError:
+        return None
+    if ids is None:
+        # los comentarios de una página cualquiera no tienen un resumen barato:
+        # sin ETag (el cache de respuestas sí aplica)
+        return None if "comments" in includes else posts_probe()
+    total, created, updated, comentarios, commented = db.session.query(*POSTS_PROBE_COLUMNS).filter(
+        Post.id.in_(ids), Post.is_published.is_(True)
+    ).one()
+    categorias, categorias_modified = categorias_probe()
+    parts = (total, created, updated, comentarios, commented) + categorias
+    modified = [created, updated, commented, categorias_modified]
+    if "comments" in includes:
+        comentarios = db.session.query(
+            func.count(Comentario.id), func.max(Comentario.fecha_creacion), func.max(Comentario.updated_at)
+        ).filter(Comentario.post_id.in_(ids), Comentario.is_visible.is_(True)).one()
+        parts += tuple(comentarios)
+        modified += comentarios[1:]
+    return parts, _latest(*modified)
+
+
+def post_include_probe(id):
+    """post_probe, más comentarios_probe si se pide ?include=comments."""
+    validators = post_probe(id)
+    try:
+        includes = parse_include(request.args.get("include"))
+    except ValueError:
+        return None
+    if validators is None or "comments" not in includes:
+        return validators
+    comentarios = comentarios_probe(id)
+    if comentarios is None:
+        return None
+    return (validators[0], comentarios[0]), _latest(validators[1], comentarios[1])
+
+
+def comentarios_probe(post_id):
+    if db.session.query(Post.id).filter(Post.id == post_id, Post.deleted_at.is_(None)).first() is None:
+        return None
+    total, created, updated = db.session.query(
+        func.count(Comentario.id), func.max(Comentario.fecha_creacion), func.max(Comentario.updated_at)
+    ).filter(Comentario.post_id == post_id, Comentario.is_visible.is_(True)).one()
+    return (total, created, updated), _latest(created, updated)
+
+
+# --- SERIALIZACIÓN ---
+# Los schemas se compilan una vez a funciones fila -> dict (ver serialization.py)
+dump_post = compile_dumper(PostSchema, Post)
+dump_comentario = compile_dumper(ComentarioSchema, Comentario)
+dump_usuario = compile_dumper(UsuarioSchema, Usuario)
+dump_categoria = compile_dumper(CategoriaSchema, Categoria)
+
+
+# ?fields= de los listados: lo no pedido no se lee de la base (ver serialization.Fieldset)
+EXTRACTO_LEN = 200
+POST_FIELDS = Fieldset(
+    PostSchema, Post,
+    extras=("categorias_detalle", "autor", "email", "extracto"),
+    presets={"summary": ("id", "titulo", "fecha_creacion", "autor", "comment_count", "extracto")},
+)
+COMENTARIO_FIELDS = Fieldset(ComentarioSchema, Comentario, extras=("usuario",))
+USUARIO_FIELDS = Fieldset(UsuarioSchema, Usuario)
+
+
+def post_load_options(campos, sort_col=None, includes=()):
+    """Opciones de carga de Post para los campos pedidos: columnas con load_only,
+    autor y categorías sólo si se devuelven (o se incluyen) y el extracto
+    recortado en el SELECT, sin traer `contenido` entero."""
+    if campos is None:
+        return []
+    options = [POST_FIELDS.load_only(campos, *([sort_col.key] if sort_col is not None else []))]
+    if campos & {"autor", "email"} or "autor" in includes:
+        options.append(joinedload(Post.usuario).load_only(Usuario.username, Usuario.email))
+    else:
+        options.append(lazyload(Post.usuario))
+    if "categorias_detalle" not in campos and "categorias" not in includes:
+        options.append(lazyload(Post.categorias))
+    if "extracto" in campos:
+        # un carácter de más para saber si hay que cortar
+        options.append(with_expression(Post.extracto, func.substr(Post.contenido, 1, EXTRACTO_LEN + 1)))
+    return options
+
+
+def extracto(texto):
+    if texto is None or len(texto) <= EXTRACTO_LEN:
+        return texto
+    return texto[:EXTRACTO_LEN].rstrip() + "…"
+
+
+def post_dump(post, campos=None):
+    if campos is not None:
+        dumped = POST_FIELDS.dumper(campos)(post)
+    else:
+        dumped = dump_post(post)
+    if campos is None or "categorias_detalle" in campos:
+        dumped["categorias_detalle"] = [
+            {"id": c.id, "nombre": c.nombre} for c in post.categorias
+        ]
+    # 🔹 Agregamos autor y email (post.usuario ya viene cargado con JOIN)
+    if (campos is None or campos & {"autor", "email"}) and post.usuario:
+        if campos is None or "autor" in campos:
+            dumped["autor"] = post.usuario.username
+        if campos is None or "email" in campos:
+            dumped["email"] = post.usuario.email
+    if campos is not None and "extracto" in campos:
+        dumped["extracto"] = extracto(post.extracto)
+    return dumped
+
+
+def autor_dump(usuario):
+    return {
+        "id": usuario.id,
+        "username": usuario.username,
+        "email": usuario.email,
+    }
+
+
+def comentario_dump(comentario, campos=None):
+    if campos is not None:
+        d = COMENTARIO_FIELDS.dumper(campos)(comentario)
+        if "usuario" not in campos:
+            return d
+    else:
+        d = dump_comentario(comentario)
+    autor = comentario.usuario
+    if autor:
+        d["usuario"] = autor_dump(autor)
+    return d
+
+
+def comentario_load_options(campos):
+    if campos is None:
+        return []
+    # fecha_creacion arma el cursor
+    options = [COMENTARIO_FIELDS.load_only(campos, "fecha_creacion")]
+    if "usuario" in campos:
+        options.append(joinedload(Comentario.usuario).load_only(Usuario.username, Usuario.email))
+    else:
+        options.append(lazyload(Comentario.usuario))
+    return options
+
+
+def primeros_comentarios(post_ids, limit):
+    """Los primeros `limit` + 1 comentarios visibles de cada post, en el orden de
+    /comments, con una sola consulta: ROW_NUMBER() por post recorre el índice
+    (post_id, is_visible, fecha_creacion, id). El + 1 dice si hay más."""
+    orden = func.row_number().over(
+        partition_by=Comentario.post_id, order_by=(Comentario.fecha_creacion, Comentario.id)
+    ).label("orden")
+    numerados = db.session.query(Comentario.id, orden).filter(
+        Comentario.post_id.in_(post_ids), Comentario.is_visible.is_(True)
+    ).subquery()
+    return (
+        Comentario.query.join(numerados, numerados.c.id == Comentario.id)
+        .filter(numerados.c.orden <= limit + 1)
+        .order_by(Comentario.post_id, Comentario.fecha_creacion, Comentario.id)
+        .all()
+    )
+
+
+def compound(posts, includes, campos=None):
+    """(dumps de `posts`, dict "included") para ?include=.
+
+    La cantidad de consultas no depende de cuántos posts o comentarios haya:
+    autor y categorías ya vienen con los posts (JOIN y selectin) y los
+    comentarios de todos los posts salen de primeros_comentarios(). Autores y
+    categorías se devuelven una sola vez aunque se repitan entre posts.
+    """
+    items = [post_dump(p, campos) for p in posts]
+    included = {}
+    if "autor" in includes:
+        autores = {p.usuario.id: p.usuario for p in posts if p.usuario}
+        included["autores"] = [autor_dump(u) for u in autores.values()]
+    if "categorias" in includes:
+        categorias = {c.id: c for p in posts for c in p.categorias}
+        included["categorias"] = [dump_categoria(categorias[i]) for i in sorted(categorias)]
+    if "comments" in includes:
+        por_post = {}
+        if posts:
+            for c in primeros_comentarios([p.id for p in posts], INCLUDE_COMMENTS_PER_POST):
+                por_post.setdefault(c.post_id, []).append(c)
+        included["comentarios"] = []
+        # por post.id: con ?fields= el item puede no tener "id"
+        for post, item in zip(posts, items):
+            comentarios, item["comentarios_next_cursor"] = split_page(
+                por_post.get(post.id, []), INCLUDE_COMMENTS_PER_POST
+            )
+            included["comentarios"].extend(comentario_dump(c) for c in comentarios)
+    return items, included
+
+
+# --- CARGA MASIVA ---
+DEFAULT_BULK_CHUNK_SIZE = 1000
+MAX_BULK_CHUNK_SIZE = 10000
+_JSON_INVALIDO = object()
+
+
+def bulk_chunk_size():
+    default = current_app.config.get("BULK_CHUNK_SIZE", DEFAULT_BULK_CHUNK_SIZE)
+    size = request.args.get("chunk_size", default, type=int)
+    return max(1, min(size, MAX_BULK_CHUNK_SIZE))
+
+
+def iter_bulk_items():
+    """Items de un POST masivo: un array JSON o NDJSON (un objeto por línea).
+
+    El NDJSON se lee del stream línea por línea, sin cargar el cuerpo entero.
+    """
+    if request.mimetype in ("application/x-ndjson", "application/jsonl"):
+        for line in request.stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield _JSON_INVALIDO
+        return
+    data = request.get_json(silent=True)
+    if not isinstance(data, list):
+        raise ValueError("se esperaba un array JSON o NDJSON")
+    yield from data
+
+
+def bulk_load(chunk, schema):
+    """Valida un chunk de (index, item). Devuelve (válidos, errores)."""
+    validos, errores = [], []
+    for index, item in chunk:
+        if item is _JSON_INVALIDO or not isinstance(item, dict):
+            errores.append({"index": index, "status": 400, "error": "item inválido"})
+            continue
+        try:
+            validos.append((index, schema.load(item)))
+        except ValidationError as err:
+            errores.append({"index": index, "status": 400, "error": err.messages})
+    return validos, errores
+
+
+def insert_rows(table, rows):
+    """INSERT por lotes (executemany) que devuelve los ids en el orden de `rows`.
+
+    Va por Core, sin armar objetos del ORM. Donde el driver no tiene RETURNING
+    por lotes (MySQL) se inserta fila por fila para conocer cada id.
+    """
+    dialect = db.session.get_bind().dialect
+    if dialect.insert_executemany_returning_sort_by_parameter_order:
+        stmt = table.insert().returning(table.c.id, sort_by_parameter_order=True)
+        return list(db.session.execute(stmt, rows).scalars())
+    return [db.session.execute(table.insert(), [row]).inserted_primary_key[0] for row in rows]
+
+
+def bulk_insert(items, schema, save):
+    """Inserta en chunks de ?chunk_size= y devuelve los resultados por item.
+
+    Cada chunk se valida entero, `save(validos)` lo inserta por lotes y devuelve
+    los ids, y se commitea por separado para no tener transacciones enormes.
+    """
+    results = []
+    size = bulk_chunk_size()
+    for chunk in iter(lambda: list(itertools.islice(items, size)), []):
+        validos, errores = bulk_load(chunk, schema)
+        results.extend(errores)
+        if not validos:
+            continue
+        try:
+            ids = save(validos)
+            db.session.commit()
+        except SQLAlchemyError:
+            db.session.rollback()
+            results.extend({"index": i, "status": 500, "error": "error al guardar"} for i, _ in validos)
+            continue
+        results.extend({"index": i, "status": 201, "id": id} for (i, _), id in zip(validos, ids))
+    results.sort(key=lambda r: r["index"])
+    created = sum(1 for r in results if r["status"] == 201)
+    return {"created": created, "failed": len(results) - created, "results": results}
+
+
+def servicio_ocupado():
+    # el pool de hashing está lleno: mejor que el cliente reintente a que espere en cola
+    return {"error": "Servicio ocupado, reintentar en unos segundos"}, 503, {"Retry-After": "1"}
+
+
 # --- USERS ---
 class UserAPI(MethodView):
     @roles_required("admin")
     def get(self):
-        users = Usuario.query.all()
-        return UsuarioSchema(many=True).dump(users), 200
+        try:
+            campos = USUARIO_FIELDS.parse(request.args.get("fields"))
+        except ValueError as err:
+            return {"error": str(err)}, 400
+        query = Usuario.query.filter(Usuario.deleted_at.is_(None))
+        if campos is None:
+            return [dump_usuario(u) for u in query.all()], 200
+        dump = USUARIO_FIELDS.dumper(campos)
+        users = query.options(USUARIO_FIELDS.load_only(campos)).all()
+        return [dump(u) for u in users], 200
 
 
 class UserDetailAPI(MethodView):
     @jwt_required()
     def get(self, id):
-        user = Usuario.query.get_or_404(id)
+        user = user_or_404(id)
         claims = get_jwt()
         if claims.get("role") == "admin" or int(get_jwt_identity()) == user.id:
             return UsuarioSchema().dump(user), 200
         return {"error": "acceso denegado"}, 403
 
+    @roles_required("admin")
+    @allow_repeated_queries
+    def delete(self, id):
+        user = user_or_404(id)
+        # antes del commit: después habría que volver a leer la fila
+        username = user.username
+        # sus posts y comentarios se borran por conjuntos, ahora o en el purgador
+        purge.delete_user(user)
+        return {"message": f"Usuario {username} eliminado"}, 200
+
 class UserRegisterAPI(MethodView):
     def post(self):
         try:
@@ -84,11 +631,16 @@ class UserRegisterAPI(MethodView):
         # Obtener role del request (default 'user')
         role = data.get("role", "user")
 
+        # el hash se calcula antes de abrir la transacción de escritura
+        try:
+            password_hash = password_hasher.hash(data["password"])
+        except PoolSaturado:
+            return servicio_ocupado()
+
         new_user = Usuario(username=data["username"], email=data["email"], role=role)
         db.session.add(new_user)
         db.session.flush()  # para obtener id
 
-        password_hash = bcrypt.hash(data["password"])
         cred = Credenciales(usuario_id=new_user.id, password_hash=password_hash)
         db.session.add(cred)
         db.session.commit()
@@ -105,12 +657,24 @@ class AuthLoginAPI(MethodView):
         if not user or not getattr(user, "credential", None):
             return {"error": "Credenciales inválidas"}, 401
 
-        if not bcrypt.verify(data["password"], user.credential.password_hash):
-            return {"error": "Credenciales inválidas"}, 401
+        try:
+            if not password_hasher.verify(data["password"], user.credential.password_hash):
+                return {"error": "Credenciales inválidas"}, 401
+        except PoolSaturado:
+            return servicio_ocupado()
 
         if not user.is_active:
             return {"error": "Usuario desactivado"}, 403
 
+        # Si el hash tiene un costo distinto al configurado se regenera ahora que
+        # tenemos la contraseña en claro. Si el pool está lleno se deja para otro login.
+        if password_hasher.needs_rehash(user.credential.password_hash):
+            try:
+                user.credential.password_hash = password_hasher.hash(data["password"])
+                db.session.commit()
+            except PoolSaturado:
+                pass
+
         # Identity must be a string to satisfy PyJWT subject validation
         identity = str(user.id)
         additional_claims = {"role": user.role, "email": user.email, "username": user.username}
@@ -121,12 +685,14 @@ class AuthLoginAPI(MethodView):
 class UserRoleUpdateAPI(MethodView):
     @roles_required("admin")
     def patch(self, id):
-        user = Usuario.query.get_or_404(id)
+        user = user_or_404(id)
         try:
             data = RoleUpdateSchema().load(request.json)
         except ValidationError as err:
             return {"error": err.messages}, 400
         user.role = data["role"]
+        # el rol viaja en el JWT: los tokens viejos dejan de valer
+        revocations.revoke_user(user.id)
         db.session.commit()
         return {"message": f"Rol del usuario actualizado a {data['role']}"}, 200
 
@@ -134,29 +700,39 @@ class UserRoleUpdateAPI(MethodView):
 class UserDeactivateAPI(MethodView):
     @roles_required("admin")
     def patch(self, id):
-        user = Usuario.query.get_or_404(id)
+        user = user_or_404(id)
         user.is_active = False
+        revocations.revoke_user(user.id)
         db.session.commit()
         return {"message": f"Usuario {user.username} desactivado"}, 200
 
 
 # --- POSTS ---
 class PostAPI(MethodView):
+    @conditional(posts_list_probe)
+    @cached("posts")
     def get(self):
-        posts = Post.query.filter_by(is_published=True).all()
-        result = []
-        for p in posts:
-            dumped = PostSchema().dump(p)
-            dumped["categorias_detalle"] = [
-                {"id": c.id, "nombre": c.nombre} for c in p.categorias
-            ]
-            # 🔹 Agregamos autor y email
-            autor = Usuario.query.get(p.usuario_id)
-            if autor:
-                dumped["autor"] = autor.username
-                dumped["email"] = autor.email
-            result.append(dumped)
-        return jsonify(result), 200
+        query = Post.query.filter_by(is_published=True)
+        try:
+            includes = parse_include(request.args.get("include"))
+            if includes and request.args.get("format") == "array":
+                raise ValueError("include no se puede usar con format=array")
+            campos = POST_FIELDS.parse(request.args.get("fields"))
+            if request.args.get("ids"):
+                # multi-get: los posts publicados de la lista, en orden de id y sin paginar
+                ids = parse_ids(request.args["ids"], "ids")
+                query = query.options(*post_load_options(campos, includes=includes))
+                posts, next_cursor = query.filter(Post.id.in_(ids)).order_by(Post.id).all(), None
+            else:
+                if request.args.get("categoria"):
+                    query = query.filter(en_categorias(parse_ids(request.args["categoria"], "categoria")))
+                sort_col = post_sort(request.args.get("sort"))
+                query = query.options(*post_load_options(campos, sort_col, includes))
+                posts, next_cursor = paginate(query, sort_col, Post.id, descending=True)
+        except ValueError as err:
+            return {"error": str(err)}, 400
+        result, included = compound(posts, includes, campos)
+        return paginated_response(result, next_cursor, included if includes else None)
 
 
     @jwt_required()
@@ -182,31 +758,32 @@ class PostAPI(MethodView):
             post.categorias = categorias
 
         db.session.add(post)
+        db.session.flush()
+        search.index_post(post)
         db.session.commit()
-        # preparar dump con categorias_detalle
-        post_dump = PostSchema().dump(post)
-        post_dump["categorias_detalle"] = [{"id": c.id, "nombre": c.nombre} for c in post.categorias]
-        return post_dump, 201
+        response_cache.invalidate("posts")
+        return post_dump(post), 201
 
 
 class PostDetailAPI(MethodView):
+    @conditional(post_include_probe)
+    @cached("post:{id}", "posts:detail")
     def get(self, id):
-        post = Post.query.get_or_404(id)
-        post_dump = PostSchema().dump(post)
-        post_dump["categorias_detalle"] = [
-            {"id": c.id, "nombre": c.nombre} for c in post.categorias
-        ]
-        # 🔹 Agregamos autor y email
-        autor = Usuario.query.get(post.usuario_id)
-        if autor:
-            post_dump["autor"] = autor.username
-            post_dump["email"] = autor.email
-        return post_dump, 200
+        try:
+            includes = parse_include(request.args.get("include"))
+        except ValueError as err:
+            return {"error": str(err)}, 400
+        post = post_or_404(id)
+        if not includes:
+            return post_dump(post), 200
+        (result,), included = compound([post], includes)
+        result["included"] = included
+        return result, 200
 
 
     @jwt_required()
     def put(self, id):
-        post = Post.query.get_or_404(id)
+        post = post_or_404(id)
 
         if not check_ownership(post.usuario_id):
             return {"error": "acceso denegado"}, 403
@@ -225,43 +802,121 @@ class PostDetailAPI(MethodView):
         if categorias_ids is not None:
             categorias = Categoria.query.filter(Categoria.id.in_(categorias_ids)).all()
             post.categorias = categorias
+            # cambiar sólo la tabla intermedia no dispara el onupdate del post
+            post.updated_at = datetime.utcnow()
 
+        search.index_post(post)
         db.session.commit()
-        post_dump = PostSchema().dump(post)
-        post_dump["categorias_detalle"] = [{"id": c.id, "nombre": c.nombre} for c in post.categorias]
-        return post_dump, 200
+        response_cache.invalidate("posts", f"post:{id}")
+        return post_dump(post), 200
 
     @jwt_required()
+    @allow_repeated_queries
     def delete(self, id):
-        post = Post.query.get_or_404(id)
+        # las categorías no hacen falta: post_categoria se borra por conjunto
+        post = post_or_404(id, lazyload(Post.categorias))
         if not check_ownership(post.usuario_id):
             return {"error": "acceso denegado"}, 403
-        db.session.delete(post)
-        db.session.commit()
+        # DELETE por conjuntos de sus comentarios y categorías, ahora o en el purgador
+        purge.delete_post(post)
         return {"message": "Post eliminado"}, 200
 
 
+class PostBulkAPI(MethodView):
+    @jwt_required()
+    @allow_repeated_queries
+    def post(self):
+        user_id = int(get_jwt_identity())
+
+        def save(validos):
+            ahora = datetime.utcnow()
+            rows = [
+                {"titulo": data["titulo"], "contenido": data["contenido"],
+                 "usuario_id": user_id, "fecha_creacion": ahora, "is_published": True}
+                for _, data in validos
+            ]
+            ids = insert_rows(Post.__table__, rows)
+
+            # una sola consulta para todas las categorías referenciadas en el chunk
+            pedidas = {cid for _, data in validos for cid in data.get("categorias", [])}
+            existentes = set()
+            if pedidas:
+                existentes = {cid for cid, in db.session.query(Categoria.id).filter(Categoria.id.in_(pedidas))}
+            links = [
+                {"post_id": post_id, "categoria_id": cid}
+                for post_id, (_, data) in zip(ids, validos)
+                for cid in dict.fromkeys(data.get("categorias", [])) if cid in existentes
+            ]
+            if links:
+                db.session.execute(post_categoria.insert(), links)
+
+            for post_id, row in zip(ids, rows):
+                row["id"] = post_id
+            search.index_rows(rows)
+            counters.bump("posts", {ahora.date(): len(rows)})
+            return ids
+
+        try:
+            result = bulk_insert(enumerate(iter_bulk_items()), PostSchema(), save)
+        except ValueError as err:
+            return {"error": str(err)}, 400
+        if result["created"]:
+            response_cache.invalidate("posts")
+        return result, 200
+
+
+class PostSearchAPI(MethodView):
+    @cached("posts")
+    def get(self):
+        q = request.args.get("q", "").strip()
+        if not q:
+            return {"error": "Parámetro q requerido"}, 400
+
+        # el orden por relevancia no admite keyset: el cursor lleva el offset
+        limit = page_limit()
+        offset = 0
+        cursor = request.args.get("cursor")
+        if cursor:
+            try:
+                offset, = decode_cursor(cursor)
+                offset = int(offset)
+            except (TypeError, ValueError):
+                return {"error": "cursor inválido"}, 400
+
+        try:
+            rows = search.search_posts(q, limit + 1, offset)
+        except search.IndiceNoCreado:
+            # no se crea acá: ver search.py
+            return {"error": "Índice de búsqueda no creado; correr `flask reindex-search`"}, 503
+        next_cursor = encode_cursor(offset + limit) if len(rows) > limit else None
+        result = []
+        for post, score in rows[:limit]:
+            dumped = post_dump(post)
+            dumped["score"] = round(score, 4)
+            result.append(dumped)
+        return paginated_response(result, next_cursor)
+
+
 # --- COMENTARIOS ---
 class ComentarioAPI(MethodView):
+    @conditional(comentarios_probe)
+    @cached("comments:{post_id}")
     def get(self, post_id):
-        post = Post.query.get_or_404(post_id)
-        comentarios = Comentario.query.filter_by(post_id=post.id, is_visible=True).all()
-        resultado = []
-        for c in comentarios:
-            d = ComentarioSchema().dump(c)
-            autor = Usuario.query.get(c.usuario_id)
-            if autor:
-                d["usuario"] = {
-                    "id": autor.id,
-                    "username": autor.username,
-                    "email": autor.email,
-                }
-            resultado.append(d)
-        return jsonify(resultado), 200
+        post = post_or_404(post_id)
+        try:
+            campos = COMENTARIO_FIELDS.parse(request.args.get("fields"))
+            comentarios, next_cursor = paginate(
+                Comentario.query.filter_by(post_id=post.id, is_visible=True).options(*comentario_load_options(campos)),
+                Comentario.fecha_creacion, Comentario.id
+            )
+        except ValueError as err:
+            return {"error": str(err)}, 400
+        resultado = [comentario_dump(c, campos) for c in comentarios]
+        return paginated_response(resultado, next_cursor)
 
     @jwt_required()
     def post(self, post_id):
-        post = Post.query.get_or_404(post_id)
+        post = post_or_404(post_id)
         try:
             data = ComentarioSchema().load(request.json)
         except ValidationError as err:
@@ -273,22 +928,43 @@ class ComentarioAPI(MethodView):
         )
         db.session.add(comentario)
         db.session.commit()
+        # comment_count y last_comment_at del post cambiaron (ver comment_counts.py)
+        response_cache.invalidate(f"comments:{post.id}", f"post:{post.id}", "posts")
+        return comentario_dump(comentario), 201
 
-        autor = Usuario.query.get(user_id)
-        d = ComentarioSchema().dump(comentario)
-        if autor:
-            d["usuario"] = {
-                "id": autor.id,
-                "username": autor.username,
-                "email": autor.email,
-            }
-        return d, 201
+
+class ComentarioBulkAPI(MethodView):
+    @jwt_required()
+    @allow_repeated_queries
+    def post(self, post_id):
+        post = post_or_404(post_id)
+        user_id = int(get_jwt_identity())
+
+        def save(validos):
+            ahora = datetime.utcnow()
+            rows = [
+                {"texto": data["texto"], "usuario_id": user_id, "post_id": post.id,
+                 "fecha_creacion": ahora, "is_visible": True}
+                for _, data in validos
+            ]
+            ids = insert_rows(Comentario.__table__, rows)
+            counters.bump("comments", {ahora.date(): len(rows)})
+            comment_counts.bump(post.id, len(rows), ahora)
+            return ids
+
+        try:
+            result = bulk_insert(enumerate(iter_bulk_items()), ComentarioSchema(), save)
+        except ValueError as err:
+            return {"error": str(err)}, 400
+        if result["created"]:
+            response_cache.invalidate(f"comments:{post_id}", f"post:{post_id}", "posts")
+        return result, 200
 
 
 class ComentarioDetailAPI(MethodView):
     @jwt_required()
     def put(self, id):
-        comentario = Comentario.query.get_or_404(id)
+        comentario = comentario_or_404(id)
         claims = get_jwt()
         role = claims.get("role")
         user_id = int(get_jwt_identity())
@@ -304,27 +980,22 @@ class ComentarioDetailAPI(MethodView):
         comentario.texto = data["texto"]
         # Si quieres llevar control de modificaciones, añade columna fecha_modificacion en el modelo Comentario
         db.session.commit()
-
-        autor = Usuario.query.get(comentario.usuario_id)
-        d = ComentarioSchema().dump(comentario)
-        if autor:
-            d["usuario"] = {
-                "id": autor.id,
-                "username": autor.username,
-                "email": autor.email,
-            }
-        return d, 200
+        # los posts con ?include=comments también lo muestran
+        response_cache.invalidate(f"comments:{comentario.post_id}", f"post:{comentario.post_id}", "posts")
+        return comentario_dump(comentario), 200
 
     @jwt_required()
     def delete(self, id):
-        comentario = Comentario.query.get_or_404(id)
+        comentario = comentario_or_404(id)
         claims = get_jwt()
         role = claims.get("role")
         user_id = int(get_jwt_identity())
 
         if role in ["admin", "moderator"] or comentario.usuario_id == user_id:
+            post_id = comentario.post_id
             db.session.delete(comentario)
             db.session.commit()
+            response_cache.invalidate(f"comments:{post_id}", f"post:{post_id}", "posts")
             return {"message": "Comentario eliminado"}, 200
 
         return {"error": "acceso denegado"}, 403
@@ -333,8 +1004,61 @@ class ComentarioDetailAPI(MethodView):
 # --- CATEGORÍAS ---
 class CategoriaAPI(MethodView):
     def get(self):
+        if request.args.get("with_counts") in ("1", "true"):
+            return self.get_with_counts()
+        return self.get_all()
+
+    @conditional(categorias_probe)
+    @cached("categories")
+    def get_all(self):
         categorias = Categoria.query.all()
-        return CategoriaSchema(many=True).dump(categorias), 200
+        return [dump_categoria(c) for c in categorias], 200
+
+    # los conteos cambian con cada post: la versión depende también de los posts
+    @conditional(posts_probe)
+    @cached("categories", "posts")
+    def get_with_counts(self):
+        """Categorías con la cantidad de posts publicados de cada una, paginadas por id.
+
+        Una sola consulta: los vínculos de cada categoría se cuentan sobre el índice
+        (categoria_id, post_id) sin tocar la tabla post, y se restan los de posts
+        no publicados (pocos), agrupados con un GROUP BY que entra por el índice de
+        is_published. Unirse a post para filtrar publicados haría una lectura por
+        vínculo: ~20 veces más lento con 1M de vínculos.
+        """
+        limit = page_limit()
+        vinculos = (
+            db.session.query(func.count())
+            .filter(post_categoria.c.categoria_id == Categoria.id)
+            .correlate(Categoria)
+            .scalar_subquery()
+        )
+        ocultos = (
+            db.session.query(post_categoria.c.categoria_id, func.count().label("n"))
+            .join(Post, Post.id == post_categoria.c.post_id)
+            .filter(Post.is_published.is_(False))
+            .group_by(post_categoria.c.categoria_id)
+            .subquery()
+        )
+        query = (
+            db.session.query(
+                Categoria.id, Categoria.nombre,
+                (vinculos - func.coalesce(ocultos.c.n, 0)).label("post_count"),
+            )
+            .outerjoin(ocultos, ocultos.c.categoria_id == Categoria.id)
+            .order_by(Categoria.id)
+        )
+        cursor = request.args.get("cursor")
+        if cursor:
+            try:
+                (last_id,) = decode_cursor(cursor)
+                query = query.filter(Categoria.id > int(last_id))
+            except (TypeError, ValueError):
+                return {"error": "cursor inválido"}, 400
+        rows = query.limit(limit + 1).all()
+        next_cursor = encode_cursor(rows[limit - 1].id) if len(rows) > limit else None
+        items = [{"id": r.id, "nombre": r.nombre, "post_count": r.post_count} for r in rows[:limit]]
+        return paginated_response(items, next_cursor)
 
     @roles_required("moderator", "admin")
     def post(self):
@@ -347,6 +1071,7 @@ class CategoriaAPI(MethodView):
         categoria = Categoria(**data)
         db.session.add(categoria)
         db.session.commit()
+        response_cache.invalidate("categories")
         return CategoriaSchema().dump(categoria), 201
 
 
@@ -370,6 +1095,8 @@ class CategoriaDetailAPI(MethodView):
             categoria.nombre = data["nombre"]
 
         db.session.commit()
+        # los posts embeben el nombre de sus categorías
+        response_cache.invalidate("categories", "posts", "posts:detail")
         return CategoriaSchema().dump(categoria), 200
 
     @roles_required("admin")
@@ -377,6 +1104,7 @@ class CategoriaDetailAPI(MethodView):
         categoria = Categoria.query.get_or_404(id)
         db.session.delete(categoria)
         db.session.commit()
+        response_cache.invalidate("categories", "posts", "posts:detail")
         return {"message": "Categoría eliminada"}, 200
 
 
@@ -384,19 +1112,153 @@ class CategoriaDetailAPI(MethodView):
 class StatsAPI(MethodView):
     @moderator_admin_required
     def get(self):
-        total_posts = Post.query.count()
-        total_comments = Comentario.query.count()
-        total_users = Usuario.query.count()
+        # contadores mantenidos por counters.py: se leen unas pocas filas, sin COUNT(*)
+        totales, posts_last_week = counters.read_stats(datetime.utcnow() - timedelta(days=7))
         data = {
-            "total_posts": total_posts,
-            "total_comments": total_comments,
-            "total_users": total_users
+            "total_posts": totales.get("posts", 0),
+            "total_comments": totales.get("comments", 0),
+            "total_users": totales.get("users", 0)
         }
         claims = get_jwt()
         if claims.get("role") == "admin":
-            one_week_ago = datetime.utcnow() - datetime.timedelta(days=7) if hasattr(datetime, "timedelta") else None
-            from datetime import timedelta
-            one_week_ago = datetime.utcnow() - timedelta(days=7)
-            posts_last_week = Post.query.filter(Post.fecha_creacion >= one_week_ago).count()
             data["posts_last_week"] = posts_last_week
-        return jsonify(data), 200
\ No newline at end of file
+            data["cache"] = response_cache.stats()
+            data["password_hashing"] = password_hasher.stats()
+            data["database"] = replicas.stats()
+        return jsonify(data), 200
+
+
+# --- EXPORTACIÓN ---
+EXPORT_BATCH_SIZE = 1000
+
+
+def iter_batches(query, id_col):
+    """Recorre la query en lotes por id (keyset), sin materializar la tabla.
+
+    Cada lote es un SELECT independiente, así los eager loads (selectin) siguen
+    funcionando, y la sesión se vacía entre lotes para que la memoria no crezca.
+    """
+    last_id = 0
+    while True:
+        rows = query.filter(id_col > last_id).order_by(id_col).limit(EXPORT_BATCH_SIZE).all()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1].id
+        db.session.expunge_all()
+
+
+def iter_changed(query, changed_col, id_col, since):
+    """Como iter_batches, pero en orden de (changed_col, id) desde `since`: se
+    recorre el índice de changed_col y sólo se leen las filas que cambiaron."""
+    query = query.filter(changed_col >= since).order_by(changed_col, id_col)
+    last = None
+    while True:
+        batch = query
+        if last is not None:
+            batch = batch.filter(or_(changed_col > last[0], and_(changed_col == last[0], id_col > last[1])))
+        rows = batch.limit(EXPORT_BATCH_SIZE).all()
+        if not rows:
+            return
+        yield rows
+        last = (getattr(rows[-1], changed_col.key), rows[-1].id)
+        db.session.expunge_all()
+
+
+def iter_ids(query, id_col, ids):
+    """Como iter_batches, pero sobre los ids que devuelve el select `ids`: cada
+    lote toma los siguientes ids en un subselect y carga esas filas por clave
+    primaria. `ids` tiene que filtrar lo mismo que `query`: un lote vacío es el
+    final."""
+    ids = ids.subquery()
+    last_id = 0
+    while True:
+        batch = select(ids.c.id).where(ids.c.id > last_id).order_by(ids.c.id).limit(EXPORT_BATCH_SIZE)
+        rows = query.filter(id_col.in_(batch)).order_by(id_col).all()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1].id
+        db.session.expunge_all()
+
+
+def posts_changed_since(since):
+    """Ids de los posts no borrados creados, editados o con comentarios nuevos,
+    editados u ocultados desde `since`. Cada parte es un rango de un índice."""
+    vivo = Post.deleted_at.is_(None)
+    return union(
+        select(Post.id.label("id")).where(Post.fecha_creacion >= since, vivo),
+        select(Post.id.label("id")).where(Post.updated_at >= since, vivo),
+        select(Comentario.post_id.label("id")).join(Post, Post.id == Comentario.post_id)
+        .where(Comentario.updated_at >= since, vivo),
+    )
+
+
+def export_posts(since):
+    query = Post.query.filter(Post.deleted_at.is_(None)).options(selectinload(Post.comentarios))
+    if since:
+        batches = iter_ids(query, Post.id, posts_changed_since(since))
+    else:
+        batches = iter_batches(query, Post.id)
+    for rows in batches:
+        for post in rows:
+            dumped = post_dump(post)
+            dumped["comentarios"] = [comentario_dump(c) for c in post.comentarios]
+            yield dumped
+
+
+def export_comments(since):
+    query = Comentario.query.filter(Comentario.post.has(Post.deleted_at.is_(None)))
+    if since:
+        # updated_at se pone también en el alta
+        batches = iter_changed(query, Comentario.updated_at, Comentario.id, since)
+    else:
+        batches = iter_batches(query, Comentario.id)
+    for rows in batches:
+        for comentario in rows:
+            yield comentario_dump(comentario)
+
+
+def export_users(since):
+    query = Usuario.query.filter(Usuario.deleted_at.is_(None))
+    if since:
+        # alta, cambio de rol o activación; los usuarios borrados no aparecen
+        batches = iter_changed(query, Usuario.updated_at, Usuario.id, since)
+    else:
+        batches = iter_batches(query, Usuario.id)
+    for rows in batches:
+        for user in rows:
+            yield dump_usuario(user)
+
+
+EXPORTS = {
+    "posts": export_posts,
+    "comments": export_comments,
+    "users": export_users,
+}
+
+
+class ExportAPI(MethodView):
+    @roles_required("admin")
+    @allow_repeated_queries
+    def get(self, recurso):
+        since = request.args.get("since")
+        try:
+            since = datetime.fromisoformat(since) if since else None
+        except ValueError:
+            return {"error": "since debe ser una fecha ISO 8601"}, 400
+
+        dumps = current_app.json.dumps
+
+        def generate():
+            for item in EXPORTS[recurso](since):
+                yield dumps(item) + "\n"
+
+        return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+# --- MÉTRICAS ---
+class MetricsAPI(MethodView):
+    @roles_required("admin")
+    def get(self):
+        return Response(metrics.render(), mimetype="text/plain; version=0.0.4")